@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de punta a punta de la API: latencia p50/p95/p99, throughput y consultas
+SQL por request para cada endpoint, con resultados en JSON para comparar entre commits.
+
+Para cada escala pedida:
+1. Siembra la base con benchmarks/generar_datos.py (⚠️ con --limpiar: vacía tutores,
+   pacientes y consultas de la base de DATABASE_URL; usar una base local de pruebas).
+2. Levanta el backend (uvicorn, 1 worker) en un proceso aparte con los servicios externos
+   reemplazados por dobles locales: Google Calendar (get_calendar_service), el envío de
+   correos (envia) y el microservicio de WhatsApp (un servidor HTTP local en
+   WHATSAPP_MS_BASE_URL), todos con la latencia de --latencia-externa.
+3. Recorre los escenarios de uno en uno con N clientes concurrentes (calentamiento +
+   medición). Las consultas SQL se cuentan en el proceso del backend (eventos de los motores
+   de SQLAlchemy) y se dividen por los requests del escenario.
+
+Escenarios: búsquedas y listados paginados, detalles, listas de vacunas, creación de
+consultas (POST /consultas/completa), PDF y los endpoints que usan servicios externos.
+Los ids se eligen al azar (con --semilla) entre filas existentes, para no medir solo la caché.
+
+Uso (desde Backend/, con una base local migrada):
+    python benchmarks/bench_api.py --escalas 1 10                   # siembra ~10k y ~100k consultas
+    python benchmarks/bench_api.py                                  # usa los datos que ya hay
+    python benchmarks/bench_api.py --endpoints pacientes_busqueda consulta_crear --duracion 20
+    python benchmarks/bench_api.py --escalas 10 --comparar benchmarks/resultados/anterior.json
+
+El JSON queda en benchmarks/resultados/ (o en --salida) con el commit, la configuración y,
+por escala y endpoint: requests, rps, latencias en ms, códigos de respuesta y consultas SQL.
+Cliente y backend corren en la misma máquina: comparar corridas hechas en el mismo equipo.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIRECTORIO, ".."))
+
+DIRECTORIO_RESULTADOS = os.path.join(DIRECTORIO, "resultados")
+RUTA_CONTADOR_SQL = "/_bench/sql"
+
+# Destinatario de los correos que encola email_programar (se borran al terminar cada escala)
+CORREO_BENCH = "tutor@example.com"
+
+TERMINOS = ["luna", "garcia", "maria gonzalez", "1234", "gastro", "labrador", "vacuna", "valdivia"]
+
+
+# =============================================================================
+# Escenarios: nombre -> (método, función que arma (ruta, cuerpo) con el rng y la muestra)
+# =============================================================================
+def _paciente(rng, m):
+    return rng.choice(m["pacientes"])
+
+
+def _cuerpo_consulta(rng, m):
+    id_paciente, rut = _paciente(rng, m)
+    hoy = date.today()
+    return {
+        "id_paciente": id_paciente,
+        "rut": rut,
+        "fecha_consulta": hoy.isoformat(),
+        "motivo": "Control de rutina (benchmark)",
+        "diagnostico": "Sin hallazgos anormales",
+        "peso": round(rng.uniform(2, 45), 2),
+        "temperatura": 38.5,
+        "recetas": [{"medicamento": "Meloxicam", "dosis": "1 comprimido", "frecuencia": 24, "duracion": 5}],
+        "tratamientos": [{
+            "id_tratamiento": rng.choice(m["tratamientos"]),
+            "dosis": "1 ml",
+            "proxima_dosis": (hoy + timedelta(days=365)).isoformat(),
+        }],
+    }
+
+
+ESCENARIOS = {
+    "tutores_listado": ("GET", lambda rng, m: ("/tutores/paginated/?limit=50", None)),
+    "tutores_busqueda": ("GET", lambda rng, m: (f"/tutores/paginated/?limit=50&search={rng.choice(TERMINOS)}", None)),
+    "pacientes_listado": ("GET", lambda rng, m: ("/pacientes/paginated/?limit=50", None)),
+    "pacientes_busqueda": ("GET", lambda rng, m: (f"/pacientes/paginated/?limit=50&search={rng.choice(TERMINOS)}", None)),
+    "consultas_listado": ("GET", lambda rng, m: ("/consultas/paginated/?limit=50", None)),
+    "consultas_busqueda": ("GET", lambda rng, m: (f"/consultas/paginated/?limit=50&search={rng.choice(TERMINOS)}", None)),
+    "tutor_detalle": ("GET", lambda rng, m: (f"/tutores/{_paciente(rng, m)[1]}", None)),
+    "paciente_detalle": ("GET", lambda rng, m: (f"/pacientes/{_paciente(rng, m)[0]}", None)),
+    "consulta_detalle": ("GET", lambda rng, m: (f"/consultas/{rng.choice(m['consultas'])}", None)),
+    "vacunas_lista": ("GET", lambda rng, m: ("/consultas/tratamientos/vacunas/nombre/", None)),
+    "vacunas_paciente": ("GET", lambda rng, m: (
+        f"/consultas/tratamientos/vacunas/paciente/{_paciente(rng, m)[0]}/proximas/", None)),
+    "consulta_crear": ("POST", lambda rng, m: ("/consultas/completa", _cuerpo_consulta(rng, m))),
+    "consulta_pdf": ("GET", lambda rng, m: (f"/consultas/{rng.choice(m['consultas'])}/pdf", None)),
+    "certificado_pdf": ("GET", lambda rng, m: (f"/pacientes/{_paciente(rng, m)[0]}/certificado-transporte", None)),
+    "eventos": ("GET", lambda rng, m: ("/events?max_results=10", None)),
+    "email_programar": ("POST", lambda rng, m: (
+        f"/email/{(datetime.now() + timedelta(days=1)).isoformat(timespec='seconds')}",
+        {"email": CORREO_BENCH, "cuerpo": "Recordatorio (benchmark)"})),
+    "whatsapp_estado": ("GET", lambda rng, m: ("/whatsapp/status", None)),
+}
+
+# Respuestas esperables además de 2xx (p. ej. pacientes sin vacunas próximas)
+CODIGOS_ESPERADOS = {"vacunas_paciente": {404}}
+
+
+# =============================================================================
+# Backend con dobles locales (proceso hijo)
+# =============================================================================
+class _CalendarioFalso:
+    """Imita la parte de googleapiclient que usa main.py: events().list/insert/delete().execute()."""
+
+    def __init__(self, latencia: float):
+        self.latencia = latencia
+        self._resultado = None
+
+    def events(self):
+        return self
+
+    def list(self, **filtros):
+        self._resultado = {"items": [
+            {"id": f"evento-{i}", "summary": f"Control {i}", "start": {"dateTime": filtros.get("timeMin")}}
+            for i in range(int(filtros.get("maxResults", 10)))
+        ]}
+        return self
+
+    def insert(self, calendarId=None, body=None):
+        self._resultado = {"id": "evento-nuevo", **(body or {})}
+        return self
+
+    def delete(self, calendarId=None, eventId=None):
+        self._resultado = {}
+        return self
+
+    def execute(self):
+        time.sleep(self.latencia)
+        return self._resultado
+
+
+def _servidor_whatsapp_falso(latencia: float) -> ThreadingHTTPServer:
+    """whatsapp-ms local: responde lo mínimo que esperan los endpoints /whatsapp/*."""
+
+    class Manejador(BaseHTTPRequestHandler):
+        def _responder(self):
+            time.sleep(latencia)
+            cuerpo = json.dumps({"conectado": True, "qr": None, "ok": True, "mensaje": "ok"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        do_GET = do_POST = _responder
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def servir(puerto: int, latencia_externa: float, sin_cache: bool) -> None:
+    """Levanta main:app con los dobles locales y el contador de SQL (corre en un proceso aparte)."""
+    whatsapp = _servidor_whatsapp_falso(latencia_externa)
+    os.environ["WHATSAPP_MS_BASE_URL"] = f"http://127.0.0.1:{whatsapp.server_address[1]}"
+    # El despachador de la cola de correos no corre en el backend de prueba
+    os.environ["EMAIL_QUEUE_ENABLED"] = "false"
+    if sin_cache:
+        os.environ["RESPONSE_CACHE_TTL"] = "0"
+        os.environ["RESPONSE_CACHE_EVENTS_TTL"] = "0"
+
+    import uvicorn
+    from sqlalchemy import event
+
+    import database
+    import main
+
+    async def envia_falso(email):
+        await asyncio.sleep(latencia_externa)
+
+    main.get_calendar_service = lambda: _CalendarioFalso(latencia_externa)
+    main.envia = envia_falso
+
+    contador = {"consultas": 0}
+    candado = threading.Lock()
+
+    def contar(*args):
+        with candado:
+            contador["consultas"] += 1
+
+    motores = {database.engine, database.async_engine.sync_engine}
+    if database.HAY_REPLICA:
+        motores |= {database.read_engine, database.async_read_engine.sync_engine}
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", contar)
+
+    @main.app.get(RUTA_CONTADOR_SQL, include_in_schema=False)
+    def contador_sql():
+        return dict(contador)
+
+    uvicorn.run(main.app, host="127.0.0.1", port=puerto, workers=1, log_level="warning", access_log=False)
+
+
+def _puerto_libre() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _esperar_backend(url: str, proceso, limite: float = 60) -> None:
+    fin = time.perf_counter() + limite
+    while time.perf_counter() < fin:
+        if not proceso.is_alive():
+            raise RuntimeError("El backend terminó al iniciar (revisar el log de arriba)")
+        try:
+            httpx.get(url + RUTA_CONTADOR_SQL, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    raise RuntimeError(f"El backend no respondió en {limite:.0f} s")
+
+
+# =============================================================================
+# Medición (proceso principal)
+# =============================================================================
+def _percentil(valores, p):
+    """Percentil por rango más cercano."""
+    ordenados = sorted(valores)
+    k = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[k]
+
+
+def _token() -> str:
+    if os.getenv("GOVET_TOKEN"):
+        return os.getenv("GOVET_TOKEN")
+    from dotenv import load_dotenv
+    load_dotenv()
+    from session_auth import create_session_token
+    return create_session_token({"sub": "benchmark", "email": "benchmark@govet.local"})
+
+
+def _muestra(semilla: int, tamano: int = 500) -> dict:
+    """Ids existentes para armar los requests (misma muestra para una misma base y semilla)."""
+    from sqlalchemy import text
+
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT setseed(:s)"), {"s": (semilla % 1000) / 1000})
+        pacientes = db.execute(text("""
+            SELECT tp.id_paciente, tp.rut FROM govet.tutor_paciente tp
+            ORDER BY random() LIMIT :n
+        """), {"n": tamano}).all()
+        consultas = db.execute(text(
+            "SELECT id_consulta FROM govet.consulta ORDER BY random() LIMIT :n"
+        ), {"n": tamano}).scalars().all()
+        tratamientos = db.execute(text(
+            "SELECT id_tratamiento FROM govet.tratamiento WHERE tipo_tratamiento = 'vacuna' ORDER BY 1"
+        )).scalars().all() or db.execute(text("SELECT id_tratamiento FROM govet.tratamiento ORDER BY 1")).scalars().all()
+        conteos = {
+            tabla: db.execute(text(f"SELECT count(*) FROM govet.{tabla}")).scalar()
+            for tabla in ("tutor", "paciente", "consulta", "consulta_tratamiento", "receta_medica")
+        }
+    finally:
+        db.close()
+    if not pacientes or not consultas or not tratamientos:
+        raise RuntimeError("La base no tiene pacientes, consultas o tratamientos: sembrar con --escalas")
+    return {
+        "pacientes": [tuple(p) for p in pacientes],
+        "consultas": list(consultas),
+        "tratamientos": list(tratamientos),
+        "conteos": conteos,
+    }
+
+
+async def _cliente(http, metodo, armar, muestra, rng, fin, latencias, codigos):
+    while time.perf_counter() < fin:
+        ruta, cuerpo = armar(rng, muestra)
+        inicio = time.perf_counter()
+        try:
+            respuesta = await http.request(metodo, ruta, json=cuerpo)
+            codigos[respuesta.status_code] += 1
+        except httpx.HTTPError as e:
+            codigos[type(e).__name__] += 1
+            continue
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+
+async def _consultas_sql(http) -> int:
+    return (await http.get(RUTA_CONTADOR_SQL)).json()["consultas"]
+
+
+async def medir_escenario(url, token, nombre, muestra, args) -> dict:
+    metodo, armar = ESCENARIOS[nombre]
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    headers = {"Authorization": f"Bearer {token}"}
+    rngs = [random.Random(f"{args.semilla}:{nombre}:{i}") for i in range(args.concurrencia)]
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limites, timeout=120) as http:
+        fin = time.perf_counter() + args.calentamiento
+        await asyncio.gather(*[
+            _cliente(http, metodo, armar, muestra, rng, fin, [], Counter()) for rng in rngs
+        ])
+
+        latencias, codigos = [], Counter()
+        sql_antes = await _consultas_sql(http)
+        inicio = time.perf_counter()
+        fin = inicio + args.duracion
+        await asyncio.gather(*[
+            _cliente(http, metodo, armar, muestra, rng, fin, latencias, codigos) for rng in rngs
+        ])
+        transcurrido = time.perf_counter() - inicio
+        # Los requests en curso al cortar ya terminaron (gather), así que el conteo es completo
+        sql = await _consultas_sql(http) - sql_antes
+
+    requests = sum(codigos.values())
+    esperados = CODIGOS_ESPERADOS.get(nombre, set())
+    errores = sum(n for c, n in codigos.items() if not (isinstance(c, int) and (200 <= c < 300 or c in esperados)))
+    resultado = {
+        "metodo": metodo,
+        "requests": requests,
+        "rps": round(len(latencias) / transcurrido, 2),
+        "errores": errores,
+        "codigos": {str(c): n for c, n in codigos.items()},
+        "sql_por_request": round(sql / requests, 2) if requests else None,
+    }
+    if latencias:
+        resultado.update({
+            "p50_ms": round(statistics.median(latencias), 2),
+            "p95_ms": round(_percentil(latencias, 95), 2),
+            "p99_ms": round(_percentil(latencias, 99), 2),
+            "media_ms": round(statistics.fmean(latencias), 2),
+            "max_ms": round(max(latencias), 2),
+        })
+    return resultado
+
+
+def _imprimir(nombre, r):
+    if "p50_ms" not in r:
+        print(f"   {nombre:<20} sin respuestas: {r['codigos']}")
+        return
+    errores = f"  ❌ {r['errores']} errores {r['codigos']}" if r["errores"] else ""
+    print(
+        f"   {nombre:<20} {r['rps']:>8.1f} req/s  p50 {r['p50_ms']:>7.1f}  p95 {r['p95_ms']:>7.1f}  "
+        f"p99 {r['p99_ms']:>7.1f} ms  SQL/req {r['sql_por_request']}{errores}"
+    )
+
+
+def _sembrar(escala: float, semilla: int, fecha_referencia: str) -> None:
+    print(f"\n🌱 Sembrando escala {escala:g} (semilla {semilla})...")
+    subprocess.run(
+        [
+            sys.executable, os.path.join(DIRECTORIO, "generar_datos.py"),
+            "--escala", str(escala), "--semilla", str(semilla),
+            "--fecha-referencia", fecha_referencia, "--limpiar",
+        ],
+        check=True,
+    )
+
+
+def _limpiar_correos() -> None:
+    """Borra de govet.correo_programado los correos encolados por email_programar."""
+    from sqlalchemy import text
+
+    from database import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM govet.correo_programado WHERE email = :email"), {"email": CORREO_BENCH})
+
+
+def correr_escala(args, token, etiqueta: str) -> dict:
+    muestra = _muestra(args.semilla)
+    print(f"\n📊 Escala {etiqueta}: " + ", ".join(f"{t} {n}" for t, n in muestra["conteos"].items()))
+
+    puerto = _puerto_libre()
+    url = f"http://127.0.0.1:{puerto}"
+    contexto = multiprocessing.get_context("spawn")
+    backend = contexto.Process(target=servir, args=(puerto, args.latencia_externa / 1000, args.sin_cache), daemon=True)
+    backend.start()
+    try:
+        _esperar_backend(url, backend)
+        endpoints = {}
+        for nombre in args.endpoints:
+            endpoints[nombre] = asyncio.run(medir_escenario(url, token, nombre, muestra, args))
+            _imprimir(nombre, endpoints[nombre])
+    finally:
+        backend.terminate()
+        backend.join(10)
+        _limpiar_correos()
+    return {"datos": muestra["conteos"], "endpoints": endpoints}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def comparar(actual: dict, anterior: dict) -> None:
+    """Cambio de p95 y de consultas SQL por endpoint respecto de una corrida anterior."""
+    print(f"\n📈 Comparación con {anterior.get('commit')} ({anterior.get('fecha')})")
+    for escala, datos in actual["escalas"].items():
+        base = anterior.get("escalas", {}).get(escala)
+        if not base:
+            print(f"   escala {escala}: sin datos en la corrida anterior")
+            continue
+        print(f"   escala {escala}:")
+        for nombre, r in datos["endpoints"].items():
+            b = base["endpoints"].get(nombre)
+            if not b or "p95_ms" not in b or "p95_ms" not in r:
+                continue
+            cambio = (r["p95_ms"] / b["p95_ms"] - 1) * 100 if b["p95_ms"] else 0
+            marca = "🔴" if cambio > 10 else "🟢" if cambio < -10 else "  "
+            print(
+                f"   {marca} {nombre:<20} p95 {b['p95_ms']:>7.1f} → {r['p95_ms']:>7.1f} ms ({cambio:+.0f}%)  "
+                f"SQL/req {b['sql_por_request']} → {r['sql_por_request']}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", type=float, nargs="+",
+                        help="Escalas a sembrar con generar_datos.py (vacía la base); sin esto usa los datos actuales")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--fecha-referencia", default=date.today().isoformat(),
+                        help="Fecha 'hoy' de los datos sembrados (fijarla para repetir exactamente una corrida)")
+    parser.add_argument("--endpoints", nargs="+", default=list(ESCENARIOS), choices=list(ESCENARIOS), metavar="ESCENARIO")
+    parser.add_argument("--concurrencia", type=int, default=20)
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos de medición por endpoint")
+    parser.add_argument("--calentamiento", type=float, default=2, help="Segundos de calentamiento por endpoint")
+    parser.add_argument("--latencia-externa", type=float, default=50,
+                        help="Latencia simulada (ms) de Google Calendar, correo y WhatsApp")
+    parser.add_argument("--sin-cache", action="store_true", help="Desactiva la caché de respuestas del backend")
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    token = _token()
+    print(f"⚙️  {args.concurrencia} clientes, {args.duracion:g} s por endpoint, {len(args.endpoints)} endpoints")
+
+    resultados = {
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "configuracion": {
+            k: getattr(args, k) for k in (
+                "semilla", "fecha_referencia", "concurrencia", "duracion", "calentamiento",
+                "latencia_externa", "sin_cache",
+            )
+        },
+        "escalas": {},
+    }
+    for escala in args.escalas or [None]:
+        if escala is None:
+            etiqueta = "actual"
+        else:
+            etiqueta = f"{escala:g}"
+            _sembrar(escala, args.semilla, args.fecha_referencia)
+        resultados["escalas"][etiqueta] = correr_escala(args, token, etiqueta)
+
+    salida = args.salida or os.path.join(
+        DIRECTORIO_RESULTADOS, f"bench_api_{resultados['commit']}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultados, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia de búsqueda para los endpoints paginados.
+
+Ejecuta, para cada término de búsqueda, las mismas consultas que hacen
+/tutores/paginated/, /pacientes/paginated/ y /consultas/paginated/ (conteo + primera
+página) usando los filtros de services/busqueda.py, y reporta p50/p95/p99 en ms.
+
+Requiere una base con datos (idealmente 100k+ consultas: benchmarks/generar_datos.py
+--escala 10) y la migración Dbase/migrations/001_busqueda_trigram.sql aplicada.
+
+Uso (desde Backend/):
+    python benchmarks/bench_busqueda.py
+    python benchmarks/bench_busqueda.py --repeticiones 50 --terminos luna perez 12345678
+    python benchmarks/bench_busqueda.py --sin-indices   # desactiva index/bitmap scans para comparar
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, text  # noqa: E402
+
+import models  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from services.busqueda import (  # noqa: E402
+    filtro_busqueda_tutores,
+    filtro_busqueda_pacientes,
+    filtro_busqueda_consultas,
+)
+
+TERMINOS_POR_DEFECTO = ["luna", "garcia", "maria gonzalez", "1234", "gastro", "labrador", "vacuna"]
+
+
+def _percentil(valores, p):
+    """Percentil por rango más cercano."""
+    ordenados = sorted(valores)
+    k = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[k]
+
+
+def _consultas_busqueda(db, termino, limit):
+    """Conteo + primera página, igual que los endpoints."""
+    tutores = db.query(models.Tutor).filter(models.Tutor.activo == True, filtro_busqueda_tutores(termino))
+    tutores.count()
+    tutores.order_by(models.Tutor.rut).limit(limit).all()
+
+    pacientes = db.query(models.Paciente).filter(models.Paciente.activo == True, filtro_busqueda_pacientes(termino))
+    pacientes.count()
+    pacientes.order_by(models.Paciente.id_paciente).limit(limit).all()
+
+    consultas = db.query(models.Consulta).filter(filtro_busqueda_consultas(termino))
+    consultas.count()
+    consultas.order_by(models.Consulta.fecha_consulta.desc().nulls_last(), models.Consulta.id_consulta.desc()).limit(limit).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda paginada")
+    parser.add_argument("--terminos", nargs="+", default=TERMINOS_POR_DEFECTO)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--sin-indices", action="store_true", help="Desactiva index/bitmap scans (línea base)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        total_consultas = db.query(func.count(models.Consulta.id_consulta)).scalar()
+        print(f"📊 Consultas en la base: {total_consultas}")
+        if total_consultas < 100_000:
+            print("⚠️  Menos de 100k consultas: los resultados no representan la escala objetivo")
+
+        if args.sin_indices:
+            db.execute(text("SET enable_indexscan = off"))
+            db.execute(text("SET enable_bitmapscan = off"))
+            print("🔓 Index scans desactivados (línea base)")
+
+        print(f"\n{'término':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        print("-" * 50)
+        todas = []
+        for termino in args.terminos:
+            # Calentar caché
+            _consultas_busqueda(db, termino, args.limit)
+            tiempos = []
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                _consultas_busqueda(db, termino, args.limit)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            todas.extend(tiempos)
+            print(f"{termino:<20}{statistics.median(tiempos):>10.1f}{_percentil(tiempos, 95):>10.1f}{_percentil(tiempos, 99):>10.1f}")
+
+        print("-" * 50)
+        print(f"{'TOTAL':<20}{statistics.median(todas):>10.1f}{_percentil(todas, 95):>10.1f}{_percentil(todas, 99):>10.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga: throughput y latencia de los endpoints de lectura con N clientes concurrentes.
+
+Cada cliente recorre en bucle la lista de endpoints durante --duracion segundos contra un
+backend en ejecución, y al final se reporta requests/s, p50/p95/p99 y códigos de respuesta.
+
+Para comparar el motor síncrono con el asíncrono, levantar el backend de la versión anterior
+en otro puerto y pasar ambas URL:
+
+    uvicorn main:app --port 4007 --workers 1            # versión actual (endpoints async)
+    uvicorn main:app --port 4008 --workers 1            # checkout anterior (endpoints sync)
+    python benchmarks/bench_concurrencia.py --url http://localhost:4007 --comparar http://localhost:4008
+
+Autenticación: --token, o la variable GOVET_TOKEN; si no hay, se genera un token de sesión
+con SESSION_JWT_SECRET (el mismo secreto que usa el backend).
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+ENDPOINTS_POR_DEFECTO = [
+    "/pacientes/{id_paciente}",
+    "/consultas/{id_consulta}",
+    "/tutores/paginated/?limit=50",
+    "/pacientes/paginated/?limit=50",
+    "/consultas/paginated/?limit=50",
+    "/consultas/tratamientos/vacunas/nombre/",
+    "/consultas/tratamientos/vacunas/paciente/{id_paciente}/proximas/",
+]
+
+
+def _percentil(valores, p):
+    """Percentil por rango más cercano."""
+    ordenados = sorted(valores)
+    k = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[k]
+
+
+def _obtener_token(token):
+    if token:
+        return token
+    if os.getenv("GOVET_TOKEN"):
+        return os.getenv("GOVET_TOKEN")
+    from dotenv import load_dotenv
+    load_dotenv()
+    from session_auth import create_session_token
+    return create_session_token({"sub": "benchmark", "email": "benchmark@govet.local"})
+
+
+async def _cliente(http, rutas, fin, latencias, codigos):
+    i = 0
+    while time.perf_counter() < fin:
+        ruta = rutas[i % len(rutas)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            respuesta = await http.get(ruta)
+            codigos[respuesta.status_code] += 1
+        except httpx.HTTPError as e:
+            codigos[type(e).__name__] += 1
+            continue
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+
+async def medir(url, rutas, concurrencia, duracion, calentamiento, token):
+    """Devuelve (requests/s, latencias ms, Counter de códigos) para una URL base."""
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limites, timeout=60) as http:
+        # Calentamiento (conexiones, caché de la base), sin registrar
+        fin = time.perf_counter() + calentamiento
+        await asyncio.gather(*[_cliente(http, rutas, fin, [], Counter()) for _ in range(concurrencia)])
+
+        latencias, codigos = [], Counter()
+        inicio = time.perf_counter()
+        fin = inicio + duracion
+        await asyncio.gather(*[_cliente(http, rutas, fin, latencias, codigos) for _ in range(concurrencia)])
+        transcurrido = time.perf_counter() - inicio
+    return len(latencias) / transcurrido, latencias, codigos
+
+
+def _imprimir(url, rps, latencias, codigos):
+    print(f"\n🌐 {url}")
+    if not latencias:
+        print(f"   sin respuestas: {dict(codigos)}")
+        return
+    print(f"   throughput: {rps:,.1f} req/s")
+    print(f"   latencia ms: p50 {statistics.median(latencias):.1f} | p95 {_percentil(latencias, 95):.1f} | p99 {_percentil(latencias, 99):.1f}")
+    print(f"   respuestas: {dict(codigos)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga de endpoints de lectura")
+    parser.add_argument("--url", default="http://localhost:4007")
+    parser.add_argument("--comparar", help="Segunda URL base (p. ej. la versión síncrona) para comparar")
+    parser.add_argument("--concurrencia", type=int, default=200)
+    parser.add_argument("--duracion", type=float, default=20, help="Segundos de medición")
+    parser.add_argument("--calentamiento", type=float, default=3, help="Segundos de calentamiento")
+    parser.add_argument("--id-paciente", type=int, default=1)
+    parser.add_argument("--id-consulta", type=int, default=1)
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS_POR_DEFECTO)
+    parser.add_argument("--token", help="Token de sesión (Authorization: Bearer)")
+    args = parser.parse_args()
+
+    token = _obtener_token(args.token)
+    rutas = [e.format(id_paciente=args.id_paciente, id_consulta=args.id_consulta) for e in args.endpoints]
+    print(f"⚙️  {args.concurrencia} clientes concurrentes, {args.duracion:.0f}s, {len(rutas)} endpoints")
+
+    resultados = {}
+    for url in [args.url] + ([args.comparar] if args.comparar else []):
+        rps, latencias, codigos = asyncio.run(
+            medir(url, rutas, args.concurrencia, args.duracion, args.calentamiento, token)
+        )
+        resultados[url] = rps
+        _imprimir(url, rps, latencias, codigos)
+
+    if args.comparar and resultados[args.comparar]:
+        print(f"\n📈 {args.url} / {args.comparar}: {resultados[args.url] / resultados[args.comparar]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
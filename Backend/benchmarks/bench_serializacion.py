@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: CPU para serializar 1.000 consultas (con recetas y tratamientos) por el
+camino anterior y por el camino rápido.
+
+- anterior: ConsultaResponse validado campo a campo, devuelto con response_model (FastAPI lo
+  vuelve a convertir y validar contra List[ConsultaResponse]) y serializado con json.
+- rápido: ConsultaResponse con model_construct (schemas.construir_desde_orm) devuelto con
+  respuesta_rapida (orjson, sin pasar por response_model).
+
+Las consultas son objetos ORM en memoria (no se necesita base de datos) y cada camino se
+mide con una app FastAPI mínima servida por TestClient, así se incluye todo lo que hace
+FastAPI con la respuesta. Se reporta el tiempo de CPU del proceso (process_time).
+
+    python benchmarks/bench_serializacion.py
+    python benchmarks/bench_serializacion.py --consultas 5000 --repeticiones 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# models importa database, que crea los motores (sin conectarse); basta con una URL cualquiera
+os.environ.setdefault("DATABASE_URL", "postgresql://govet@localhost/govet")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import models  # noqa: E402
+from schemas import ConsultaResponse, RecetaResponse, TratamientoAplicadoResponse  # noqa: E402
+from services.serializacion import ORJSON_DISPONIBLE, respuesta_rapida  # noqa: E402
+
+
+# Campos simples de la consulta (sin la PK ni las relaciones)
+CAMPOS_CONSULTA = [c for c in ConsultaResponse.model_fields if c not in ("id_consulta", "recetas", "tratamientos")]
+
+
+def generar_consultas(cantidad: int) -> List[models.Consulta]:
+    vacuna = models.Tratamiento(id_tratamiento=1, nombre="Vacuna Óctuple", tipo_tratamiento="vacuna")
+    antiparasitario = models.Tratamiento(id_tratamiento=2, nombre="Antiparasitario interno", tipo_tratamiento="antiparasitario")
+    base = date(2025, 1, 1)
+    consultas = []
+    for i in range(cantidad):
+        fecha = base + timedelta(days=i % 365)
+        consulta = models.Consulta(
+            id_consulta=i + 1, id_paciente=(i % 300) + 1, rut=f"{10000000 + i}-{i % 10}",
+            fecha_consulta=fecha, motivo="Control anual", diagnostico="Sano", observaciones="Sin observaciones",
+            dht=5, nodulos_linfaticos="Normales", mucosas="Rosadas", peso=12.5 + i % 7,
+            auscultacion_cardiaca_toraxica="Normal", estado_pelaje="Brillante", condicion_corporal="3/5",
+            tllc=1.5, estado_piel="Normal", frecuencia_respiratoria=24.0, frecuencia_cardiaca=96.0,
+            examen_clinico="Sin hallazgos", prediagnostico="Sano", pronostico="Bueno",
+            indicaciones_generales="Repetir control en un año", temperatura=38.5,
+        )
+        consulta.recetas = [
+            models.Receta(id_receta=i * 2 + n, id_consulta=i + 1, medicamento="Meloxicam", dosis="0,1 mg/kg",
+                          frecuencia=24, duracion=5, numero_serie=f"L-{i}-{n}")
+            for n in range(2)
+        ]
+        consulta.tratamientos = [
+            models.ConsultaTratamiento(id_aplicacion=i * 2 + n, id_paciente=(i % 300) + 1, id_consulta=i + 1,
+                                       id_tratamiento=tratamiento.id_tratamiento, tratamiento=tratamiento,
+                                       fecha_tratamiento=fecha, dosis="1 ml", marca="Genérica",
+                                       numero_serial=f"S-{i}-{n}", proxima_dosis=fecha + timedelta(days=365))
+            for n, tratamiento in enumerate((vacuna, antiparasitario))
+        ]
+        consultas.append(consulta)
+    return consultas
+
+
+def respuesta_validada(c: models.Consulta) -> ConsultaResponse:
+    """Construcción anterior a construir_desde_orm: cada esquema se valida."""
+    return ConsultaResponse(
+        **{campo: getattr(c, campo) for campo in CAMPOS_CONSULTA},
+        id_consulta=c.id_consulta,
+        recetas=[RecetaResponse.model_validate(r) for r in c.recetas],
+        tratamientos=[
+            TratamientoAplicadoResponse(
+                fecha_tratamiento=ct.fecha_tratamiento, dosis=ct.dosis, marca=ct.marca,
+                numero_serial=ct.numero_serial, proxima_dosis=ct.proxima_dosis,
+                nombre_tratamiento=ct.tratamiento.nombre, tipo_tratamiento=ct.tratamiento.tipo_tratamiento,
+            ) for ct in c.tratamientos
+        ],
+    )
+
+
+def crear_app(consultas: List[models.Consulta]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/anterior", response_model=List[ConsultaResponse], response_class=JSONResponse)
+    def anterior():
+        return [respuesta_validada(c) for c in consultas]
+
+    @app.get("/rapido", response_model=List[ConsultaResponse])
+    def rapido():
+        return respuesta_rapida([ConsultaResponse.from_orm_with_tratamientos(c) for c in consultas])
+
+    return app
+
+
+def medir(cliente: TestClient, ruta: str, repeticiones: int) -> List[float]:
+    cliente.get(ruta)  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.process_time()
+        r = cliente.get(ruta)
+        tiempos.append(time.process_time() - inicio)
+        assert r.status_code == 200, r.text
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consultas", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    consultas = generar_consultas(args.consultas)
+    cliente = TestClient(crear_app(consultas))
+
+    anterior = cliente.get("/anterior").json()
+    rapido = cliente.get("/rapido").json()
+    if anterior != rapido:
+        print("❌ Las dos respuestas no son iguales")
+        sys.exit(1)
+    print(f"✅ Respuestas idénticas ({args.consultas} consultas, orjson {'sí' if ORJSON_DISPONIBLE else 'no: se usa json'})")
+
+    t_anterior = statistics.median(medir(cliente, "/anterior", args.repeticiones))
+    t_rapido = statistics.median(medir(cliente, "/rapido", args.repeticiones))
+    por_mil = 1000 / args.consultas
+    print(f"\nCPU por 1.000 consultas (mediana de {args.repeticiones} requests):")
+    print(f"  anterior (validación + response_model + json): {t_anterior * por_mil * 1000:8.1f} ms")
+    print(f"  rápido   (model_construct + orjson):          {t_rapido * por_mil * 1000:8.1f} ms")
+    print(f"  ahorro: {(t_anterior - t_rapido) * por_mil * 1000:.1f} ms ({(1 - t_rapido / t_anterior) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
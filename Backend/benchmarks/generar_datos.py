@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para benchmarks (de miles a millones de filas).
+
+Genera tutores, pacientes, relaciones tutor-paciente, consultas, recetas y tratamientos
+aplicados, en paralelo (un proceso por núcleo) y cargándolos con COPY. A diferencia de
+rellenar_bd/script_limpia_rellena_test.py (2000 tutores fijos e INSERT fila a fila), el
+tamaño es configurable y el resultado es reproducible:
+
+- La escala fija la cantidad de tutores (1000 por unidad). Con las proporciones por
+  defecto (2 pacientes por tutor, 5 consultas por paciente) escala 1 ≈ 10k consultas,
+  escala 10 ≈ 100k y escala 100 ≈ 1M.
+- Los tutores se reparten en lotes de TUTORES_POR_LOTE. Cada lote usa su propio generador
+  aleatorio derivado de la semilla y sus ids se calculan antes de cargar (primera pasada
+  que solo cuenta filas), así que la misma semilla, escala, proporciones y fecha de
+  referencia producen exactamente las mismas filas con cualquier cantidad de procesos.
+- Cada lote se carga en su propia transacción (COPY por tabla, en orden de claves foráneas).
+
+Mientras se carga se desactivan los triggers de las tablas escritas (mantienen las
+proyecciones vacuna_programada y paciente_listado fila a fila); al terminar se recalculan
+las proyecciones completas y se hace ANALYZE. Con --con-triggers se dejan activos.
+
+Requiere una base migrada (migrar.py) y tablas de tutores/pacientes/consultas vacías, o
+--limpiar para vaciarlas. Especies y razas se cargan desde rellenar_bd/*.csv si faltan.
+Los correos son @example.com, pero los celulares son aleatorios: no usar en un ambiente
+con recordatorios por WhatsApp activos.
+
+Uso (desde Backend/):
+    python benchmarks/generar_datos.py --escala 1 --limpiar                  # ~10k consultas
+    python benchmarks/generar_datos.py --escala 10 --limpiar                 # ~100k consultas
+    python benchmarks/generar_datos.py --escala 100 --limpiar --procesos 8   # ~1M consultas
+    python benchmarks/generar_datos.py --escala 10 --limpiar --semilla 7 --consultas-por-paciente 12
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import engine  # noqa: E402
+from regiones_data import REGIONES_CHILE  # noqa: E402
+
+TUTORES_POR_LOTE = 500
+TUTORES_POR_ESCALA = 1000
+DIRECTORIO_CSV = os.path.join(os.path.dirname(__file__), "..", "rellenar_bd")
+
+# Tablas escritas, en orden de carga (claves foráneas), con sus columnas
+COLUMNAS = {
+    "tutor": [
+        "rut", "nombre", "apellido_paterno", "apellido_materno", "telefono", "celular",
+        "email", "direccion", "comuna", "region", "activo",
+    ],
+    "paciente": [
+        "id_paciente", "nombre", "color", "sexo", "esterilizado", "fecha_nacimiento",
+        "id_raza", "codigo_chip", "activo",
+    ],
+    "tutor_paciente": ["id_paciente", "rut", "fecha"],
+    "consulta": [
+        "id_consulta", "id_paciente", "rut", "fecha_consulta", "motivo", "diagnostico",
+        "estado_pelaje", "peso", "condicion_corporal", "mucosas", "dht", "nodulos_linfaticos",
+        "auscultacion_cardiaca-toraxica", "observaciones", "tllc", "estado_piel",
+        "frecuencia_respiratoria", "frecuencia_cardiaca", "examen_clinico", "prediagnostico",
+        "pronostico", "indicaciones_generales", "temperatura",
+    ],
+    "receta_medica": ["id_receta", "id_consulta", "medicamento", "dosis", "frecuencia", "duracion", "numero_serie"],
+    "consulta_tratamiento": [
+        "id_aplicacion", "id_paciente", "id_consulta", "id_tratamiento", "dosis",
+        "fecha_tratamiento", "marca", "proxima_dosis", "numero_serial",
+    ],
+}
+
+# Columna id de cada tabla y la secuencia heredada que no está asociada a la columna (solo en
+# las bases de generador_schema.sql); se usa si pg_get_serial_sequence no encuentra ninguna
+SECUENCIAS = {
+    "paciente": ("id_paciente", "govet.mascota_id_mascota_seq"),
+    "consulta": ("id_consulta", None),
+    "receta_medica": ("id_receta", None),
+    "consulta_tratamiento": ("id_aplicacion", None),
+}
+
+# Contadores de filas por lote (también el orden de los ids a reservar)
+CONTEOS = ("tutores", "pacientes", "consultas", "recetas", "aplicaciones")
+
+# =============================================================================
+# Catálogos para la generación
+# =============================================================================
+NOMBRES = [
+    "Juan", "Carlos", "Luis", "Miguel", "José", "Pedro", "Pablo", "Roberto", "Francisco", "Manuel",
+    "Ricardo", "Sergio", "Andrés", "Gabriel", "Alejandro", "Eduardo", "Fernando", "Javier", "Raúl", "Mauricio",
+    "Rodrigo", "Héctor", "Claudio", "Marcelo", "Gonzalo", "Esteban", "Hugo", "Ignacio", "Camilo", "Tomás",
+    "María", "Carmen", "Rosa", "Ana", "Marta", "Elena", "Susana", "Patricia", "Beatriz", "Sandra",
+    "Claudia", "Lorena", "Verónica", "Silvia", "Marcela", "Mónica", "Daniela", "Pamela", "Tamara", "Javiera",
+    "Fernanda", "Francisca", "Gabriela", "Alejandra", "Andrea", "Catalina", "Constanza", "Valentina", "Isidora", "Josefa",
+]
+
+APELLIDOS = [
+    "García", "Martínez", "López", "Rodríguez", "González", "Pérez", "Fernández", "Sánchez", "Ramírez", "Flores",
+    "Morales", "Reyes", "Díaz", "Muñoz", "Vásquez", "Jiménez", "Gutiérrez", "Castro", "Vargas", "Ortiz",
+    "Ruiz", "Cortés", "Carrasco", "Soto", "Parra", "Molina", "Herrera", "Valencia", "Lara", "Silva",
+    "Rojas", "Cabrera", "Fuentes", "Ojeda", "Riquelme", "Bravo", "Núñez", "Alarcón", "Aguilar", "Acosta",
+    "Ayala", "Campos", "Castillo", "Concha", "Delgado", "Durán", "Espinoza", "Escobar", "Figueroa", "Garrido",
+]
+
+NOMBRES_MASCOTAS = [
+    "Luna", "Toby", "Pelusa", "Max", "Rocky", "Princesa", "Simba", "Coco", "Thor", "Mia", "Lola", "Zeus",
+    "Bruno", "Kira", "Nala", "Duque", "Jack", "Tom", "Negro", "Peque", "Oso", "Lucas", "Sasha", "Apolo",
+    "Chester", "Cholo", "Estrella", "Firulais", "Gaston", "Hachiko", "Kaiser", "Laika", "Manchitas", "Nieve",
+    "Rambo", "Sam", "Titan", "Wally", "Xena", "Yago", "Bella", "Charlie", "Daisy", "Molly", "Milo", "Maggie",
+]
+
+COLORES = [
+    "Negro", "Blanco", "Café", "Gris", "Marrón", "Crema", "Mixto", "Tricolor", "Manchado",
+    "Atigrado", "Canela", "Chocolate", "Plateado", "Dorado", "Leonado",
+]
+
+CALLES = ["Picarte", "Arauco", "Baquedano", "Los Robles", "Las Encinas", "El Bosque", "Pedro Montt", "Errázuriz"]
+
+MOTIVOS = [
+    "Control de rutina", "Vacunación anual", "Desparasitación", "Consulta por vómitos", "Consulta por diarrea",
+    "Esterilización", "Control post-operatorio", "Limpieza dental", "Problemas dermatológicos",
+    "Cojera o dolor articular", "Control de peso", "Problemas respiratorios", "Control geriátrico",
+    "Problemas oculares", "Herida o traumatismo",
+]
+
+DIAGNOSTICOS = [
+    "Paciente sano - Control preventivo", "Gastroenteritis leve", "Dermatitis alérgica", "Otitis externa",
+    "Displasia de cadera leve", "Obesidad - Plan nutricional", "Gingivitis", "Parásitos intestinales",
+    "Artritis degenerativa", "Conjuntivitis", "Infección de vías urinarias", "Herida superficial",
+    "Deshidratación leve", "Anemia leve", "Sin hallazgos anormales",
+]
+
+ESTADOS_PELAJE = ["Normal", "Opaco", "Brillante", "Reseco", "Graso", "Con caspa"]
+CONDICIONES_CORPORALES = ["1/5 - Caquéctico", "2/5 - Delgado", "3/5 - Ideal", "4/5 - Sobrepeso", "5/5 - Obeso"]
+MUCOSAS = ["Rosadas", "Pálidas", "Congestivas"]
+NODULOS = ["Normales", "Aumentados", "Dolorosos", "No palpables"]
+AUSCULTACION = ["Normal", "Soplo I/VI", "Frecuencia aumentada", "Crepitaciones leves"]
+ESTADOS_PIEL = ["Normal", "Seca", "Grasa", "Lesiones leves", "Dermatitis"]
+EXAMENES = [
+    "Examen físico completo sin hallazgos anormales", "Examen general satisfactorio",
+    "Se detectan hallazgos menores", "Paciente alerta y reactivo",
+]
+PREDIAGNOSTICOS = ["Sospecha de gastroenteritis", "Posible alergia alimentaria", "A determinar con exámenes", None]
+PRONOSTICOS = ["Favorable", "Reservado", "Bueno con tratamiento", "Excelente", None]
+INDICACIONES = ["Reposo relativo por 3 días", "Dieta blanda por 48 horas", "Control en 7 días", None]
+OBSERVACIONES = [
+    "Control realizado sin complicaciones", "Se indica tratamiento según diagnóstico",
+    "Se toman muestras para análisis", None,
+]
+
+MEDICAMENTOS = [
+    "Amoxicilina", "Meloxicam", "Omeprazol", "Metronidazol", "Enrofloxacina", "Prednisona", "Tramadol",
+    "Cefalexina", "Doxiciclina", "Furosemida", "Enalapril", "Gabapentina", "Metoclopramida",
+]
+DOSIS = ["1 comprimido", "2 comprimidos", "1/2 comprimido", "5 ml", "10 ml", "1 ml/kg", "0.5 mg/kg", "10 mg/kg"]
+MARCAS = ["Zoetis", "Bayer", "MSD Animal Health", "Virbac", "Boehringer Ingelheim", "Elanco", None]
+
+# Se insertan solo si la tabla tratamiento está vacía
+TRATAMIENTOS = [
+    ("Vacuna Séxtuple", "Distemper, Hepatitis, Leptospirosis, Parvovirus, Parainfluenza y Coronavirus", "vacuna"),
+    ("Vacuna Triple Felina", "Rinotraqueítis, Calicivirus y Panleucopenia", "vacuna"),
+    ("Vacuna Antirrábica", "Vacuna contra la rabia", "vacuna"),
+    ("Vacuna KC", "Tos de las perreras (Bordetella)", "vacuna"),
+    ("Vacuna Leucemia Felina", "Virus de la leucemia felina (FeLV)", "vacuna"),
+    ("Desparasitación Interna", "Antiparasitario interno de amplio espectro", "antiparasitario"),
+    ("Desparasitación Externa", "Antipulgas y antigarrapatas", "antiparasitario"),
+    ("Limpieza Dental", "Profilaxis dental con ultrasonido", "otro"),
+    ("Curación de Heridas", "Tratamiento y curación de heridas superficiales", "otro"),
+    ("Análisis de Sangre", "Hemograma completo", "otro"),
+    ("Ecografía", "Examen ecográfico abdominal", "otro"),
+    ("Fluidoterapia", "Administración de fluidos intravenosos", "otro"),
+]
+
+# La clínica está en Valdivia: la mayoría de los tutores son de Los Ríos
+REGION_PRINCIPAL = next(r for r in REGIONES_CHILE if r["romanNumber"] == "XIV")
+PROPORCION_REGION_PRINCIPAL = 0.85
+
+
+class Parametros(NamedTuple):
+    semilla: int
+    tutores: int
+    pacientes_por_tutor: float
+    consultas_por_paciente: float
+    recetas_por_consulta: float
+    tratamientos_por_consulta: float
+    fecha_referencia: date
+    razas: List[int]
+    tratamientos: List[int]
+
+
+# =============================================================================
+# Generación (se ejecuta en los procesos hijos)
+# =============================================================================
+def _rng(params: Parametros, lote: int, flujo: str) -> random.Random:
+    """Generador propio de cada lote y flujo: no depende del orden en que corran los procesos."""
+    return random.Random(f"{params.semilla}:{lote}:{flujo}")
+
+
+def _cantidad(rng: random.Random, media: float, minimo: int) -> int:
+    """Entero con promedio `media`, repartido uniformemente entre `minimo` y 2·media - minimo."""
+    if media <= minimo:
+        return minimo
+    return int(rng.uniform(minimo, 2 * media - minimo) + rng.random())
+
+
+def _tutores_del_lote(params: Parametros, lote: int) -> int:
+    return min(TUTORES_POR_LOTE, params.tutores - lote * TUTORES_POR_LOTE)
+
+
+def _estructura(params: Parametros, lote: int) -> List[List[List[Tuple[int, int]]]]:
+    """
+    Cantidades del lote, de un flujo aleatorio separado del de los datos para poder
+    contarlas sin generar el resto: por tutor, sus pacientes; por paciente, sus consultas;
+    por consulta, (recetas, tratamientos aplicados).
+    """
+    rng = _rng(params, lote, "estructura")
+    return [
+        [
+            [
+                (_cantidad(rng, params.recetas_por_consulta, 0), _cantidad(rng, params.tratamientos_por_consulta, 0))
+                for _ in range(_cantidad(rng, params.consultas_por_paciente, 0))
+            ]
+            for _ in range(_cantidad(rng, params.pacientes_por_tutor, 1))
+        ]
+        for _ in range(_tutores_del_lote(params, lote))
+    ]
+
+
+def contar_lote(params: Parametros, lote: int) -> Tuple[int, ...]:
+    """Filas que generará el lote, en el orden de CONTEOS."""
+    estructura = _estructura(params, lote)
+    pacientes = [consultas for tutor in estructura for consultas in tutor]
+    consultas = [c for paciente in pacientes for c in paciente]
+    return (
+        len(estructura),
+        len(pacientes),
+        len(consultas),
+        sum(recetas for recetas, _ in consultas),
+        sum(tratamientos for _, tratamientos in consultas),
+    )
+
+
+def _rut(numero: int) -> str:
+    """RUT con dígito verificador (módulo 11), en el formato de la base: 12345678-k."""
+    suma = sum(int(d) * f for d, f in zip(reversed(str(numero)), itertools.cycle(range(2, 8))))
+    dv = 11 - suma % 11
+    return f"{numero}-{ {10: 'k', 11: '0'}.get(dv, str(dv)) }"
+
+
+def _fecha_entre(rng: random.Random, desde: date, hasta: date) -> date:
+    return desde + timedelta(days=rng.randint(0, max(0, (hasta - desde).days)))
+
+
+def generar_lote(params: Parametros, lote: int, inicio: Dict[str, int]) -> Dict[str, io.StringIO]:
+    """
+    Filas del lote en CSV (un buffer por tabla). `inicio` trae el último id usado antes del
+    lote para pacientes, consultas, recetas y aplicaciones.
+    """
+    rng = _rng(params, lote, "datos")
+    buffers = {tabla: io.StringIO() for tabla in COLUMNAS}
+    escribir = {tabla: csv.writer(buffer).writerow for tabla, buffer in buffers.items()}
+    referencia = params.fecha_referencia
+    id_paciente, id_consulta = inicio["pacientes"], inicio["consultas"]
+    id_receta, id_aplicacion = inicio["recetas"], inicio["aplicaciones"]
+
+    for i, pacientes in enumerate(_estructura(params, lote)):
+        # RUTs únicos sin consultar la base: un tramo de 4 números por tutor
+        indice_tutor = lote * TUTORES_POR_LOTE + i
+        rut = _rut(5_000_000 + indice_tutor * 4 + rng.randrange(4))
+        region = REGION_PRINCIPAL if rng.random() < PROPORCION_REGION_PRINCIPAL else rng.choice(REGIONES_CHILE)
+        escribir["tutor"]([
+            rut,
+            rng.choice(NOMBRES),
+            rng.choice(APELLIDOS),
+            rng.choice(APELLIDOS),
+            630_000_000 + rng.randrange(10_000_000) if rng.random() < 0.2 else None,
+            900_000_000 + rng.randrange(100_000_000),
+            f"tutor{indice_tutor + 1}@example.com",
+            f"{rng.choice(CALLES)} {rng.randint(100, 9999)}",
+            rng.choice(region["communes"])["name"],
+            region["name"],
+            True,
+        ])
+
+        for consultas in pacientes:
+            id_paciente += 1
+            nacimiento = _fecha_entre(rng, referencia - timedelta(days=365 * 15), referencia - timedelta(days=30))
+            escribir["paciente"]([
+                id_paciente,
+                rng.choice(NOMBRES_MASCOTAS),
+                rng.choice(COLORES),
+                rng.choice("MH"),
+                rng.random() < 0.5,
+                nacimiento,
+                rng.choice(params.razas),
+                f"CHIP-{rng.randint(100_000_000, 999_999_999)}" if rng.random() < 0.8 else None,
+                rng.random() < 0.97,
+            ])
+            escribir["tutor_paciente"]([id_paciente, rut, _fecha_entre(rng, nacimiento, referencia)])
+
+            for recetas, tratamientos in consultas:
+                id_consulta += 1
+                fecha = _fecha_entre(rng, nacimiento, referencia)
+                escribir["consulta"]([
+                    id_consulta, id_paciente, rut, fecha,
+                    rng.choice(MOTIVOS),
+                    rng.choice(DIAGNOSTICOS),
+                    rng.choice(ESTADOS_PELAJE),
+                    round(rng.uniform(2.0, 45.0), 2),
+                    rng.choice(CONDICIONES_CORPORALES),
+                    rng.choice(MUCOSAS),
+                    rng.randint(1, 6),
+                    rng.choice(NODULOS),
+                    rng.choice(AUSCULTACION),
+                    rng.choice(OBSERVACIONES),
+                    round(rng.uniform(1.0, 3.5), 1),
+                    rng.choice(ESTADOS_PIEL),
+                    round(rng.uniform(10, 40), 1),
+                    round(rng.uniform(60, 180), 1),
+                    rng.choice(EXAMENES),
+                    rng.choice(PREDIAGNOSTICOS),
+                    rng.choice(PRONOSTICOS),
+                    rng.choice(INDICACIONES),
+                    round(rng.uniform(37.5, 39.5), 1),
+                ])
+
+                for _ in range(recetas):
+                    id_receta += 1
+                    escribir["receta_medica"]([
+                        id_receta, id_consulta,
+                        rng.choice(MEDICAMENTOS),
+                        rng.choice(DOSIS),
+                        rng.choice((8, 12, 24)),
+                        rng.choice((3, 5, 7, 10, 14)),
+                        f"SER-{rng.randint(100_000, 999_999)}" if rng.random() < 0.3 else None,
+                    ])
+
+                # Sin repetir tratamiento en la misma consulta (si se piden más que el catálogo, se recorta)
+                for id_tratamiento in rng.sample(params.tratamientos, min(tratamientos, len(params.tratamientos))):
+                    id_aplicacion += 1
+                    proxima = fecha + timedelta(days=rng.choice((21, 30, 90, 180, 365))) if rng.random() < 0.4 else None
+                    escribir["consulta_tratamiento"]([
+                        id_aplicacion, id_paciente, id_consulta, id_tratamiento,
+                        rng.choice(DOSIS),
+                        fecha,
+                        rng.choice(MARCAS),
+                        proxima,
+                        f"LOTE-{rng.randint(1000, 9999)}-{rng.randint(100, 999)}" if rng.random() < 0.5 else None,
+                    ])
+
+    return buffers
+
+
+def _copiar(cur, tabla: str, buffer: io.StringIO) -> None:
+    buffer.seek(0)
+    columnas = ", ".join(f'"{c}"' for c in COLUMNAS[tabla])
+    cur.copy_expert(f"COPY govet.{tabla} ({columnas}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def cargar_lote(params: Parametros, lote: int, inicio: Dict[str, int]) -> float:
+    """Genera el lote y lo carga con COPY en una transacción. Devuelve los segundos usados."""
+    t0 = time.perf_counter()
+    buffers = generar_lote(params, lote, inicio)
+    conexion = engine.raw_connection()
+    try:
+        with conexion.cursor() as cur:
+            for tabla in COLUMNAS:
+                _copiar(cur, tabla, buffers[tabla])
+        conexion.commit()
+    except Exception:
+        conexion.rollback()
+        raise
+    finally:
+        conexion.close()
+    return time.perf_counter() - t0
+
+
+# =============================================================================
+# Preparación y cierre (proceso principal)
+# =============================================================================
+def _leer_csv(nombre: str) -> List[dict]:
+    with open(os.path.join(DIRECTORIO_CSV, nombre), encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f, delimiter=";"))
+
+
+def _asegurar_catalogos(cur) -> Tuple[List[int], List[int]]:
+    """Carga especies, razas y tratamientos si faltan. Devuelve los ids de razas y tratamientos."""
+    cur.execute("SELECT count(*) FROM govet.especie")
+    if not cur.fetchone()[0]:
+        especies = _leer_csv("especies.csv")
+        cur.executemany(
+            "INSERT INTO govet.especie (id_especie, nombre_cientifico, nombre_comun) VALUES (%s, %s, %s)",
+            [(e["id_especie"], e["nombre_especie"], e["nombre_comun"]) for e in especies],
+        )
+        _ajustar_secuencia(cur, "especie", "id_especie")
+        print(f"   📚 {len(especies)} especies cargadas desde especies.csv")
+
+    cur.execute("SELECT count(*) FROM govet.raza")
+    if not cur.fetchone()[0]:
+        razas = _leer_csv("razas.csv")
+        cur.executemany(
+            "INSERT INTO govet.raza (id_raza, nombre, id_especie) VALUES (%s, %s, %s)",
+            [(r["id_raza"], r["nombre"], r["id_especie"]) for r in razas],
+        )
+        _ajustar_secuencia(cur, "raza", "id_raza")
+        print(f"   📚 {len(razas)} razas cargadas desde razas.csv")
+
+    cur.execute("SELECT count(*) FROM govet.tratamiento")
+    if not cur.fetchone()[0]:
+        cur.executemany(
+            "INSERT INTO govet.tratamiento (nombre, descripcion, tipo_tratamiento) VALUES (%s, %s, %s)",
+            TRATAMIENTOS,
+        )
+        print(f"   📚 {len(TRATAMIENTOS)} tratamientos de prueba insertados")
+
+    # Ordenados: el mismo catálogo da los mismos datos
+    cur.execute("SELECT id_raza FROM govet.raza ORDER BY id_raza")
+    razas = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT id_tratamiento FROM govet.tratamiento ORDER BY id_tratamiento")
+    tratamientos = [r[0] for r in cur.fetchall()]
+    return razas, tratamientos
+
+
+def _ajustar_secuencia(cur, tabla: str, columna: str, secuencia: str = None) -> None:
+    """Deja la secuencia en el máximo id cargado (los ids se insertaron explícitos)."""
+    cur.execute(
+        f"""
+        SELECT setval(coalesce(pg_get_serial_sequence(%s, %s)::regclass, to_regclass(%s)), max({columna}))
+        FROM govet.{tabla}
+        HAVING max({columna}) IS NOT NULL
+        """,
+        (f"govet.{tabla}", columna, secuencia),
+    )
+
+
+def _vaciar(cur) -> None:
+    """TRUNCATE de las tablas generadas (los triggers de truncate vacían las proyecciones)."""
+    tablas = ", ".join(f"govet.{t}" for t in reversed(list(COLUMNAS)))
+    cur.execute(f"TRUNCATE {tablas} RESTART IDENTITY")
+
+
+def _tablas_con_datos(cur) -> List[str]:
+    con_datos = []
+    for tabla in COLUMNAS:
+        cur.execute(f"SELECT EXISTS (SELECT 1 FROM govet.{tabla})")
+        if cur.fetchone()[0]:
+            con_datos.append(tabla)
+    return con_datos
+
+
+def _triggers(conexion, activar: bool) -> None:
+    accion = "ENABLE" if activar else "DISABLE"
+    with conexion.cursor() as cur:
+        for tabla in COLUMNAS:
+            cur.execute(f"ALTER TABLE govet.{tabla} {accion} TRIGGER USER")
+    conexion.commit()
+
+
+def _recalcular_proyecciones(cur) -> None:
+    for proyeccion, funcion in (
+        ("vacuna_programada", "recalcular_vacunas_programadas"),
+        ("paciente_listado", "recalcular_paciente_listado"),
+    ):
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (f"govet.{proyeccion}",))
+        if not cur.fetchone()[0]:
+            print(f"   ⚠️  govet.{proyeccion} no existe (¿faltan migraciones?), se omite")
+            continue
+        cur.execute(f"SELECT govet.{funcion}()")
+        print(f"   🔄 {proyeccion}: {cur.fetchone()[0]} filas recalculadas")
+
+
+def _ejecutar(executor, funcion, params: Parametros, argumentos: List[tuple], etiqueta: str) -> list:
+    """Corre `funcion(params, *args)` para cada lote y devuelve los resultados en orden de lote."""
+    futuros = {executor.submit(funcion, params, *args): i for i, args in enumerate(argumentos)}
+    resultados = [None] * len(argumentos)
+    paso = max(1, len(argumentos) // 10)
+    for hechos, futuro in enumerate(as_completed(futuros), start=1):
+        resultados[futuros[futuro]] = futuro.result()
+        if etiqueta and (hechos % paso == 0 or hechos == len(argumentos)):
+            print(f"   ✓ {etiqueta}: {hechos}/{len(argumentos)} lotes")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", type=float, default=1, help=f"{TUTORES_POR_ESCALA} tutores por unidad")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--pacientes-por-tutor", type=float, default=2, help="Promedio (mínimo 1 por tutor)")
+    parser.add_argument("--consultas-por-paciente", type=float, default=5, help="Promedio")
+    parser.add_argument("--recetas-por-consulta", type=float, default=1, help="Promedio")
+    parser.add_argument("--tratamientos-por-consulta", type=float, default=1, help="Promedio")
+    parser.add_argument("--fecha-referencia", type=date.fromisoformat, default=date.today(),
+                        help="Fecha 'hoy' de los datos (AAAA-MM-DD); fijarla para reproducir un dataset otro día")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--limpiar", action="store_true",
+                        help="Vacía tutores, pacientes, consultas, recetas y tratamientos aplicados antes de generar")
+    parser.add_argument("--con-triggers", action="store_true",
+                        help="No desactiva los triggers de las proyecciones durante la carga (más lento)")
+    args = parser.parse_args()
+
+    tutores = round(args.escala * TUTORES_POR_ESCALA)
+    if tutores < 1:
+        parser.error("--escala demasiado pequeña: no genera ningún tutor")
+
+    print("=" * 70)
+    print(f"🧪 GENERADOR DE DATOS SINTÉTICOS (escala {args.escala:g}, semilla {args.semilla})")
+    print("=" * 70)
+    t0 = time.perf_counter()
+
+    conexion = engine.raw_connection()
+    try:
+        with conexion.cursor() as cur:
+            if args.limpiar:
+                _vaciar(cur)
+                print("   🗑️  Tablas vaciadas")
+            else:
+                con_datos = _tablas_con_datos(cur)
+                if con_datos:
+                    print(f"❌ Ya hay datos en: {', '.join(con_datos)}. Usa --limpiar para reemplazarlos.")
+                    sys.exit(2)
+            razas, tratamientos = _asegurar_catalogos(cur)
+        conexion.commit()
+        if not razas or not tratamientos:
+            print("❌ No hay razas o tratamientos para asignar")
+            sys.exit(2)
+
+        params = Parametros(
+            semilla=args.semilla,
+            tutores=tutores,
+            pacientes_por_tutor=args.pacientes_por_tutor,
+            consultas_por_paciente=args.consultas_por_paciente,
+            recetas_por_consulta=args.recetas_por_consulta,
+            tratamientos_por_consulta=args.tratamientos_por_consulta,
+            fecha_referencia=args.fecha_referencia,
+            razas=razas,
+            tratamientos=tratamientos,
+        )
+        lotes = math.ceil(tutores / TUTORES_POR_LOTE)
+
+        # spawn: cada proceso abre sus propias conexiones (no hereda las del pool del padre)
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.procesos, mp_context=contexto) as executor:
+            # 1ª pasada: cuántas filas genera cada lote, para reservar sus ids
+            conteos = _ejecutar(executor, contar_lote, params, [(lote,) for lote in range(lotes)], "")
+            totales = dict(zip(CONTEOS, map(sum, zip(*conteos))))
+            print(
+                f"   📋 {lotes} lotes: {totales['tutores']} tutores, {totales['pacientes']} pacientes, "
+                f"{totales['consultas']} consultas, {totales['recetas']} recetas, "
+                f"{totales['aplicaciones']} tratamientos aplicados"
+            )
+            inicios, acumulado = [], dict.fromkeys(CONTEOS, 0)
+            for conteo in conteos:
+                inicios.append(dict(acumulado))
+                acumulado = {k: acumulado[k] + n for k, n in zip(CONTEOS, conteo)}
+
+            # 2ª pasada: generar y cargar
+            if not args.con_triggers:
+                _triggers(conexion, activar=False)
+            try:
+                t_carga = time.perf_counter()
+                _ejecutar(
+                    executor, cargar_lote, params,
+                    [(lote, inicios[lote]) for lote in range(lotes)], f"carga ({args.procesos} procesos)",
+                )
+                t_carga = time.perf_counter() - t_carga
+            except Exception:
+                print("❌ Falló la carga: quedaron lotes a medias. Repetir con --limpiar.")
+                raise
+            finally:
+                if not args.con_triggers:
+                    _triggers(conexion, activar=True)
+
+        with conexion.cursor() as cur:
+            for tabla, (columna, secuencia) in SECUENCIAS.items():
+                _ajustar_secuencia(cur, tabla, columna, secuencia)
+            if not args.con_triggers:
+                _recalcular_proyecciones(cur)
+        conexion.commit()
+
+        # ANALYZE fuera de la transacción para que el planificador vea los volúmenes nuevos
+        conexion.autocommit = True
+        with conexion.cursor() as cur:
+            for tabla in [*COLUMNAS, "vacuna_programada", "paciente_listado"]:
+                cur.execute("SELECT to_regclass(%s) IS NOT NULL", (f"govet.{tabla}",))
+                if cur.fetchone()[0]:
+                    cur.execute(f"ANALYZE govet.{tabla}")
+    finally:
+        conexion.close()
+
+    filas = sum(totales.values()) + totales["pacientes"]  # + tutor_paciente
+    print(f"\n✅ {filas} filas cargadas en {t_carga:.1f} s ({filas / t_carga:,.0f} filas/s), "
+          f"total {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Verificación de la caché de respuestas (services/cache_respuestas.py) con sus dos backends.
+
+Sin argumentos prueba el LRU local. Con --redis prueba además el backend Redis contra
+cualquier servidor que hable el protocolo, por ejemplo uno local descartable:
+
+    docker run --rm -p 6379:6379 valkey/valkey
+    python benchmarks/verificar_cache_respuestas.py --redis redis://localhost:6379/15
+
+Comprueba en cada backend:
+- el segundo request igual es un acierto y no vuelve a calcular
+- el orden de los parámetros no cambia la clave; otro valor u otro usuario sí
+- invalidar una etiqueta fuerza a recalcular las respuestas que la usan, y no las demás
+- un cálculo que empezó antes de la invalidación no queda servido después
+- las entradas vencen al cumplirse el TTL
+- con el backend caído se responde igual (sin caché)
+
+Termina con código 1 si alguna comprobación falla.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from starlette.requests import Request  # noqa: E402
+
+from services import cache_respuestas  # noqa: E402
+
+fallas = []
+
+
+def comprobar(condicion: bool, descripcion: str) -> None:
+    print(f"{'✅' if condicion else '❌'} {descripcion}")
+    if not condicion:
+        fallas.append(descripcion)
+
+
+def _request(ruta: str, query: str = "") -> Request:
+    return Request({"type": "http", "method": "GET", "path": ruta, "query_string": query.encode(), "headers": []})
+
+
+class _Contador:
+    def __init__(self):
+        self.llamadas = 0
+
+    async def __call__(self):
+        self.llamadas += 1
+        return {"n": self.llamadas}
+
+
+async def verificar(nombre: str) -> None:
+    usuario = {"sub": "veterinaria-1"}
+    otro_usuario = {"sub": "veterinaria-2"}
+    tags = cache_respuestas.TAGS_PACIENTES
+    calcular = _Contador()
+
+    async def pedir(query: str, u=usuario, t=tags, ttl=5.0, c=calcular):
+        r = await cache_respuestas.responder(_request("/pacientes/paginated/", query), u, t, c, ttl=ttl)
+        return r.headers["X-Cache"], r.body
+
+    # Aislar esta corrida de datos de corridas anteriores
+    cache_respuestas.invalidar_respuestas(*tags, "events")
+
+    estado, _ = await pedir("page=1&limit=50")
+    comprobar(estado == "MISS", f"{nombre}: primer request calcula")
+    estado, cuerpo = await pedir("page=1&limit=50")
+    comprobar(estado == "HIT" and calcular.llamadas == 1 and cuerpo == b'{"n":1}', f"{nombre}: segundo request es acierto")
+    estado, _ = await pedir("limit=50&page=1")
+    comprobar(estado == "HIT", f"{nombre}: el orden de los parámetros no cambia la clave")
+    estado, _ = await pedir("page=2&limit=50")
+    comprobar(estado == "MISS", f"{nombre}: otra página es otra clave")
+    estado, _ = await pedir("page=1&limit=50", u=otro_usuario)
+    comprobar(estado == "MISS", f"{nombre}: otro usuario es otra clave")
+
+    cache_respuestas.invalidar_respuestas("events")
+    estado, _ = await pedir("page=1&limit=50")
+    comprobar(estado == "HIT", f"{nombre}: invalidar otra etiqueta no afecta")
+    cache_respuestas.invalidar_respuestas("tutores")
+    estado, _ = await pedir("page=1&limit=50")
+    comprobar(estado == "MISS", f"{nombre}: invalidar una etiqueta de la respuesta fuerza a recalcular")
+
+    # Escritura durante el cálculo: lo calculado con datos viejos no debe servirse después
+    async def calcular_con_escritura():
+        cache_respuestas.invalidar_respuestas("pacientes")
+        return {"viejo": True}
+
+    await pedir("page=3&limit=50", c=calcular_con_escritura)
+    estado, cuerpo = await pedir("page=3&limit=50")
+    comprobar(estado == "MISS" and b"viejo" not in cuerpo, f"{nombre}: lo calculado antes de una invalidación no se sirve")
+
+    await pedir("page=4&limit=50", ttl=0.2)
+    await asyncio.sleep(0.3)
+    estado, _ = await pedir("page=4&limit=50", ttl=0.2)
+    comprobar(estado == "MISS", f"{nombre}: la entrada vence con el TTL")
+
+
+async def verificar_backend_caido() -> None:
+    class _Caido:
+        nombre = "caido"
+        remoto = False
+
+        def __getattr__(self, _):
+            raise ConnectionError("backend caído")
+
+    original = cache_respuestas.backend
+    cache_respuestas.backend = _Caido()
+    try:
+        calcular = _Contador()
+        r = await cache_respuestas.responder(_request("/tutores/paginated/"), {"sub": "x"}, ("tutores",), calcular)
+        comprobar(r.status_code == 200 and calcular.llamadas == 1, "backend caído: la respuesta se calcula igual")
+        cache_respuestas.invalidar_respuestas("tutores")
+        comprobar(True, "backend caído: invalidar no lanza error")
+    finally:
+        cache_respuestas.backend = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis", help="URL redis:// para probar también el backend compartido")
+    args = parser.parse_args()
+
+    cache_respuestas.backend = cache_respuestas.CacheLocal(100)
+    asyncio.run(verificar("local"))
+
+    if args.redis:
+        cache_respuestas.backend = cache_respuestas.CacheRedis(args.redis)
+        inicio = time.perf_counter()
+        asyncio.run(verificar("redis"))
+        print(f"   ({(time.perf_counter() - inicio) * 1000:.0f} ms contra {args.redis})")
+
+    asyncio.run(verificar_backend_caido())
+    print(f"\nEstado: {cache_respuestas.estado_cache()}")
+
+    if fallas:
+        print(f"\n{len(fallas)} comprobación(es) fallaron")
+        sys.exit(1)
+    print("\nCaché de respuestas correcta")
+
+
+if __name__ == "__main__":
+    main()
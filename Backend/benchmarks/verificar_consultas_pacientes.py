@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Verificación de pacientes_to_response (main.py): convertir 1, 10 o 1.000 pacientes debe
+ejecutar la misma cantidad de sentencias SQL (razas con su especie y tutores, cargados en
+bloque), y no una o más por paciente.
+
+Las sentencias se cuentan con un listener `before_cursor_execute` sobre el motor de la
+sesión, solo mientras corre la conversión (la carga de los pacientes no cuenta). Se usan
+pacientes con raza y con al menos un tutor, para que ninguna de las cargas se salte.
+
+Además compara el tutor de cada respuesta con el tutor principal de govet.paciente_listado
+(asociación más reciente por fecha, desempate por RUT): el detalle y el listado deben
+mostrar el mismo tutor.
+
+Uso (desde Backend/, con una base con datos, p. ej. de benchmarks/generar_datos.py):
+    python benchmarks/verificar_consultas_pacientes.py
+    python benchmarks/verificar_consultas_pacientes.py --tamanos 1 10 100 1000 5000
+
+Termina con código 1 si la cantidad de sentencias cambia con el tamaño o si algún tutor no
+coincide con la proyección, para poder usarlo en CI.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import event, select  # noqa: E402
+
+import models  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from main import pacientes_to_response  # noqa: E402
+
+
+def cargar_pacientes(db, cantidad: int) -> list:
+    """Primeros `cantidad` pacientes (por id) con raza y con algún tutor."""
+    return db.query(models.Paciente).filter(
+        models.Paciente.id_raza.isnot(None),
+        models.Paciente.id_paciente.in_(select(models.TutorPaciente.id_paciente)),
+    ).order_by(models.Paciente.id_paciente).limit(cantidad).all()
+
+
+def convertir_contando(db, pacientes: list) -> tuple:
+    """(sentencias ejecutadas, respuestas) de pacientes_to_response."""
+    motor = db.get_bind()
+    sentencias = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(motor, "before_cursor_execute", contar)
+    try:
+        respuestas = pacientes_to_response(pacientes, db)
+    finally:
+        event.remove(motor, "before_cursor_execute", contar)
+    return sentencias, respuestas
+
+
+def tutores_distintos(db, respuestas: list) -> list:
+    """(id_paciente, tutor de la respuesta, tutor principal de la proyección) que no coinciden."""
+    principales = dict(db.query(
+        models.PacienteListado.id_paciente,
+        models.PacienteListado.tutor_rut,
+    ).filter(models.PacienteListado.id_paciente.in_([r.id_paciente for r in respuestas])).all())
+    distintos = []
+    for respuesta in respuestas:
+        rut = respuesta.tutor.rut if respuesta.tutor else None
+        if rut != principales.get(respuesta.id_paciente):
+            distintos.append((respuesta.id_paciente, rut, principales.get(respuesta.id_paciente)))
+    return distintos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1, 10, 1000], help="Cantidades de pacientes a convertir")
+    parser.add_argument("--mostrar", type=int, default=10, help="Máximo de diferencias de tutor a detallar")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        conteos = {}
+        respuestas = []
+        for tamano in sorted(set(args.tamanos)):
+            pacientes = cargar_pacientes(db, tamano)
+            if not pacientes:
+                raise SystemExit("❌ No hay pacientes con raza y tutor (se pueden generar con benchmarks/generar_datos.py)")
+            if len(pacientes) < tamano:
+                print(f"⚠️  Se pidieron {tamano} pacientes y solo hay {len(pacientes)}")
+            sentencias, respuestas = convertir_contando(db, pacientes)
+            conteos[len(pacientes)] = len(sentencias)
+            print(f"   {len(pacientes):>6} pacientes: {len(sentencias)} sentencias")
+
+        # El último conjunto es el más grande
+        distintos = tutores_distintos(db, respuestas)
+    finally:
+        db.close()
+
+    fallo = False
+    if len(set(conteos.values())) > 1:
+        fallo = True
+        print("\n❌ La cantidad de sentencias depende de la cantidad de pacientes (consulta por paciente)")
+    for id_paciente, rut, principal in distintos[:args.mostrar]:
+        print(f"❌ paciente {id_paciente}: tutor {rut!r}, tutor principal en paciente_listado {principal!r}")
+    if len(distintos) > args.mostrar:
+        print(f"   ... y {len(distintos) - args.mostrar} más")
+    if distintos:
+        fallo = True
+        print(f"\n❌ {len(distintos)} paciente(s) con un tutor distinto al principal de paciente_listado")
+    if fallo:
+        sys.exit(1)
+    print(f"\n✅ {next(iter(conteos.values()))} sentencias para cualquier cantidad de pacientes, "
+          "y el tutor coincide con paciente_listado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Verificación de consistencia de la proyección govet.paciente_listado contra sus tablas de
+origen (paciente, raza, especie, tutor_paciente y tutor).
+
+Recalcula todas las filas desde las tablas de origen con govet.pacientes_listado_de(NULL)
+(la misma definición que usan los triggers) y las compara con lo guardado en la proyección,
+en ambos sentidos:
+- filas faltantes: pacientes sin fila en la proyección
+- filas sobrantes: filas de pacientes que ya no existen
+- filas distintas: se imprime qué columnas difieren
+
+Uso (desde Backend/, con una base migrada):
+    python benchmarks/verificar_paciente_listado.py
+    python benchmarks/verificar_paciente_listado.py --reparar   # recalcula las filas con diferencias
+
+Termina con código 1 si encuentra diferencias (aunque se reparen), para poder usarlo en CI o
+en un cron: una diferencia significa que algún trigger faltó o estuvo deshabilitado.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text  # noqa: E402
+
+from database import SessionLocal  # noqa: E402
+
+# Filas de la proyección que no coinciden con lo recalculado (en cualquiera de los dos sentidos)
+SQL_DIFERENCIAS = """
+    SELECT DISTINCT id_paciente FROM (
+        (SELECT * FROM govet.paciente_listado
+         EXCEPT ALL
+         SELECT * FROM govet.pacientes_listado_de(NULL))
+        UNION ALL
+        (SELECT * FROM govet.pacientes_listado_de(NULL)
+         EXCEPT ALL
+         SELECT * FROM govet.paciente_listado)
+    ) diferencias
+    ORDER BY id_paciente
+"""
+
+
+def _fila(db, consulta: str, id_paciente: int):
+    fila = db.execute(text(consulta), {"id": id_paciente}).mappings().first()
+    return dict(fila) if fila else None
+
+
+def describir(db, id_paciente: int) -> str:
+    guardada = _fila(db, "SELECT * FROM govet.paciente_listado WHERE id_paciente = :id", id_paciente)
+    esperada = _fila(db, "SELECT * FROM govet.pacientes_listado_de(ARRAY[CAST(:id AS int8)])", id_paciente)
+    if guardada is None:
+        return "falta en la proyección"
+    if esperada is None:
+        return "sobra (el paciente ya no existe)"
+    columnas = [c for c in esperada if guardada.get(c) != esperada[c]]
+    return "distintas: " + ", ".join(
+        f"{c} ({guardada.get(c)!r} ≠ {esperada[c]!r})" for c in columnas
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reparar", action="store_true", help="Recalcula las filas con diferencias")
+    parser.add_argument("--mostrar", type=int, default=20, help="Máximo de diferencias a detallar")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        # Una sola foto de las tablas para la comparación
+        db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+        pacientes = db.execute(text("SELECT count(*) FROM govet.paciente")).scalar()
+        filas = db.execute(text("SELECT count(*) FROM govet.paciente_listado")).scalar()
+        print(f"Pacientes: {pacientes}, filas en paciente_listado: {filas}")
+
+        diferencias = [r[0] for r in db.execute(text(SQL_DIFERENCIAS))]
+        for id_paciente in diferencias[:args.mostrar]:
+            print(f"❌ paciente {id_paciente}: {describir(db, id_paciente)}")
+        if len(diferencias) > args.mostrar:
+            print(f"   ... y {len(diferencias) - args.mostrar} más")
+        db.rollback()
+
+        if diferencias and args.reparar:
+            db.execute(
+                text("SELECT govet.refrescar_paciente_listado(CAST(:ids AS int8[]))"),
+                {"ids": diferencias},
+            )
+            db.commit()
+            print(f"🔧 {len(diferencias)} fila(s) recalculadas")
+    finally:
+        db.close()
+
+    if diferencias:
+        print(f"\n{len(diferencias)} paciente(s) con diferencias entre la proyección y las tablas de origen")
+        sys.exit(1)
+    print("\n✅ paciente_listado coincide con las tablas de origen")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Verificación de planes de consulta: falla si una consulta clave de los endpoints
+recorre completa (Seq Scan) alguna de las tablas grandes.
+
+Corre EXPLAIN (sin ejecutar) sobre las consultas que hacen los endpoints por paciente,
+tutor, consulta, raza, especie y próximas dosis, con `enable_seqscan = off`: así el
+planificador elige un índice siempre que exista uno utilizable, aunque la base local
+tenga pocos datos. Si aun así aparece un Seq Scan, falta un índice (ver
+Dbase/migrations/003_indices_fk_filtros.sql, 004_vacunas_programadas.sql y
+005_paciente_listado.sql).
+
+Uso (desde Backend/, con una base local migrada):
+    python benchmarks/verificar_planes.py
+    python benchmarks/verificar_planes.py --verbose   # imprime el plan de cada consulta
+
+Termina con código 1 si alguna consulta hace Seq Scan, para poder usarlo en CI.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import desc, text  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+import models  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from services.busqueda import filtro_busqueda_pacientes  # noqa: E402
+
+# Tablas que crecen con el uso; los catálogos chicos (especie, tratamiento) pueden leerse completos
+TABLAS_VIGILADAS = {
+    "consulta",
+    "consulta_tratamiento",
+    "receta_medica",
+    "tutor_paciente",
+    "paciente",
+    "tutor",
+    "raza",
+    "vacuna_programada",
+    "paciente_listado",
+}
+
+ID_PACIENTE = 1
+RUT = "11111111-1"
+
+
+def _consultas_clave(db):
+    """(nombre, query) de las consultas que hacen los endpoints."""
+    hoy = date.today()
+    return [
+        ("consultas por paciente", db.query(models.Consulta)
+            .filter(models.Consulta.id_paciente == ID_PACIENTE)
+            .order_by(desc(models.Consulta.fecha_consulta))),
+        ("consultas por tutor", db.query(models.Consulta)
+            .filter(models.Consulta.rut == RUT)),
+        ("consultas paginadas", db.query(models.Consulta)
+            .order_by(models.Consulta.fecha_consulta.desc().nulls_last(), models.Consulta.id_consulta.desc())
+            .limit(50)),
+        ("consultas por rango de fecha", db.query(models.Consulta)
+            .filter(models.Consulta.fecha_consulta.between(hoy - timedelta(days=7), hoy))),
+        ("tutores de un paciente", db.query(models.TutorPaciente)
+            .filter(models.TutorPaciente.id_paciente == ID_PACIENTE)),
+        ("pacientes de un tutor", db.query(models.TutorPaciente)
+            .filter(models.TutorPaciente.rut == RUT)),
+        ("tratamientos por paciente", db.query(models.ConsultaTratamiento)
+            .filter(models.ConsultaTratamiento.id_paciente == ID_PACIENTE)),
+        ("tratamientos por consulta", db.query(models.ConsultaTratamiento)
+            .filter(models.ConsultaTratamiento.id_consulta.in_([1, 2, 3]))),
+        ("recetas por consulta", db.query(models.Receta)
+            .filter(models.Receta.id_consulta.in_([1, 2, 3]))),
+        ("próximas dosis", db.query(models.ConsultaTratamiento)
+            .filter(
+                models.ConsultaTratamiento.proxima_dosis.isnot(None),
+                models.ConsultaTratamiento.proxima_dosis >= hoy,
+                models.ConsultaTratamiento.proxima_dosis <= hoy + timedelta(days=30),
+            )
+            .order_by(models.ConsultaTratamiento.proxima_dosis.asc())
+            .limit(20)),
+        ("vacunas programadas (inicio)", db.query(models.VacunaProgramada)
+            .filter(
+                models.VacunaProgramada.proxima_dosis.isnot(None),
+                models.VacunaProgramada.proxima_dosis >= hoy,
+                models.VacunaProgramada.proxima_dosis <= hoy + timedelta(days=30),
+            )
+            .order_by(models.VacunaProgramada.proxima_dosis.asc())
+            .limit(20)),
+        ("vacunas programadas por tipo", db.query(models.VacunaProgramada)
+            .filter(
+                models.VacunaProgramada.tipo_tratamiento == "vacuna",
+                models.VacunaProgramada.proxima_dosis.between(hoy, hoy + timedelta(days=30)),
+            )),
+        ("vacunas de un paciente", db.query(models.VacunaProgramada)
+            .filter(
+                models.VacunaProgramada.id_paciente == ID_PACIENTE,
+                models.VacunaProgramada.fecha_tratamiento >= hoy,
+            )
+            .order_by(models.VacunaProgramada.fecha_tratamiento.asc())),
+        ("pacientes por raza", db.query(models.Paciente)
+            .filter(models.Paciente.id_raza == 1)),
+        ("razas por especie", db.query(models.Raza)
+            .filter(models.Raza.id_especie == 1)),
+        ("pacientes activos paginados", db.query(models.Paciente)
+            .filter(models.Paciente.activo == True)
+            .order_by(models.Paciente.id_paciente)
+            .limit(50)),
+        ("listado de pacientes", db.query(models.PacienteListado)
+            .filter(models.PacienteListado.activo == True)
+            .order_by(models.PacienteListado.id_paciente)
+            .limit(50)),
+        ("búsqueda de pacientes por texto", db.query(models.PacienteListado)
+            .filter(models.PacienteListado.activo == True, filtro_busqueda_pacientes("firulais"))),
+        ("búsqueda de pacientes por RUT", db.query(models.PacienteListado)
+            .filter(filtro_busqueda_pacientes(RUT))),
+        ("búsqueda de pacientes por teléfono", db.query(models.PacienteListado)
+            .filter(filtro_busqueda_pacientes("+56 9 1234 5678"))),
+        ("tutores activos paginados", db.query(models.Tutor)
+            .filter(models.Tutor.activo == True)
+            .order_by(models.Tutor.rut)
+            .limit(50)),
+    ]
+
+
+def _seq_scans(nodo):
+    """Tablas vigiladas que aparecen como Seq Scan en el plan (recorre los nodos hijos)."""
+    encontrados = []
+    if nodo.get("Node Type") == "Seq Scan" and nodo.get("Relation Name") in TABLAS_VIGILADAS:
+        encontrados.append(nodo["Relation Name"])
+    for hijo in nodo.get("Plans", []):
+        encontrados.extend(_seq_scans(hijo))
+    return encontrados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica que las consultas clave no hagan Seq Scan")
+    parser.add_argument("--verbose", action="store_true", help="Imprime el plan de cada consulta")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    fallas = []
+    try:
+        db.execute(text("SET enable_seqscan = off"))
+        for nombre, query in _consultas_clave(db):
+            sql = str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            tablas = _seq_scans(plan[0]["Plan"])
+
+            if tablas:
+                fallas.append((nombre, tablas))
+                print(f"❌ {nombre}: Seq Scan en {', '.join(sorted(set(tablas)))}")
+            else:
+                print(f"✅ {nombre}")
+            if args.verbose:
+                print(json.dumps(plan[0]["Plan"], indent=2, ensure_ascii=False))
+    finally:
+        db.close()
+
+    if fallas:
+        print(f"\n{len(fallas)} consulta(s) sin índice utilizable")
+        sys.exit(1)
+    print("\nTodas las consultas clave usan índices")
+
+
+if __name__ == "__main__":
+    main()
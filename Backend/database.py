@@ -1,21 +1,61 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import os
 
-# Cargar variables de entorno desde el archivo .env
+# Cargar variables de entorno desde el archivo .env (antes de importar los servicios: leen
+# SLOW_QUERY_* y otras variables al importarse)
 load_dotenv()
 
+from services.pool_db import opciones_pool, opciones_pool_async  # noqa: E402
+from services.consultas_lentas import vigilar_consultas_lentas  # noqa: E402
+
 URL_DATABASE = os.getenv('DATABASE_URL')
 
-# Crear el motor de la base de datos
-engine = create_engine(URL_DATABASE)
+# Crear el motor de la base de datos (pool configurable por variables DB_POOL_*, ver services/pool_db.py)
+engine = create_engine(URL_DATABASE, **opciones_pool())
 
 # Crear una sesión para interactuar con la base de datos
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Base para los modelos
-Base = declarative_base()
+# Motor asíncrono (asyncpg) para los endpoints async; usa la misma base que DATABASE_URL
+# salvo que se indique otra URL en DATABASE_ASYNC_URL
+URL_DATABASE_ASYNC = os.getenv('DATABASE_ASYNC_URL') or make_url(URL_DATABASE).set(drivername="postgresql+asyncpg")
+async_engine = create_async_engine(URL_DATABASE_ASYNC, **opciones_pool_async())
+
+# Sesiones asíncronas; expire_on_commit=False para poder leer los objetos después del commit
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Réplica de lectura opcional (DATABASE_READ_URL). Las sesiones de lectura corren siempre en
+# transacciones READ ONLY; sin réplica usan la base principal. El enrutamiento según el
+# retraso de la réplica está en services/replica.py
+SOLO_LECTURA = {"postgresql_readonly": True}
+URL_DATABASE_READ = os.getenv('DATABASE_READ_URL')
+HAY_REPLICA = bool(URL_DATABASE_READ)
 
+primary_read_engine = engine.execution_options(**SOLO_LECTURA)
+async_primary_read_engine = async_engine.execution_options(**SOLO_LECTURA)
+if HAY_REPLICA:
+    read_engine = create_engine(URL_DATABASE_READ, execution_options=SOLO_LECTURA, **opciones_pool())
+    URL_DATABASE_READ_ASYNC = os.getenv('DATABASE_READ_ASYNC_URL') or make_url(URL_DATABASE_READ).set(drivername="postgresql+asyncpg")
+    async_read_engine = create_async_engine(URL_DATABASE_READ_ASYNC, execution_options=SOLO_LECTURA, **opciones_pool_async())
+else:
+    read_engine = primary_read_engine
+    async_read_engine = async_primary_read_engine
 
+# Registro de consultas lentas (SLOW_QUERY_MS) con EXPLAIN muestreado, ver services/consultas_lentas.py.
+# Los motores de solo lectura sin réplica comparten los eventos de engine / async_engine
+vigilar_consultas_lentas(engine, {"sync": engine, "async": async_engine.sync_engine})
+if HAY_REPLICA:
+    vigilar_consultas_lentas(read_engine, {"read_sync": read_engine, "read_async": async_read_engine.sync_engine})
+
+PrimaryReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=primary_read_engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncPrimaryReadSessionLocal = async_sessionmaker(bind=async_primary_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Base para los modelos
+Base = declarative_base()
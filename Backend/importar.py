@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Importa tutores, pacientes o relaciones tutor-paciente desde una planilla xlsx o CSV
+(ver services/importacion.py). Reemplaza a rellenar_bd/script_tutores.py,
+script_pacientes.py y script_paciente_tutor.py para cargas grandes.
+
+Uso (desde Backend/), en orden de dependencias:
+    python importar.py tutores ../Dbase/mascotas_modificado.xlsx
+    python importar.py pacientes ../Dbase/mascotas_modificado.xlsx
+    python importar.py paciente_tutor ../Dbase/mascotas_modificado.xlsx
+
+    python importar.py tutores rellenar_bd/tutores.csv --simular          # valida sin guardar
+    python importar.py tutores clientes.xlsx --hoja Hoja1 --actualizar    # actualiza los existentes
+    python importar.py pacientes pacientes.csv --errores errores.csv      # detalle de filas rechazadas
+
+Termina con código 1 si alguna fila fue rechazada.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+from services.importacion import ENTIDADES, IMPORT_CHUNK_SIZE, importar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entidad", choices=ENTIDADES)
+    parser.add_argument("archivo", help="Planilla .xlsx o .csv")
+    parser.add_argument("--hoja", help="Hoja del xlsx (por defecto la de mascotas_modificado.xlsx o la activa)")
+    parser.add_argument("--actualizar", action="store_true", help="Actualiza los registros existentes en vez de omitirlos")
+    parser.add_argument("--simular", action="store_true", help="Valida e informa sin guardar cambios")
+    parser.add_argument("--bloque", type=int, default=IMPORT_CHUNK_SIZE, help="Filas por bloque")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Codificación del CSV")
+    parser.add_argument("--errores", help="Escribe errores y avisos por fila en este CSV")
+    parser.add_argument("--json", action="store_true", help="Imprime el resultado completo en JSON")
+    args = parser.parse_args()
+
+    try:
+        with open(args.archivo, "rb") as archivo:
+            resultado = importar(
+                archivo, args.archivo, args.entidad, actualizar=args.actualizar, simular=args.simular,
+                hoja=args.hoja, tamano_bloque=args.bloque, encoding=args.encoding, max_detalle=None,
+            )
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    datos = resultado.como_dict()
+    if args.json:
+        print(json.dumps(datos, ensure_ascii=False, indent=2))
+    else:
+        prefijo = "🧪 (simulación, sin guardar) " if resultado.simulada else ""
+        print(f"{prefijo}📥 {args.entidad}: {resultado.filas_leidas} filas leídas en {resultado.segundos:.1f} s")
+        print(f"   ✅ insertadas: {resultado.insertadas}   🔄 actualizadas: {resultado.actualizadas}   "
+              f"⏭️  ya existían: {resultado.omitidas}")
+        print(f"   ❌ rechazadas: {resultado.total_errores}   ⚠️  avisos: {resultado.total_avisos}")
+        for error in datos["errores"][:20]:
+            print(f"      fila {error['fila']}: {error['campo']} - {error['mensaje']}")
+        if resultado.total_errores > 20:
+            print(f"      ... y {resultado.total_errores - 20} más")
+
+    if args.errores:
+        with open(args.errores, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f, delimiter=";")
+            escritor.writerow(["fila", "tipo", "campo", "mensaje"])
+            for tipo, detalles in (("error", datos["errores"]), ("aviso", datos["avisos"])):
+                for detalle in detalles:
+                    escritor.writerow([detalle["fila"], tipo, detalle["campo"], detalle["mensaje"]])
+        print(f"📝 Detalle por fila en {args.errores}")
+
+    if resultado.total_errores:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,10 @@
 # Componente: Persistencia de datos
 import asyncio
 from datetime import date, datetime
-try:
-    from apscheduler.schedulers.asyncio import AsyncIOScheduler
-    APSCHEDULER_AVAILABLE = True
-except Exception:
-    AsyncIOScheduler = None
-    APSCHEDULER_AVAILABLE = False
 from datetime import datetime, timedelta, timezone, date
-from sqlalchemy import create_engine, between, or_, func, desc
+from sqlalchemy import create_engine, between, or_, and_, func, desc, tuple_, literal_column
 from sqlalchemy.orm import Session, sessionmaker, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas import (
     PacienteBase, PacienteCreate, PacienteResponse,
     RazaBase, RazaCreate, RazaResponse,
@@ -18,34 +13,61 @@ from schemas import (
     TutorPacienteBase,
     TratamientoBase, TratamientoCreate, TratamientoResponse,
     consultaTratamientoBase, consultaTratamientoCreate, consultaTratamientoResponse,
-    ConsultaBase, ConsultaCreate, ConsultaResponse, EmailSchema,
-    EventCreate, consultaTratamientoConDetallesResponse
+    ConsultaBase, ConsultaCreate, ConsultaCompletaCreate, ConsultaResponse, EmailSchema,
+    EventCreate, consultaTratamientoConDetallesResponse,
+    construir_desde_orm
 )
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Header
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from database import Base, engine
 import models # Donde están las tablas de la base de datos
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Annotated, Optional
-from database import engine, SessionLocal
+from database import engine, SessionLocal, async_engine, AsyncSessionLocal, HAY_REPLICA, read_engine, async_read_engine
+from services.replica import sesion_lectura, sesion_lectura_async
 from dotenv import load_dotenv
 import os
 import json
+import base64
 from prefix_middleware import StripAPIPrefixMiddleware
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType 
+from functools import lru_cache
 from starlette.responses import JSONResponse
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
 
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+# Solo el módulo de errores (liviano): el cliente de Google (discovery, google.auth) se importa
+# en get_calendar_service, y fastapi_mail y WeasyPrint en su primer uso, para arrancar rápido
 from googleapiclient.errors import HttpError
 
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google_auth_oauthlib.flow import Flow
+# Búsqueda indexada (pg_trgm) para los endpoints paginados
+from services.busqueda import (
+    normalize_search_text,
+    filtro_busqueda_tutores, filtro_busqueda_pacientes, filtro_busqueda_consultas,
+    condicion_tutor_lookup
+)
+# Totales cacheados/estimados para los endpoints paginados
+from services.conteos import clave_total, obtener_total, guardar_total, invalidar_totales, estimar_total
+# Caché en memoria de especies, razas, tratamientos y regiones
+from services.catalogos import catalogos, invalidar_catalogos, respuesta_cacheada, REGIONES_SERIALIZADAS, REGIONES_MAX_AGE
+# ETag por versión de fila (xmin) para los detalles de paciente, tutor y consulta
+from services.versiones import etag_fila, no_modificado, verificar_if_match, cabeceras_etag
+# Caché de respuestas (LRU local o Redis) para búsquedas paginadas, vacunas y eventos
+from services.cache_respuestas import (
+    responder, responder_sync, invalidar_respuestas, RESPONSE_CACHE_EVENTS_TTL,
+    TAGS_TUTORES, TAGS_PACIENTES, TAGS_CONSULTAS, TAGS_VACUNAS, TAGS_EVENTOS
+)
 
-# Para generar pdf
-from services.pdf_service import generar_pdf_consulta
+# Serialización JSON con orjson y respuestas que omiten la revalidación de response_model
+from services.serializacion import RespuestaJSON, respuesta_rapida
+# Consulta completa (consulta + recetas + tratamientos) en una transacción
+from services.consultas import crear_consulta_completa
+# Conteo de sentencias y tiempo de base por request
+from services.instrumentacion import instalar_instrumentacion
+# Métricas Prometheus (GET /metrics)
+from services.metricas import instalar_metricas, medir_llamada
+# Cola persistente de correos programados (POST /email/{fecha_envio})
+from services.correos_programados import despachador, encolar_correo
+
+# Para generar pdf (services.pdf_service se importa en cada endpoint: carga WeasyPrint)
 from fastapi.responses import Response
 
 # Para comunicar con microservicio whatsapp 
@@ -58,7 +80,7 @@ from session_auth import router as session_auth_router, get_current_session_user
 # Cargar variables de entorno desde el archivo .env
 load_dotenv()
 
-app = FastAPI()
+app = FastAPI(default_response_class=RespuestaJSON)
 #SCOPES = ["https://www.googleapis.com/auth/calendar"]
 #CLIENT_SECRETS_FILE = "credentials.json"
 
@@ -79,11 +101,28 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Métricas Prometheus: latencia por ruta, requests en curso y uso de los pools
+instalar_metricas(app, {
+    "sync": engine,
+    "async": async_engine.sync_engine,
+    **({"read_sync": read_engine, "read_async": async_read_engine.sync_engine} if HAY_REPLICA else {}),
+})
+
+# Instrumentación SQL por request (Server-Timing, X-DB-Queries y log de N+1); va al final
+# para quedar como el middleware más externo y medir el request completo
+instalar_instrumentacion(app, engine, async_engine.sync_engine, *(
+    (read_engine, async_read_engine.sync_engine) if HAY_REPLICA else ()
+))
+
 # Incluir routers
-from routers import whatsapp
+from routers import whatsapp, interno, exportar, importacion, metricas
 app.include_router(whatsapp.router)
+app.include_router(interno.router)
+app.include_router(exportar.router)
+app.include_router(importacion.router)
+app.include_router(metricas.router)
 
-models.Base.metadata.create_all(bind=engine) # Crear tablas en la base de datos
+# Las tablas las crea `python migrar.py` (create_all + migraciones), no el arranque de cada worker
 
 # Crear una sesión para cada solicitud
 def get_db():
@@ -95,19 +134,145 @@ def get_db():
 
 db_dependency = Annotated[Session, Depends(get_db)]
 
-# Función helper para normalizar texto de búsqueda
-def normalize_search_text(text: str) -> str:
+# Sesión asíncrona (asyncpg) para los endpoints async de lectura más usados
+async def get_async_db():
     """
-    Normaliza el texto de búsqueda eliminando puntos, guiones y espacios extras.
-    Útil para búsquedas de RUT, nombres completos, etc.
+    Los endpoints async no ocupan un hilo del threadpool mientras esperan a la base.
+    Reutilizan las funciones de consulta síncronas (db.query) con `await db.run_sync(...)`:
+    SQLAlchemy las ejecuta sobre la conexión asyncpg sin bloquear el event loop.
     """
-    if not text:
-        return ""
-    # Eliminar puntos y guiones
-    normalized = text.replace(".", "").replace("-", "")
-    # Reemplazar múltiples espacios por uno solo
-    normalized = " ".join(normalized.split())
-    return normalized.strip()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Sesiones de lectura (READ ONLY) para listados, búsquedas y datos de PDF: van a la réplica
+# si DATABASE_READ_URL está configurada y su retraso está dentro del límite (ver services/replica.py).
+# El detalle de paciente, consulta y tutor se sigue leyendo de la principal para ver lo recién guardado.
+def get_read_db():
+    db = sesion_lectura()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    async with await sesion_lectura_async() as db:
+        yield db
+
+# Función helper para servir un catálogo desde la caché en memoria
+async def catalogo_vigente():
+    """Recarga los catálogos (en el threadpool) solo si la caché quedó inválida o venció."""
+    if catalogos.necesita_recarga():
+        await run_in_threadpool(catalogos.recargar)
+    return catalogos
+
+@app.on_event("startup")
+async def cargar_catalogos():
+    try:
+        await run_in_threadpool(catalogos.recargar)
+    except Exception as e:
+        # Sin base disponible al arrancar: se cargarán en el primer request
+        print(f"⚠️  No se pudieron cargar los catálogos al iniciar: {e}")
+
+@app.on_event("shutdown")
+async def cerrar_motor_async():
+    await async_engine.dispose()
+
+# Funciones helper para paginación por cursor (keyset)
+def encode_cursor(*valores) -> str:
+    """
+    Codifica la clave de la última fila de una página en un cursor opaco.
+    Las fechas se guardan en formato ISO.
+    """
+    valores = [v.isoformat() if isinstance(v, date) else v for v in valores]
+    raw = json.dumps(valores, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, tipos: tuple) -> list:
+    """
+    Decodifica un cursor generado por encode_cursor.
+    `tipos` tiene el tipo esperado de cada valor (p. ej. (str,) o (str | None, int)); los valores
+    van directo al filtro de la consulta, así que un cursor alterado o de otra versión debe
+    rechazarse aquí. Lanza 400 si el cursor no es válido, no tiene la cantidad de valores
+    esperada o algún valor no es del tipo esperado.
+    """
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + pad))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(valores, list) or len(valores) != len(tipos):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    for valor, tipo in zip(valores, tipos):
+        # bool es subclase de int en Python: true/false no sirven como id
+        if isinstance(valor, bool) or not isinstance(valor, tipo):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        # PostgreSQL no acepta NUL dentro de un texto
+        if isinstance(valor, str) and "\x00" in valor:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    return valores
+
+# Función helper para construir el bloque "pagination" de los endpoints paginados
+def construir_paginacion(page: int, limit: int, total_count: int, has_next: bool, has_previous: bool, next_cursor: Optional[str], modo_cursor: bool = False, total_aproximado: bool = False) -> dict:
+    """
+    En modo cursor los números de página no aplican, por lo que se devuelven como None
+    y el cliente debe avanzar usando next_cursor.
+    """
+    total_pages = (total_count + limit - 1) // limit
+    return {
+        "current_page": None if modo_cursor else page,
+        "total_pages": total_pages,
+        "total_count": total_count,
+        "total_is_approximate": total_aproximado,
+        "limit": limit,
+        "has_next": has_next,
+        "has_previous": has_previous,
+        "next_page": page + 1 if has_next and not modo_cursor else None,
+        "previous_page": page - 1 if has_previous and not modo_cursor else None,
+        "next_cursor": next_cursor
+    }
+
+# Función helper para obtener una página y el total en una sola consulta
+def obtener_pagina_con_total(db: Session, query, clave: str, limit: int, offset: int, filtro_cursor=None, aproximar: bool = False):
+    """
+    Ejecuta la consulta paginada y devuelve (filas, total_count, has_next, total_aproximado).
+
+    El total sale, en este orden, de: la caché de totales (TTL corto, ver services/conteos.py), la estimación del
+    planificador (si `aproximar`), o una columna `count(*) OVER ()` agregada a la misma
+    consulta de la página, evitando el query.count() separado.
+    Cada fila trae una columna extra `total_count` al final; se pide limit + 1 filas
+    para saber si hay página siguiente sin depender del total.
+    """
+    total_count, version_total = obtener_total(clave)
+    total_aproximado = False
+    if total_count is None and aproximar:
+        total_count = estimar_total(db, query)
+        total_aproximado = True
+
+    if filtro_cursor is not None:
+        # En modo cursor la ventana contaría solo las filas restantes, no el total
+        if total_count is None:
+            total_count = query.order_by(None).count()
+            guardar_total(clave, total_count, version_total)
+        paginada = query.filter(filtro_cursor)
+    else:
+        paginada = query.offset(offset)
+
+    if total_count is None:
+        paginada = paginada.add_columns(func.count().over().label("total_count"))
+    else:
+        paginada = paginada.add_columns(literal_column("NULL").label("total_count"))
+    filas = paginada.limit(limit + 1).all()
+
+    if total_count is None:
+        if filas:
+            total_count = filas[0].total_count
+        else:
+            # Página fuera de rango: la ventana no devolvió filas
+            total_count = query.order_by(None).count()
+        guardar_total(clave, total_count, version_total)
+
+    has_next = len(filas) > limit
+    return filas[:limit], total_count, has_next, total_aproximado
 
 # Función helper para convertir paciente ORM a PacienteResponse
 def paciente_to_response(db_paciente: models.Paciente, db: Session) -> PacienteResponse:
@@ -116,25 +281,53 @@ def paciente_to_response(db_paciente: models.Paciente, db: Session) -> PacienteR
     Carga explícitamente los nombres de raza y especie como strings.
     Incluye información del tutor si existe.
     """
-    # Cargar los nombres de la raza y especie
-    raza_obj = db.query(models.Raza).filter(models.Raza.id_raza == db_paciente.id_raza).first()
-    especie_obj = None
-    if raza_obj:
-        especie_obj = db.query(models.Especie).filter(models.Especie.id_especie == raza_obj.id_especie).first()
-    
-    # Obtener el tutor del paciente
-    tutor_data = None
-    tutor_paciente = db.query(models.TutorPaciente).filter(
-        models.TutorPaciente.id_paciente == db_paciente.id_paciente
-    ).first()
-    
-    if tutor_paciente:
-        tutor_obj = db.query(models.Tutor).filter(
-            models.Tutor.rut == tutor_paciente.rut
-        ).first()
-        
-        if tutor_obj:
-            tutor_data = TutorResponse(
+    return pacientes_to_response([db_paciente], db)[0]
+
+# Función helper para convertir una lista de pacientes ORM a PacienteResponse
+def pacientes_to_response(db_pacientes: List[models.Paciente], db: Session) -> List[PacienteResponse]:
+    """
+    Versión masiva de paciente_to_response.
+    Carga raza/especie y tutores de todo el conjunto de resultados con un número
+    fijo de consultas (2), sin importar cuántos pacientes se conviertan.
+    """
+    if not db_pacientes:
+        return []
+
+    # Una consulta para todas las razas con su especie
+    ids_raza = {p.id_raza for p in db_pacientes if p.id_raza is not None}
+    razas = {}
+    if ids_raza:
+        filas_raza = db.query(
+            models.Raza.id_raza,
+            models.Raza.nombre,
+            models.Especie.nombre_comun
+        ).join(
+            models.Especie,
+            models.Raza.id_especie == models.Especie.id_especie,
+            isouter=True
+        ).filter(models.Raza.id_raza.in_(ids_raza)).all()
+        razas = {fila.id_raza: (fila.nombre, fila.nombre_comun) for fila in filas_raza}
+
+    # Una consulta para todos los tutores asociados. Se usa el primero de cada paciente con el
+    # mismo criterio que el tutor principal de paciente_listado: asociación más reciente
+    # (fecha, NULL al final) y desempate por RUT
+    ids_paciente = [p.id_paciente for p in db_pacientes]
+    filas_tutor = db.query(
+        models.TutorPaciente.id_paciente,
+        models.Tutor
+    ).join(
+        models.Tutor,
+        models.TutorPaciente.rut == models.Tutor.rut
+    ).filter(
+        models.TutorPaciente.id_paciente.in_(ids_paciente)
+    ).order_by(
+        models.TutorPaciente.fecha.desc().nulls_last(),
+        models.TutorPaciente.rut
+    ).all()
+    tutores = {}
+    for id_paciente, tutor_obj in filas_tutor:
+        if id_paciente not in tutores:
+            tutores[id_paciente] = TutorResponse(
                 rut=tutor_obj.rut,
                 nombre=tutor_obj.nombre,
                 apellido_paterno=tutor_obj.apellido_paterno,
@@ -149,21 +342,25 @@ def paciente_to_response(db_paciente: models.Paciente, db: Session) -> PacienteR
                 direccion=tutor_obj.direccion,
                 email=tutor_obj.email
             )
-    
-    # Construir la respuesta con los nombres como strings explícitos
-    return PacienteResponse(
-        id_paciente=db_paciente.id_paciente,
-        nombre=db_paciente.nombre,
-        color=db_paciente.color,
-        sexo=db_paciente.sexo,
-        esterilizado=db_paciente.esterilizado,
-        fecha_nacimiento=db_paciente.fecha_nacimiento,
-        id_raza=db_paciente.id_raza,
-        codigo_chip=db_paciente.codigo_chip,
-        raza=str(raza_obj.nombre) if raza_obj else None,
-        especie=str(especie_obj.nombre_comun) if especie_obj else None,
-        tutor=tutor_data
-    )
+
+    # Construir las respuestas con los nombres como strings explícitos
+    respuestas = []
+    for db_paciente in db_pacientes:
+        raza_nombre, especie_nombre = razas.get(db_paciente.id_raza, (None, None))
+        respuestas.append(PacienteResponse(
+            id_paciente=db_paciente.id_paciente,
+            nombre=db_paciente.nombre,
+            color=db_paciente.color,
+            sexo=db_paciente.sexo,
+            esterilizado=db_paciente.esterilizado,
+            fecha_nacimiento=db_paciente.fecha_nacimiento,
+            id_raza=db_paciente.id_raza,
+            codigo_chip=db_paciente.codigo_chip,
+            raza=str(raza_nombre) if raza_nombre else None,
+            especie=str(especie_nombre) if especie_nombre else None,
+            tutor=tutores.get(db_paciente.id_paciente)
+        ))
+    return respuestas
 
 
 # HU1: Como Veterinaria quiero ver el calendario con los horarios de atención disponibles, para organizarme con la agenda de horas
@@ -174,6 +371,9 @@ def get_calendar_service():
     No requiere interacción del usuario.
     """
     try:
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+
         # Obtener credenciales desde variable de entorno
         service_account_info = json.loads(os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY"))
         
@@ -191,29 +391,37 @@ def get_calendar_service():
         print(f"Error al crear servicio de calendario: {e}")
         raise HTTPException(status_code=500, detail="Error de configuración del calendario")
     
-@app.get("/events")
-def list_events(max_results: int = 10, current_user: dict = Depends(get_current_session_user)):
-    """Obtiene los próximos N eventos."""
-    try:
-        service = get_calendar_service()
-        now = datetime.now(timezone.utc).isoformat()
-        
+def listar_eventos(**filtros) -> dict:
+    """Eventos del calendario (singleEvents, ordenados por inicio) con los filtros de Google dados."""
+    service = get_calendar_service()
+    with medir_llamada("google_calendar", "events.list"):
         events_result = service.events().list(
             calendarId=CALENDAR_ID,
-            timeMin=now,
-            maxResults=max_results,
             singleEvents=True,
-            orderBy='startTime'
+            orderBy='startTime',
+            **filtros
         ).execute()
+    return {"events": events_result.get('items', [])}
+
+@app.get("/events")
+def list_events(request: Request, max_results: int = 10, current_user: dict = Depends(get_current_session_user)):
+    """Obtiene los próximos N eventos."""
+    try:
+        # La hora se redondea al minuto para que la clave de la caché se repita entre requests
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0).isoformat()
         
-        return {"events": events_result.get('items', [])}
+        return responder_sync(
+            request, current_user, TAGS_EVENTOS,
+            lambda: listar_eventos(timeMin=now, maxResults=max_results),
+            ttl=RESPONSE_CACHE_EVENTS_TTL
+        )
     
     except HttpError as error:
         raise HTTPException(status_code=500, detail=str(error))
 
 
 @app.get("/events/day")
-def get_events_day(date: str, current_user: dict = Depends(get_current_session_user)):
+def get_events_day(date: str, request: Request, current_user: dict = Depends(get_current_session_user)):
     """
     Obtiene eventos de un día específico.
     
@@ -221,8 +429,6 @@ def get_events_day(date: str, current_user: dict = Depends(get_current_session_u
         date: Fecha en formato YYYY-MM-DD (ej: 2025-11-10)
     """
     try:
-        service = get_calendar_service()
-        
         # Parsear fecha
         target_date = datetime.fromisoformat(date)
         
@@ -235,15 +441,11 @@ def get_events_day(date: str, current_user: dict = Depends(get_current_session_u
         # Fin del día (23:59:59)
         end_of_day = start_of_day + timedelta(days=1) - timedelta(seconds=1)
         
-        events_result = service.events().list(
-            calendarId=CALENDAR_ID,
-            timeMin=start_of_day.isoformat(),
-            timeMax=end_of_day.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        return {"events": events_result.get('items', [])}
+        return responder_sync(
+            request, current_user, TAGS_EVENTOS,
+            lambda: listar_eventos(timeMin=start_of_day.isoformat(), timeMax=end_of_day.isoformat()),
+            ttl=RESPONSE_CACHE_EVENTS_TTL
+        )
     
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
@@ -252,7 +454,7 @@ def get_events_day(date: str, current_user: dict = Depends(get_current_session_u
 
 
 @app.get("/events/week")
-def get_events_week(start_date: str, end_date: str, current_user: dict = Depends(get_current_session_user)):
+def get_events_week(start_date: str, end_date: str, request: Request, current_user: dict = Depends(get_current_session_user)):
     """
     Obtiene eventos de una semana (7 días) desde la fecha indicada.
     
@@ -261,8 +463,6 @@ def get_events_week(start_date: str, end_date: str, current_user: dict = Depends
         end_date: Fecha de fin en formato YYYY-MM-DD
     """
     try:
-        service = get_calendar_service()
-        
         # Parsear fecha
         target_date = datetime.fromisoformat(start_date)
         
@@ -277,15 +477,11 @@ def get_events_week(start_date: str, end_date: str, current_user: dict = Depends
             tzinfo=timezone.utc
         )
         
-        events_result = service.events().list(
-            calendarId=CALENDAR_ID,
-            timeMin=start_of_week.isoformat(),
-            timeMax=end_of_week.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        return {"events": events_result.get('items', [])}
+        return responder_sync(
+            request, current_user, TAGS_EVENTOS,
+            lambda: listar_eventos(timeMin=start_of_week.isoformat(), timeMax=end_of_week.isoformat()),
+            ttl=RESPONSE_CACHE_EVENTS_TTL
+        )
     
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido")
@@ -294,7 +490,7 @@ def get_events_week(start_date: str, end_date: str, current_user: dict = Depends
 
 
 @app.get("/events/month")
-def get_events_month(year: int, month: int, current_user: dict = Depends(get_current_session_user)):
+def get_events_month(year: int, month: int, request: Request, current_user: dict = Depends(get_current_session_user)):
     """
     Obtiene eventos de un mes específico.
     
@@ -303,8 +499,6 @@ def get_events_month(year: int, month: int, current_user: dict = Depends(get_cur
         month: Mes (1-12)
     """
     try:
-        service = get_calendar_service()
-        
         # Primer día del mes
         start_of_month = datetime(year, month, 1, tzinfo=timezone.utc)
         
@@ -314,15 +508,11 @@ def get_events_month(year: int, month: int, current_user: dict = Depends(get_cur
         else:
             end_of_month = datetime(year, month + 1, 1, tzinfo=timezone.utc)
         
-        events_result = service.events().list(
-            calendarId=CALENDAR_ID,
-            timeMin=start_of_month.isoformat(),
-            timeMax=end_of_month.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        return {"events": events_result.get('items', [])}
+        return responder_sync(
+            request, current_user, TAGS_EVENTOS,
+            lambda: listar_eventos(timeMin=start_of_month.isoformat(), timeMax=end_of_month.isoformat()),
+            ttl=RESPONSE_CACHE_EVENTS_TTL
+        )
     
     except HttpError as error:
         raise HTTPException(status_code=500, detail=str(error))
@@ -356,10 +546,12 @@ def create_event(event: EventCreate, current_user: dict = Depends(get_current_se
             'attendees': event.attendees if event.attendees else [],
         }
         
-        created_event = service.events().insert(
-            calendarId=CALENDAR_ID,
-            body=event_body
-        ).execute()
+        with medir_llamada("google_calendar", "events.insert"):
+            created_event = service.events().insert(
+                calendarId=CALENDAR_ID,
+                body=event_body
+            ).execute()
+        invalidar_respuestas(*TAGS_EVENTOS)
         
         return {
             "message": "Evento creado exitosamente",
@@ -381,10 +573,12 @@ def delete_event(event_id: str, current_user: dict = Depends(get_current_session
         service = get_calendar_service()
         
         # Eliminar el evento
-        service.events().delete(
-            calendarId=CALENDAR_ID,
-            eventId=event_id
-        ).execute()
+        with medir_llamada("google_calendar", "events.delete"):
+            service.events().delete(
+                calendarId=CALENDAR_ID,
+                eventId=event_id
+            ).execute()
+        invalidar_respuestas(*TAGS_EVENTOS)
         
         return {
             "message": "Evento eliminado exitosamente",
@@ -414,15 +608,13 @@ def delete_event(event_id: str, current_user: dict = Depends(get_current_session
 
 # Endpoint para obtener regiones - Datos locales SUBDERE
 @app.get("/regiones/")
-async def obtener_regiones():
+async def obtener_regiones(request: Request):
     """
     Retorna regiones chilenas desde datos estáticos locales.
     Los datos provienen de SUBDERE (Subsecretaría de Desarrollo Regional y Administrativo).
+    Se sirven ya serializados (ver services/catalogos.py).
     """
-    from regiones_data import REGIONES_CHILE
-    
-    print(f"✅ Retornando {len(REGIONES_CHILE)} regiones desde datos locales")
-    return REGIONES_CHILE
+    return respuesta_cacheada(request, REGIONES_SERIALIZADAS, max_age=REGIONES_MAX_AGE)
 
 def obtener_numero_romano(codigo_region: str) -> str:
     """Convierte el código de región a número romano chileno"""
@@ -439,12 +631,21 @@ def crear_tutor(tutor: TutorCreate, db: Session = Depends(get_db), current_user:
     db_tutor = models.Tutor(**tutor.dict())
     db.add(db_tutor)
     db.commit()
+    invalidar_totales("tutores")
+    invalidar_respuestas("tutores")
     db.refresh(db_tutor)
     return db_tutor
 
 # Ruta GET para obtener un dueño por su RUT
 @app.get("/tutores/{rut}", response_model=TutorResponse)
-def obtener_tutor(rut: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def obtener_tutor(rut: str, response: Response, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+    # Solo la versión de la fila; si el cliente ya la tiene se responde 304 sin cargar el tutor
+    etag, activo = etag_fila(db, "tutor", rut)
+    if etag is None or not activo:
+        raise HTTPException(status_code=404, detail="Tutor no encontrado")
+    if no_modificado(etag, if_none_match):
+        return Response(status_code=304, headers=cabeceras_etag(etag))
+    response.headers.update(cabeceras_etag(etag))
     db_tutor = db.query(models.Tutor).filter(
         models.Tutor.rut == rut,
         models.Tutor.activo == True
@@ -455,7 +656,7 @@ def obtener_tutor(rut: str, db: Session = Depends(get_db), current_user: dict =
 
 # Ruta GET para obtener todos los dueños
 @app.get("/tutores/", response_model=List[TutorResponse])
-def obtener_todos_los_tutores(db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def obtener_todos_los_tutores(db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     db_tutores = db.query(models.Tutor).filter(models.Tutor.activo == True).all()
     if not db_tutores:
         raise HTTPException(status_code=404, detail="No se encontraron tutores")
@@ -463,7 +664,8 @@ def obtener_todos_los_tutores(db: Session = Depends(get_db), current_user: dict
 
 # HU16:
 @app.get("/consultas/{id_consulta}/pdf", response_model=ConsultaResponse)
-def descargar_pdf_consulta(id_consulta: int, db: Session = Depends(get_db)):
+def descargar_pdf_consulta(id_consulta: int, db: Session = Depends(get_read_db)):
+    from services.pdf_service import generar_pdf_consulta
     pdf = generar_pdf_consulta(db, id_consulta)
     return Response(
         content=pdf,
@@ -476,69 +678,75 @@ def descargar_pdf_consulta(id_consulta: int, db: Session = Depends(get_db)):
 # Ruta GET para obtener tutores con paginación
 # Opción alternativa más corta
 @app.get("/tutores/paginated/")
-def obtener_tutores_paginados(
+async def obtener_tutores_paginados(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (next_cursor de la página anterior); reemplaza a page"),
+    approximate_total: bool = Query(False, description="Sin búsqueda, usar la estimación del planificador como total"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_session_user)
 ):
+    return await responder(
+        request, current_user, TAGS_TUTORES,
+        lambda: db.run_sync(listar_tutores_paginados, page, limit, search, cursor, approximate_total)
+    )
+
+def listar_tutores_paginados(db: Session, page: int, limit: int, search: Optional[str], cursor: Optional[str], approximate_total: bool):
     offset = (page - 1) * limit
     query = db.query(models.Tutor).filter(models.Tutor.activo == True)
     
     if search:
-        # Normalizar texto de búsqueda
-        search_normalized = normalize_search_text(search)
-        
         # Búsqueda flexible: permite buscar por nombre completo, RUT sin formato, etc.
-        search_pattern = f"%{search_normalized}%"
-        
-        # Para RUT: buscar sin puntos ni guiones
-        # Para nombres: concatenar nombre + apellidos y buscar en el texto completo
-        query = query.filter(
-            or_(
-                # Búsqueda en nombre individual
-                models.Tutor.nombre.ilike(f"%{search}%"),
-                models.Tutor.apellido_paterno.ilike(f"%{search}%"),
-                models.Tutor.apellido_materno.ilike(f"%{search}%"),
-                models.Tutor.email.ilike(f"%{search}%"),
-                # Búsqueda en nombre completo (permite "nicolas ortiz")
-                func.concat(
-                    models.Tutor.nombre, ' ',
-                    models.Tutor.apellido_paterno, ' ',
-                    models.Tutor.apellido_materno
-                ).ilike(f"%{search}%"),
-                # Búsqueda en RUT sin formato (permite buscar con o sin puntos/guiones)
-                func.replace(
-                    func.replace(models.Tutor.rut, '.', ''), '-', ''
-                ).ilike(search_pattern)
-            )
-        )
+        # Ver services/busqueda.py (usa índices trigram y columnas generadas)
+        query = query.filter(filtro_busqueda_tutores(search))
     
-    total_count = query.count()
-    tutores_db = query.order_by(models.Tutor.rut).offset(offset).limit(limit).all()
+    query = query.order_by(models.Tutor.rut)
     
-    total_pages = (total_count + limit - 1) // limit
-    has_next = page < total_pages
-    has_previous = page > 1
+    filtro_cursor = None
+    if cursor:
+        # Modo cursor: buscar desde el último RUT entregado (usa el índice de la PK)
+        (ultimo_rut,) = decode_cursor(cursor, (str,))
+        filtro_cursor = models.Tutor.rut > ultimo_rut
+    
+    # Página + total en una sola consulta
+    filas, total_count, has_next, total_aproximado = obtener_pagina_con_total(
+        db, query, clave_total("tutores", search), limit, offset,
+        filtro_cursor=filtro_cursor, aproximar=approximate_total and not search
+    )
+    tutores_db = [fila[0] for fila in filas]
+    has_previous = bool(cursor) or page > 1
+    
+    next_cursor = encode_cursor(tutores_db[-1].rut) if has_next and tutores_db else None
     
-    # Usar el esquema Pydantic para convertir cada objeto
-    tutores_serializados = [TutorResponse.model_validate(tutor).model_dump() for tutor in tutores_db]
+    # Esquema construido sin validar: los datos vienen de la base (ver schemas.construir_desde_orm)
+    tutores_serializados = [construir_desde_orm(TutorResponse, tutor) for tutor in tutores_db]
     
     return {
         "tutores": tutores_serializados,
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "limit": limit,
-            "has_next": has_next,
-            "has_previous": has_previous,
-            "next_page": page + 1 if has_next else None,
-            "previous_page": page - 1 if has_previous else None
-        }
+        "pagination": construir_paginacion(page, limit, total_count, has_next, has_previous, next_cursor, modo_cursor=bool(cursor), total_aproximado=total_aproximado)
     }
 
+# Ruta GET para resolver un tutor por RUT o teléfono en cualquier formato
+# (12.345.678-5, 123456785, +56 9 1234 5678, 912345678...) con búsqueda exacta indexada
+@app.get("/tutores/buscar/", response_model=List[TutorResponse])
+def buscar_tutor_por_rut_o_telefono(
+    q: str = Query(..., min_length=1, description="RUT o teléfono del tutor"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(get_current_session_user)
+):
+    condicion = condicion_tutor_lookup(q)
+    if condicion is None:
+        raise HTTPException(status_code=400, detail="El valor no tiene formato de RUT ni de teléfono")
+    db_tutores = db.query(models.Tutor).filter(
+        condicion,
+        models.Tutor.activo == True
+    ).order_by(models.Tutor.rut).all()
+    if not db_tutores:
+        raise HTTPException(status_code=404, detail="Tutor no encontrado")
+    return db_tutores
+
 # Ruta para ver todas las mascotas de un tutor
 @app.get("/tutores/{rut}/pacientes/", response_model=List[PacienteResponse])
 def obtener_mascotas_de_tutor(rut: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
@@ -552,7 +760,7 @@ def obtener_mascotas_de_tutor(rut: str, db: Session = Depends(get_db), current_u
         models.TutorPaciente.rut == rut,
         models.Paciente.activo == True
     ).all()
-    return [paciente_to_response(p, db) for p in db_pacientes]
+    return pacientes_to_response(db_pacientes, db)
 
 # HU 3: Como Veterinaria, quiero poder almacenar el paciente por su nombre y raza para indentificarlos y buscarlos facilmente
 """ RUTAS PARA PACIENTES (mascotas) """
@@ -562,6 +770,8 @@ def crear_paciente(paciente: PacienteCreate, db: Session = Depends(get_db), curr
     db_paciente = models.Paciente(**paciente.dict())
     db.add(db_paciente)
     db.commit()
+    invalidar_totales("pacientes")
+    invalidar_respuestas("pacientes")
     db.refresh(db_paciente)
     
     # Usar helper function para construir la respuesta
@@ -569,7 +779,17 @@ def crear_paciente(paciente: PacienteCreate, db: Session = Depends(get_db), curr
 
 # Ruta GET para obtener un paciente por su ID
 @app.get("/pacientes/{id_paciente}", response_model=PacienteResponse)
-def obtener_paciente(id_paciente: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+async def obtener_paciente(id_paciente: int, response: Response, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(get_current_session_user)):
+    # Solo la versión de la fila; si el cliente ya la tiene se responde 304 sin cargar el paciente
+    etag, activo = await db.run_sync(etag_fila, "paciente", id_paciente)
+    if etag is None or not activo:
+        raise HTTPException(status_code=404, detail="Paciente no encontrado")
+    if no_modificado(etag, if_none_match):
+        return Response(status_code=304, headers=cabeceras_etag(etag))
+    response.headers.update(cabeceras_etag(etag))
+    return await db.run_sync(buscar_paciente, id_paciente)
+
+def buscar_paciente(db: Session, id_paciente: int) -> PacienteResponse:
     db_paciente = db.query(models.Paciente).filter(
         models.Paciente.id_paciente == id_paciente,
         models.Paciente.activo == True
@@ -580,33 +800,33 @@ def obtener_paciente(id_paciente: int, db: Session = Depends(get_db), current_us
 
 # Ruta GET para obtener pacientes por su nombre
 @app.get("/pacientes/nombre/{nombre}", response_model=List[PacienteResponse])
-def obtener_pacientes_por_nombre(nombre: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def obtener_pacientes_por_nombre(nombre: str, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     db_pacientes = db.query(models.Paciente).filter(
         models.Paciente.nombre.ilike(f"%{nombre}%"),
         models.Paciente.activo == True
     ).all() # el ilike no diferencia mayusculas o minusculas asi facilitamos la busqueda al no ser tan estricta
     if not db_pacientes:
         raise HTTPException(status_code=404, detail="No se encontraron pacientes con ese nombre")
-    return [paciente_to_response(p, db) for p in db_pacientes]
+    return pacientes_to_response(db_pacientes, db)
 
 # Ruta GET para obtener pacientes por su raza (nombre de la raza)
 @app.get("/pacientes/raza/{nombre_raza}", response_model=List[PacienteResponse])
-def obtener_pacientes_por_raza(nombre_raza: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def obtener_pacientes_por_raza(nombre_raza: str, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     db_pacientes = db.query(models.Paciente).join(models.Raza).filter(
         models.Raza.nombre.ilike(f"%{nombre_raza}%"),
         models.Paciente.activo == True
     ).all()
     if not db_pacientes:
         raise HTTPException(status_code=404, detail="No se encontraron pacientes con esa raza")
-    return [paciente_to_response(p, db) for p in db_pacientes]
+    return pacientes_to_response(db_pacientes, db)
 
 # Ruta GET para obtener todos los pacientes
 @app.get("/pacientes/", response_model=List[PacienteResponse])
-def obtener_todos_los_pacientes(db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def obtener_todos_los_pacientes(db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     db_pacientes = db.query(models.Paciente).filter(models.Paciente.activo == True).all()
     if not db_pacientes:
         raise HTTPException(status_code=404, detail="No se encontraron pacientes")
-    return [paciente_to_response(p, db) for p in db_pacientes]
+    return pacientes_to_response(db_pacientes, db)
 
 # Rut GET para obtener todos los pacientes por rut de su tutor
 @app.get("/pacientes/tutor/{rut}", response_model=List[PacienteResponse])
@@ -656,133 +876,104 @@ def obtener_pacientes_por_rut_tutor(rut: str, db: Session = Depends(get_db), cur
 
 # Ruta GET para obtener pacientes con paginación y búsqueda avanzada
 @app.get("/pacientes/paginated/")
-def obtener_pacientes_paginados(
+async def obtener_pacientes_paginados(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (next_cursor de la página anterior); reemplaza a page"),
+    approximate_total: bool = Query(False, description="Sin búsqueda, usar la estimación del planificador como total"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_session_user)
 ):
+    return await responder(
+        request, current_user, TAGS_PACIENTES,
+        lambda: db.run_sync(listar_pacientes_paginados, page, limit, search, cursor, approximate_total)
+    )
+
+def listar_pacientes_paginados(db: Session, page: int, limit: int, search: Optional[str], cursor: Optional[str], approximate_total: bool):
     offset = (page - 1) * limit
     
-    # Query con joins para obtener información relacionada
-    query = db.query(
-        models.Paciente,
-        models.Raza.nombre.label('raza_nombre'),
-        models.Especie.nombre_comun.label('especie_nombre'),
-        models.Tutor.nombre.label('tutor_nombre'),
-        models.Tutor.apellido_paterno.label('tutor_apellido_paterno'),
-        models.Tutor.apellido_materno.label('tutor_apellido_materno'),
-        models.Tutor.rut.label('tutor_rut'),
-        models.Tutor.telefono.label('tutor_telefono'),
-        models.Tutor.email.label('tutor_email')
-    ).join(
-        models.Raza, models.Paciente.id_raza == models.Raza.id_raza, isouter=True
-    ).join(
-        models.Especie, models.Raza.id_especie == models.Especie.id_especie, isouter=True
-    ).join(
-        models.TutorPaciente, models.Paciente.id_paciente == models.TutorPaciente.id_paciente, isouter=True
-    ).join(
-        models.Tutor, models.TutorPaciente.rut == models.Tutor.rut, isouter=True
-    ).filter(
-        models.Paciente.activo == True
-    )
+    # Proyección govet.paciente_listado: paciente, raza, especie y tutor principal en una fila
+    # (Dbase/migrations/005_paciente_listado.sql), sin joins
+    listado = models.PacienteListado
+    query = db.query(listado).filter(listado.activo == True)
     
     if search:
-        # Normalizar texto de búsqueda
-        search_normalized = normalize_search_text(search)
-        search_pattern = f"%{search_normalized}%"
-        
-        query = query.filter(
-            or_(
-                # Búsqueda en nombre del paciente
-                models.Paciente.nombre.ilike(f"%{search}%"),
-                # Búsqueda en raza y especie
-                models.Raza.nombre.ilike(f"%{search}%"),
-                models.Especie.nombre_comun.ilike(f"%{search}%"),
-                # Búsqueda en nombre del tutor (individual)
-                models.Tutor.nombre.ilike(f"%{search}%"),
-                models.Tutor.apellido_paterno.ilike(f"%{search}%"),
-                # Búsqueda en nombre completo del tutor
-                func.concat(
-                    models.Tutor.nombre, ' ',
-                    models.Tutor.apellido_paterno, ' ',
-                    models.Tutor.apellido_materno
-                ).ilike(f"%{search}%"),
-                # Búsqueda en RUT del tutor sin formato
-                func.replace(
-                    func.replace(models.Tutor.rut, '.', ''), '-', ''
-                ).ilike(search_pattern)
-            )
-        )
+        # Búsqueda en paciente, raza, especie y tutores (ver services/busqueda.py)
+        query = query.filter(filtro_busqueda_pacientes(search))
     
-    # Contar total sin aplicar offset/limit
-    total_count = query.count()
+    query = query.order_by(listado.id_paciente)
     
-    # Aplicar paginación y obtener resultados
-    results = query.order_by(models.Paciente.id_paciente).offset(offset).limit(limit).all()
+    filtro_cursor = None
+    if cursor:
+        # Modo cursor: buscar desde el último id_paciente entregado
+        (ultimo_id,) = decode_cursor(cursor, (int,))
+        filtro_cursor = listado.id_paciente > ultimo_id
     
-    total_pages = (total_count + limit - 1) // limit
-    has_next = page < total_pages
-    has_previous = page > 1
+    # Aplicar paginación y obtener resultados junto con el total en una sola consulta
+    results, total_count, has_next, total_aproximado = obtener_pagina_con_total(
+        db, query, clave_total("pacientes", search), limit, offset,
+        filtro_cursor=filtro_cursor, aproximar=approximate_total and not search
+    )
+    has_previous = bool(cursor) or page > 1
+    
+    next_cursor = encode_cursor(results[-1][0].id_paciente) if has_next and results else None
     
     # Construir respuesta personalizada con información completa
     pacientes_serializados = []
     for result in results:
-        paciente = result[0]  # El objeto Paciente
+        fila = result[0]  # La fila de paciente_listado
         
         # Construir el diccionario con información completa
         paciente_dict = {
-            "id_paciente": paciente.id_paciente,
-            "nombre": paciente.nombre,
-            "fecha_nacimiento": paciente.fecha_nacimiento.isoformat() if paciente.fecha_nacimiento else None,
-            "color": paciente.color,
-            "sexo": paciente.sexo,
-            "esterilizado": paciente.esterilizado,
-            "id_raza": paciente.id_raza,
+            "id_paciente": fila.id_paciente,
+            "nombre": fila.nombre,
+            "fecha_nacimiento": fila.fecha_nacimiento.isoformat() if fila.fecha_nacimiento else None,
+            "color": fila.color,
+            "sexo": fila.sexo,
+            "esterilizado": fila.esterilizado,
+            "id_raza": fila.id_raza,
             # Información de la raza
-            "raza": result.raza_nombre if result.raza_nombre else None,
+            "raza": fila.raza if fila.raza else None,
             # Información de la especie
-            "especie": result.especie_nombre if result.especie_nombre else None,
-            # Información del tutor
+            "especie": fila.especie if fila.especie else None,
+            # Información del tutor principal
             "tutor": {
-                "nombre": result.tutor_nombre if result.tutor_nombre else None,
-                "apellido_paterno": result.tutor_apellido_paterno if result.tutor_apellido_paterno else None,
-                "apellido_materno": result.tutor_apellido_materno if result.tutor_apellido_materno else None,
-                "rut": result.tutor_rut if result.tutor_rut else None,
-                "telefono": result.tutor_telefono if result.tutor_telefono else None,
-                "email": result.tutor_email if result.tutor_email else None
-            } if result.tutor_nombre else None
+                "nombre": fila.tutor_nombre if fila.tutor_nombre else None,
+                "apellido_paterno": fila.tutor_apellido_paterno if fila.tutor_apellido_paterno else None,
+                "apellido_materno": fila.tutor_apellido_materno if fila.tutor_apellido_materno else None,
+                "rut": fila.tutor_rut if fila.tutor_rut else None,
+                "telefono": fila.tutor_telefono if fila.tutor_telefono else None,
+                "email": fila.tutor_email if fila.tutor_email else None
+            } if fila.tutor_nombre else None
         }
         
         pacientes_serializados.append(paciente_dict)
 
     return {
         "pacientes": pacientes_serializados,
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "limit": limit,
-            "has_next": has_next,
-            "has_previous": has_previous,
-            "next_page": page + 1 if has_next else None,
-            "previous_page": page - 1 if has_previous else None
-        }
+        "pagination": construir_paginacion(page, limit, total_count, has_next, has_previous, next_cursor, modo_cursor=bool(cursor), total_aproximado=total_aproximado)
     }
 
 # HU 5: Como veterinaria quiero poder modificar la información de una mascota registrada, para tratar con casos donde se necesite corregir alguna información hasta cambiar de dueño.
 
 # Ruta PUT para actualizar la información de un paciente
 @app.put("/pacientes/{id_paciente}", response_model=PacienteResponse)
-def actualizar_paciente(id_paciente: int, paciente: PacienteCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def actualizar_paciente(id_paciente: int, paciente: PacienteCreate, response: Response, if_match: Optional[str] = Header(None), db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+    verificar_if_match(db, "paciente", id_paciente, if_match)
     db_paciente = db.query(models.Paciente).filter(models.Paciente.id_paciente == id_paciente).first()
     if not db_paciente:
         raise HTTPException(status_code=404, detail="Paciente no encontrado")
     for key, value in paciente.dict().items():
         setattr(db_paciente, key, value)
     db.commit()
+    # El nombre del paciente también se busca en /consultas/paginated/
+    invalidar_totales("pacientes")
+    invalidar_totales("consultas")
+    invalidar_respuestas("pacientes")
     db.refresh(db_paciente)
+    response.headers.update(cabeceras_etag(etag_fila(db, "paciente", id_paciente)[0]))
 
     return {
         "id_paciente": db_paciente.id_paciente,
@@ -798,7 +989,9 @@ def actualizar_paciente(id_paciente: int, paciente: PacienteCreate, db: Session
 
 # Ruta PUT para actualizar el tutor de un paciente
 @app.put("/pacientes/{id_paciente}/tutor/{rut_tutor}", response_model=PacienteResponse)
-def actualizar_tutor_paciente(id_paciente: int, rut_tutor: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def actualizar_tutor_paciente(id_paciente: int, rut_tutor: str, response: Response, if_match: Optional[str] = Header(None), db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+    # El tutor es parte de la representación del paciente: If-Match se compara con su versión
+    verificar_if_match(db, "paciente", id_paciente, if_match)
     db_paciente = db.query(models.Paciente).filter(models.Paciente.id_paciente == id_paciente).first()
     db_tutor = db.query(models.Tutor).filter(
         models.Tutor.rut == rut_tutor,
@@ -816,6 +1009,9 @@ def actualizar_tutor_paciente(id_paciente: int, rut_tutor: str, db: Session = De
         db_tutor_paciente = models.TutorPaciente(rut=rut_tutor, id_paciente=id_paciente, fecha=date.today())
         db.add(db_tutor_paciente)
     db.commit()
+    invalidar_totales("pacientes")
+    invalidar_respuestas("pacientes")
+    response.headers.update(cabeceras_etag(etag_fila(db, "paciente", id_paciente)[0]))
     return {
         "id_paciente": db_paciente.id_paciente,
         "nombre": db_paciente.nombre,
@@ -840,12 +1036,15 @@ def editar_asociacion_tutor_paciente(rut_tutor: str, id_paciente: int, fecha: da
         raise HTTPException(status_code=404, detail="Asociación tutor-paciente no encontrada")
     db_tutor_paciente.fecha = fecha
     db.commit()
+    invalidar_totales("pacientes")
+    invalidar_respuestas("pacientes")
     db.refresh(db_tutor_paciente)
     
 
 # ruta put para editar la informacion de un tutor
 @app.put("/tutores/{rut}", response_model=TutorResponse)
-def editar_tutor(rut: str, tutor: TutorCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def editar_tutor(rut: str, tutor: TutorCreate, response: Response, if_match: Optional[str] = Header(None), db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+    verificar_if_match(db, "tutor", rut, if_match)
     db_tutor = db.query(models.Tutor).filter(
         models.Tutor.rut == rut,
         models.Tutor.activo == True
@@ -855,7 +1054,13 @@ def editar_tutor(rut: str, tutor: TutorCreate, db: Session = Depends(get_db), cu
     for key, value in tutor.dict().items():
         setattr(db_tutor, key, value)
     db.commit()
+    # El tutor también se busca en /pacientes/paginated/ y /consultas/paginated/
+    invalidar_totales("tutores")
+    invalidar_totales("pacientes")
+    invalidar_totales("consultas")
+    invalidar_respuestas("tutores")
     db.refresh(db_tutor)
+    response.headers.update(cabeceras_etag(etag_fila(db, "tutor", db_tutor.rut)[0]))
     return db_tutor
 
 # Ruta POST para asociar un tutor a un paciente (tutor_paciente)
@@ -873,6 +1078,8 @@ def asociar_tutor_a_paciente(rut_tutor: str, id_paciente: int, fecha: date, db:
     db_tutor_paciente = models.TutorPaciente(rut=rut_tutor, id_paciente=id_paciente, fecha=fecha)
     db.add(db_tutor_paciente)
     db.commit()
+    invalidar_totales("pacientes")
+    invalidar_respuestas("pacientes")
     db.refresh(db_tutor_paciente)
     return db_tutor_paciente
 
@@ -900,32 +1107,33 @@ def crear_raza(raza: RazaCreate, db: Session = Depends(get_db)):
     db_raza = models.Raza(**raza.dict())
     db.add(db_raza)
     db.commit()
+    invalidar_catalogos()
     db.refresh(db_raza)
     return db_raza
 
 # Ruta GET para obtener una raza por su nombre
 @app.get("/razas/nombre/{nombre}", response_model=List[RazaResponse])
-def obtener_razas_por_nombre(nombre: str, db: Session = Depends(get_db)):
-    db_razas = db.query(models.Raza).filter(models.Raza.nombre.ilike(f"%{nombre}%")).all()
+async def obtener_razas_por_nombre(nombre: str, request: Request):
+    db_razas = (await catalogo_vigente()).razas_por_nombre(nombre)
     if not db_razas:
         raise HTTPException(status_code=404, detail="No se encontraron razas con ese nombre")
-    return db_razas
+    return respuesta_cacheada(request, db_razas)
 
 # Ruta GET para obtener todas las razas
 @app.get("/razas/", response_model=List[RazaResponse])  
-def obtener_todas_las_razas(db: Session = Depends(get_db)):
-    db_razas = db.query(models.Raza).all()
+async def obtener_todas_las_razas(request: Request):
+    db_razas = (await catalogo_vigente()).todos("razas")
     if not db_razas:
         raise HTTPException(status_code=404, detail="No se encontraron razas")
-    return db_razas
+    return respuesta_cacheada(request, db_razas)
 
 # Ruta GET para obtener todas las razas mediante el nombre común de la especie
 @app.get("/razas/especie/{nombre_especie}", response_model=List[RazaResponse])
-def obtener_razas_por_especie(nombre_especie: str, db: Session = Depends(get_db)):
-    db_razas = db.query(models.Raza).join(models.Especie).filter(models.Especie.nombre_comun.ilike(f"%{nombre_especie}%")).all()
+async def obtener_razas_por_especie(nombre_especie: str, request: Request):
+    db_razas = (await catalogo_vigente()).razas_por_especie(nombre_especie)
     if not db_razas:
         raise HTTPException(status_code=404, detail="No se encontraron razas para esa especie")
-    return db_razas
+    return respuesta_cacheada(request, db_razas)
 
 """ RUTAS PARA ESPECIE """
 # Ruta POST para añadir una especie
@@ -934,29 +1142,25 @@ def crear_especie(especie: EspecieCreate, db: Session = Depends(get_db)):
     db_especie = models.Especie(**especie.dict())
     db.add(db_especie)
     db.commit()
+    invalidar_catalogos()
     db.refresh(db_especie)
     return db_especie
 
 # Ruta GET para obtener una especie por su nombre común o científico
 @app.get("/especies/nombre/{nombre}", response_model=List[EspecieResponse])
-def obtener_especies_por_nombre(nombre: str, db: Session = Depends(get_db)):
-    db_especies = db.query(models.Especie).filter(
-        or_(
-            models.Especie.nombre_cientifico.ilike(f"%{nombre}%"),
-            models.Especie.nombre_comun.ilike(f"%{nombre}%")
-        )
-    ).all()
+async def obtener_especies_por_nombre(nombre: str, request: Request):
+    db_especies = (await catalogo_vigente()).especies_por_nombre(nombre)
     if not db_especies:
         raise HTTPException(status_code=404, detail="No se encontraron especies con ese nombre")
-    return db_especies
+    return respuesta_cacheada(request, db_especies)
 
 # Ruta GET para obtener todas las especies
 @app.get("/especies/", response_model=List[EspecieResponse])
-def obtener_todas_las_especies(db: Session = Depends(get_db)):
-    db_especies = db.query(models.Especie).all()
+async def obtener_todas_las_especies(request: Request):
+    db_especies = (await catalogo_vigente()).todos("especies")
     if not db_especies:
         raise HTTPException(status_code=404, detail="No se encontraron especies")
-    return db_especies
+    return respuesta_cacheada(request, db_especies)
 
 # HU 7: Como veterinaria quiero buscar pacientes, tutores y fichas con su información 
 # clave para recuperar información importante de forma flexible y rápida
@@ -967,17 +1171,31 @@ def crear_consulta(consulta: ConsultaCreate, db: Session = Depends(get_db), curr
     db_consulta = models.Consulta(**consulta.dict())
     db.add(db_consulta)
     db.commit()
+    invalidar_totales("consultas")
+    invalidar_respuestas("consultas", "vacunas")
     db.refresh(db_consulta)
     return db_consulta
 
+# Ruta POST para guardar una atención completa en un solo llamado: la consulta, sus recetas y
+# los tratamientos aplicados, en una transacción (ver services/consultas.py)
+@app.post("/consultas/completa", response_model=ConsultaResponse)
+def crear_consulta_completa_endpoint(consulta: ConsultaCompletaCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+    respuesta = crear_consulta_completa(db, consulta)
+    invalidar_totales("consultas")
+    invalidar_respuestas("consultas", "vacunas")
+    return respuesta_rapida(respuesta)
+
 # Ruta PUT para actualizar una consulta existente
 @app.put("/consultas/{id_consulta}", response_model=ConsultaResponse)
 def actualizar_consulta(
     id_consulta: int, 
     consulta: ConsultaCreate, 
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db), 
     current_user: dict = Depends(get_current_session_user)
 ):
+    verificar_if_match(db, "consulta", id_consulta, if_match)
     # Buscar la consulta existente
     db_consulta = db.query(models.Consulta).filter(
         models.Consulta.id_consulta == id_consulta
@@ -991,6 +1209,8 @@ def actualizar_consulta(
         setattr(db_consulta, key, value)
     
     db.commit()
+    invalidar_totales("consultas")
+    invalidar_respuestas("consultas", "vacunas")
     db.refresh(db_consulta)
     
     # Cargar relaciones para la respuesta
@@ -998,12 +1218,23 @@ def actualizar_consulta(
         .options(selectinload(models.Consulta.recetas))\
         .options(selectinload(models.Consulta.tratamientos).selectinload(models.ConsultaTratamiento.tratamiento))\
         .filter(models.Consulta.id_consulta == id_consulta).first()
+    response.headers.update(cabeceras_etag(etag_fila(db, "consulta", id_consulta)[0]))
     
     return ConsultaResponse.from_orm_with_tratamientos(db_consulta)
 
 # Ruta GET para obtener una consulta por su ID
 @app.get("/consultas/{id_consulta}", response_model=ConsultaResponse)
-def obtener_consulta_por_id(id_consulta: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+async def obtener_consulta_por_id(id_consulta: int, response: Response, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(get_current_session_user)):
+    # Solo la versión de la fila; si el cliente ya la tiene se responde 304 sin cargar la consulta
+    etag, _ = await db.run_sync(etag_fila, "consulta", id_consulta)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Consulta no encontrada")
+    if no_modificado(etag, if_none_match):
+        return Response(status_code=304, headers=cabeceras_etag(etag))
+    response.headers.update(cabeceras_etag(etag))
+    return await db.run_sync(buscar_consulta, id_consulta)
+
+def buscar_consulta(db: Session, id_consulta: int) -> ConsultaResponse:
     db_consulta = db.query(models.Consulta)\
         .options(selectinload(models.Consulta.recetas))\
         .options(selectinload(models.Consulta.tratamientos).selectinload(models.ConsultaTratamiento.tratamiento))\
@@ -1014,14 +1245,14 @@ def obtener_consulta_por_id(id_consulta: int, db: Session = Depends(get_db), cur
 
 # Ruta GET para obtener todas las consultas
 @app.get("/consultas/", response_model=List[ConsultaResponse])
-def obtener_todas_las_consultas(db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def obtener_todas_las_consultas(db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     db_consultas = db.query(models.Consulta)\
         .options(selectinload(models.Consulta.recetas))\
         .options(selectinload(models.Consulta.tratamientos).selectinload(models.ConsultaTratamiento.tratamiento))\
         .order_by(desc(models.Consulta.fecha_consulta)).all()
     if not db_consultas:
         raise HTTPException(status_code=404, detail="No se encontraron consultas")
-    return [ConsultaResponse.from_orm_with_tratamientos(c) for c in db_consultas]
+    return respuesta_rapida([ConsultaResponse.from_orm_with_tratamientos(c) for c in db_consultas])
 
 # Ruta GET para obtener consultas por ID de paciente
 @app.get("/consultas/paciente/id/{id_paciente}", response_model=List[ConsultaResponse])
@@ -1041,11 +1272,11 @@ def obtener_consultas_por_id_paciente(id_paciente: int, db: Session = Depends(ge
     if not db_consultas:
         raise HTTPException(status_code=404, detail="No se encontraron consultas para ese paciente")
     
-    return [ConsultaResponse.from_orm_with_tratamientos(c) for c in db_consultas]
+    return respuesta_rapida([ConsultaResponse.from_orm_with_tratamientos(c) for c in db_consultas])
 
 # Ruta GET para obtener consultas por nombre de paciente
 @app.get("/consultas/paciente/{nombre_paciente}", response_model=List[ConsultaResponse])
-def obtener_consultas_por_nombre_paciente(nombre_paciente: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def obtener_consultas_por_nombre_paciente(nombre_paciente: str, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     # Normalizar búsqueda para mayor flexibilidad
     db_consultas = db.query(models.Consulta)\
         .options(selectinload(models.Consulta.recetas))\
@@ -1055,17 +1286,26 @@ def obtener_consultas_por_nombre_paciente(nombre_paciente: str, db: Session = De
     ).order_by(desc(models.Consulta.fecha_consulta)).all()
     if not db_consultas:
         raise HTTPException(status_code=404, detail="No se encontraron consultas para ese paciente")
-    return [ConsultaResponse.from_orm_with_tratamientos(c) for c in db_consultas]
+    return respuesta_rapida([ConsultaResponse.from_orm_with_tratamientos(c) for c in db_consultas])
 
 @app.get("/consultas/paginated/")
-def obtener_consultas_paginadas(
+async def obtener_consultas_paginadas(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = Query(None),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (next_cursor de la página anterior); reemplaza a page"),
+    approximate_total: bool = Query(False, description="Sin búsqueda, usar la estimación del planificador como total"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_session_user)
 ):
+    return await responder(
+        request, current_user, TAGS_CONSULTAS,
+        lambda: db.run_sync(listar_consultas_paginadas, page, limit, search, sort_order, cursor, approximate_total)
+    )
+
+def listar_consultas_paginadas(db: Session, page: int, limit: int, search: Optional[str], sort_order: str, cursor: Optional[str], approximate_total: bool):
     offset = (page - 1) * limit
     
     # Query con joins para obtener información relacionada
@@ -1099,52 +1339,49 @@ def obtener_consultas_paginadas(
     )
     
     if search:
-        # Normalizar texto de búsqueda
-        search_normalized = normalize_search_text(search)
-        search_pattern_normalized = f"%{search_normalized}%"
-        
-        query = query.filter(
-            or_(
-                # Búsqueda en datos de la consulta
-                models.Consulta.diagnostico.ilike(f"%{search}%"),
-                models.Consulta.motivo.ilike(f"%{search}%"),
-                models.Consulta.observaciones.ilike(f"%{search}%"),
-                # Búsqueda en datos del paciente
-                models.Paciente.nombre.ilike(f"%{search}%"),
-                models.Paciente.codigo_chip.ilike(f"%{search}%"),
-                # Búsqueda en raza y especie
-                models.Raza.nombre.ilike(f"%{search}%"),
-                models.Especie.nombre_comun.ilike(f"%{search}%"),
-                # Búsqueda en datos del tutor (individual y completo)
-                models.Tutor.nombre.ilike(f"%{search}%"),
-                models.Tutor.apellido_paterno.ilike(f"%{search}%"),
-                func.concat(
-                    models.Tutor.nombre, ' ',
-                    models.Tutor.apellido_paterno, ' ',
-                    models.Tutor.apellido_materno
-                ).ilike(f"%{search}%"),
-                # Búsqueda en RUT sin formato
-                func.replace(
-                    func.replace(models.Tutor.rut, '.', ''), '-', ''
-                ).ilike(search_pattern_normalized)
-            )
-        )
-    
-    # Contar total sin aplicar offset/limit
-    total_count = query.count()
+        # Búsqueda en consulta, paciente, raza, especie y tutor (ver services/busqueda.py)
+        query = query.filter(filtro_busqueda_consultas(search))
     
     # Aplicar ordenamiento según el parámetro sort_order
+    # id_consulta desempata fechas iguales para que el orden sea estable entre páginas
     if sort_order == "asc":
-        query = query.order_by(models.Consulta.fecha_consulta.asc())
+        query = query.order_by(models.Consulta.fecha_consulta.asc().nulls_last(), models.Consulta.id_consulta.asc())
     else:  # desc por defecto
-        query = query.order_by(desc(models.Consulta.fecha_consulta))
+        query = query.order_by(desc(models.Consulta.fecha_consulta).nulls_last(), desc(models.Consulta.id_consulta))
     
-    # Aplicar paginación y obtener resultados
-    results = query.offset(offset).limit(limit).all()
+    filtro_cursor = None
+    if cursor:
+        # Modo cursor: buscar desde (fecha_consulta, id_consulta) de la última fila entregada
+        ultima_fecha, ultimo_id = decode_cursor(cursor, (str | None, int))
+        if ultima_fecha is None:
+            # Ya estamos en el tramo final de consultas sin fecha
+            filtro_cursor = and_(
+                models.Consulta.fecha_consulta.is_(None),
+                models.Consulta.id_consulta > ultimo_id if sort_order == "asc" else models.Consulta.id_consulta < ultimo_id
+            )
+        else:
+            try:
+                fecha_cursor = date.fromisoformat(ultima_fecha)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+            clave = tuple_(models.Consulta.fecha_consulta, models.Consulta.id_consulta)
+            clave_cursor = tuple_(fecha_cursor, ultimo_id)
+            filtro_cursor = or_(
+                clave > clave_cursor if sort_order == "asc" else clave < clave_cursor,
+                models.Consulta.fecha_consulta.is_(None)
+            )
     
-    total_pages = (total_count + limit - 1) // limit
-    has_next = page < total_pages
-    has_previous = page > 1
+    # Aplicar paginación y obtener resultados junto con el total en una sola consulta
+    results, total_count, has_next, total_aproximado = obtener_pagina_con_total(
+        db, query, clave_total("consultas", search), limit, offset,
+        filtro_cursor=filtro_cursor, aproximar=approximate_total and not search
+    )
+    has_previous = bool(cursor) or page > 1
+    
+    next_cursor = None
+    if has_next and results:
+        ultima = results[-1][0]
+        next_cursor = encode_cursor(ultima.fecha_consulta, ultima.id_consulta)
     
     # Construir respuesta personalizada con información completa
     consultas_serializadas = []
@@ -1239,16 +1476,7 @@ def obtener_consultas_paginadas(
 
     return {
         "consultas": consultas_serializadas,  # ← Cambio de "pacientes" a "consultas"
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "limit": limit,
-            "has_next": has_next,
-            "has_previous": has_previous,
-            "next_page": page + 1 if has_next else None,
-            "previous_page": page - 1 if has_previous else None
-        }
+        "pagination": construir_paginacion(page, limit, total_count, has_next, has_previous, next_cursor, modo_cursor=bool(cursor), total_aproximado=total_aproximado)
     }
 
 # HU 8: Como Veterinaria quiero ver el detalle de los pacientes, 
@@ -1260,24 +1488,25 @@ def crear_tratamiento(tratamiento: TratamientoCreate, db: Session = Depends(get_
     db_tratamiento = models.Tratamiento(**tratamiento.dict())
     db.add(db_tratamiento)
     db.commit()
+    invalidar_catalogos()
     db.refresh(db_tratamiento)
     return db_tratamiento
 
 # Ruta GET para obtener todos los tratamientos
 @app.get("/tratamientos/", response_model=List[TratamientoResponse])
-def obtener_todos_los_tratamientos(db: Session = Depends(get_db)):
-    db_tratamientos = db.query(models.Tratamiento).all()
+async def obtener_todos_los_tratamientos(request: Request):
+    db_tratamientos = (await catalogo_vigente()).todos("tratamientos")
     if not db_tratamientos:
         raise HTTPException(status_code=404, detail="No se encontraron tratamientos")
-    return db_tratamientos
+    return respuesta_cacheada(request, db_tratamientos)
 
 # Ruta GET para obtener un tratamiento por su nombre
 @app.get("/tratamientos/nombre/{nombre}", response_model=TratamientoResponse)
-def obtener_tratamiento_por_nombre(nombre: str, db: Session = Depends(get_db)):
-    db_tratamiento = db.query(models.Tratamiento).filter(models.Tratamiento.nombre.ilike(f"%{nombre}%")).first()
+async def obtener_tratamiento_por_nombre(nombre: str, request: Request):
+    db_tratamiento = (await catalogo_vigente()).tratamiento_por_nombre(nombre)
     if not db_tratamiento:
         raise HTTPException(status_code=404, detail="Tratamiento no encontrado")
-    return db_tratamiento
+    return respuesta_cacheada(request, db_tratamiento)
 
 # Ruta POST para consulta_tratamiento
 @app.post("/consultas_tratamientos/", response_model=consultaTratamientoResponse)
@@ -1285,12 +1514,13 @@ def crear_consulta_tratamiento(consulta_tratamiento: consultaTratamientoBase, db
     db_consulta_tratamiento = models.ConsultaTratamiento(**consulta_tratamiento.dict())
     db.add(db_consulta_tratamiento)
     db.commit()
+    invalidar_respuestas("consultas", "vacunas")
     db.refresh(db_consulta_tratamiento)
     return db_consulta_tratamiento
 
 # Ruta GET para obtener todos los registros de consulta_tratamiento
 @app.get("/consultas_tratamientos/", response_model=List[consultaTratamientoResponse])
-def obtener_todas_las_consultas_tratamiento(db: Session = Depends(get_db)):
+def obtener_todas_las_consultas_tratamiento(db: Session = Depends(get_read_db)):
     db_consultas_tratamiento = db.query(models.ConsultaTratamiento).order_by(desc(models.ConsultaTratamiento.fecha_tratamiento)).all()
     if not db_consultas_tratamiento:
         raise HTTPException(status_code=404, detail="No se encontraron tratamientos asociados a consultas")
@@ -1298,7 +1528,7 @@ def obtener_todas_las_consultas_tratamiento(db: Session = Depends(get_db)):
 
 # Ruta GET para obtener registros de consulta_tratamiento por nombre de paciente
 @app.get("/consultas_tratamientos/paciente/{nombre_paciente}", response_model=List[consultaTratamientoResponse])
-def obtener_consultas_tratamiento_por_nombre_paciente(nombre_paciente: str, db: Session = Depends(get_db)):
+def obtener_consultas_tratamiento_por_nombre_paciente(nombre_paciente: str, db: Session = Depends(get_read_db)):
     db_consultas_tratamiento = db.query(models.ConsultaTratamiento).join(models.Paciente).filter(models.Paciente.nombre.ilike(f"%{nombre_paciente}%")).order_by(desc(models.ConsultaTratamiento.fecha_tratamiento)).all()
     if not db_consultas_tratamiento:
         raise HTTPException(status_code=404, detail="No se encontraron tratamientos para ese paciente")
@@ -1306,54 +1536,34 @@ def obtener_consultas_tratamiento_por_nombre_paciente(nombre_paciente: str, db:
 
 # Ruta GET para obtener registros de consulta_tratamiento solo de vacunas con detalles
 @app.get("/consultas/tratamientos/vacunas/nombre/", response_model=List[consultaTratamientoConDetallesResponse])
-def obtener_vacunas_por_nombre(db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+async def obtener_vacunas_por_nombre(request: Request, db: AsyncSession = Depends(get_async_read_db), current_user: dict = Depends(get_current_session_user)):
+    return await responder(request, current_user, TAGS_VACUNAS, lambda: db.run_sync(listar_proximas_vacunas))
+
+def listar_proximas_vacunas(db: Session) -> List[consultaTratamientoConDetallesResponse]:
     # Filtrar próximas vacunas en los próximos 30 días (1 mes)
     fecha_actual = datetime.now().date()
     fecha_limite = fecha_actual + timedelta(days=30)
     
-    db_vacunas = db.query(
-        models.ConsultaTratamiento,
-        models.Tratamiento.nombre.label('nombre_tratamiento'),
-        models.Tratamiento.descripcion.label('descripcion_tratamiento'),
-        models.Paciente.nombre.label('nombre_paciente')
-    ).join(
-        models.Tratamiento, 
-        models.ConsultaTratamiento.id_tratamiento == models.Tratamiento.id_tratamiento
-    ).join(
-        models.Paciente,
-        models.ConsultaTratamiento.id_paciente == models.Paciente.id_paciente,
-        isouter=True
-    ).filter(
-        models.Tratamiento.nombre.ilike("%Vacuna%"),
-        models.ConsultaTratamiento.proxima_dosis.isnot(None),
-        models.ConsultaTratamiento.proxima_dosis >= fecha_actual,
-        models.ConsultaTratamiento.proxima_dosis <= fecha_limite
-    ).order_by(models.ConsultaTratamiento.proxima_dosis.asc()).limit(20).all()
+    # Proyección vacuna_programada (migración 004): ya trae los nombres y solo contiene vacunas,
+    # se lee con el índice de proxima_dosis
+    db_vacunas = db.query(models.VacunaProgramada).filter(
+        models.VacunaProgramada.proxima_dosis.isnot(None),
+        models.VacunaProgramada.proxima_dosis >= fecha_actual,
+        models.VacunaProgramada.proxima_dosis <= fecha_limite
+    ).order_by(models.VacunaProgramada.proxima_dosis.asc()).limit(20).all()
     
     if not db_vacunas:
         raise HTTPException(status_code=404, detail="No se encontraron vacunas administradas")
     
     # Construir la respuesta usando el nuevo esquema
-    return [
-        consultaTratamientoConDetallesResponse(
-            id_consulta=resultado[0].id_consulta,
-            id_tratamiento=resultado[0].id_tratamiento,
-            id_paciente=resultado[0].id_paciente,
-            dosis=resultado[0].dosis,
-            fecha_tratamiento=resultado[0].fecha_tratamiento,
-            id_aplicacion=resultado[0].id_aplicacion,
-            marca=resultado[0].marca,
-            proxima_dosis=resultado[0].proxima_dosis,
-            numero_serial=resultado[0].numero_serial,
-            nombre_tratamiento=resultado.nombre_tratamiento,
-            descripcion_tratamiento=resultado.descripcion_tratamiento,
-            nombre_paciente=resultado.nombre_paciente
-        ) for resultado in db_vacunas
-    ]
+    return [construir_desde_orm(consultaTratamientoConDetallesResponse, vacuna) for vacuna in db_vacunas]
 
 # Ruta GET para obtener próximas vacunas por ID de paciente
 @app.get("/consultas/tratamientos/vacunas/paciente/{id_paciente}/proximas/", response_model=List[consultaTratamientoConDetallesResponse])
-def obtener_proximas_vacunas_por_paciente(id_paciente: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+async def obtener_proximas_vacunas_por_paciente(id_paciente: int, db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(get_current_session_user)):
+    return await db.run_sync(listar_proximas_vacunas_paciente, id_paciente)
+
+def listar_proximas_vacunas_paciente(db: Session, id_paciente: int) -> List[consultaTratamientoConDetallesResponse]:
     # Verificar que el paciente existe
     db_paciente = db.query(models.Paciente).filter(models.Paciente.id_paciente == id_paciente).first()
     if not db_paciente:
@@ -1362,100 +1572,49 @@ def obtener_proximas_vacunas_por_paciente(id_paciente: int, db: Session = Depend
     # Obtener fecha actual para filtrar vacunas futuras
     fecha_actual = datetime.now().date()
     
-    # Query para obtener vacunas próximas del paciente específico
-    db_vacunas = db.query(
-        models.ConsultaTratamiento,
-        models.Tratamiento.nombre.label('nombre_tratamiento'),
-        models.Tratamiento.descripcion.label('descripcion_tratamiento'),
-        models.Paciente.nombre.label('nombre_paciente')
-    ).join(
-        models.Tratamiento, 
-        models.ConsultaTratamiento.id_tratamiento == models.Tratamiento.id_tratamiento
-    ).join(
-        models.Paciente,
-        models.ConsultaTratamiento.id_paciente == models.Paciente.id_paciente
-    ).filter(
-        models.Tratamiento.nombre.ilike("%Vacuna%"),  # Solo tratamientos que contengan "Vacuna"
-        models.ConsultaTratamiento.id_paciente == id_paciente,  # Solo del paciente específico
-        models.ConsultaTratamiento.fecha_tratamiento >= fecha_actual  # Solo fechas futuras o hoy
-    ).order_by(models.ConsultaTratamiento.fecha_tratamiento.asc()).all()  # Ordenar por fecha más próxima
+    # Vacunas del paciente desde la proyección vacuna_programada (índice id_paciente, fecha_tratamiento)
+    db_vacunas = db.query(models.VacunaProgramada).filter(
+        models.VacunaProgramada.id_paciente == id_paciente,  # Solo del paciente específico
+        models.VacunaProgramada.fecha_tratamiento >= fecha_actual  # Solo fechas futuras o hoy
+    ).order_by(models.VacunaProgramada.fecha_tratamiento.asc()).all()  # Ordenar por fecha más próxima
     
     if not db_vacunas:
         raise HTTPException(status_code=404, detail="No se encontraron próximas vacunas para este paciente")
     
     # Construir la respuesta usando el esquema
-    return [
-        consultaTratamientoConDetallesResponse(
-            id_consulta=resultado[0].id_consulta,
-            id_tratamiento=resultado[0].id_tratamiento,
-            id_paciente=resultado[0].id_paciente,
-            dosis=resultado[0].dosis,
-            fecha_tratamiento=resultado[0].fecha_tratamiento,
-            id_aplicacion=resultado[0].id_aplicacion,
-            marca=resultado[0].marca,
-            proxima_dosis=resultado[0].proxima_dosis,
-            numero_serial=resultado[0].numero_serial,
-            nombre_tratamiento=resultado.nombre_tratamiento,
-            descripcion_tratamiento=resultado.descripcion_tratamiento,
-            nombre_paciente=resultado.nombre_paciente
-        ) for resultado in db_vacunas
-    ]
+    return [construir_desde_orm(consultaTratamientoConDetallesResponse, vacuna) for vacuna in db_vacunas]
 
 """ RUTA PARA ENVIAR EMAILS A TUTORES """
-conf = ConnectionConfig (
-    MAIL_USERNAME = os.getenv("USER"),
-    MAIL_PASSWORD = os.getenv("PASSWORD"),
-    MAIL_FROM = os.getenv("USER_EMAIL"),
-    MAIL_PORT = int(os.getenv("PORT")),
-    MAIL_SERVER = os.getenv("SERVER"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME"),
-    MAIL_STARTTLS = True,
-    MAIL_SSL_TLS = False,
-    USE_CREDENTIALS = True,
-    VALIDATE_CERTS = True
-)
-# Scheduler (APScheduler) - usar AsyncIOScheduler para integrarlo con FastAPI/uvicorn
-if APSCHEDULER_AVAILABLE:
-    scheduler = AsyncIOScheduler(timezone="UTC")
-
-
-    @app.on_event("startup")
-    async def start_scheduler():
-        # arrancar el scheduler en el arranque de la app
-        scheduler.start()
-
-
-    @app.on_event("shutdown")
-    async def shutdown_scheduler():
-        # apagar el scheduler en el cierre de la app
-        scheduler.shutdown(wait=False)
-else:
-    scheduler = None
-    # Fallback simple: programar tareas usando asyncio.create_task + sleep
-    async def _delayed_send(run_date: datetime, email: 'EmailSchema') -> None:
-        try:
-            now = datetime.utcnow()
-            # if run_date is timezone-aware, convert to UTC naive for comparison
-            if run_date.tzinfo is not None:
-                run_date_utc = run_date.astimezone(tz=None).replace(tzinfo=None)
-            else:
-                run_date_utc = run_date
-            delay = (run_date_utc - now).total_seconds()
-            if delay > 0:
-                await asyncio.sleep(delay)
-            await envia(email)
-        except Exception as e:
-            # Log exception but don't crash
-            import logging
-            logging.exception("Error en delayed send: %s", e)
-
-    def schedule_via_asyncio(run_date: datetime, email: 'EmailSchema') -> None:
-        # crea una tarea en background que esperará y luego enviará
-        asyncio.create_task(_delayed_send(run_date, email))
+@lru_cache(maxsize=1)
+def config_correo():
+    """Configuración de FastMail, creada (e importado fastapi_mail) en el primer envío."""
+    from fastapi_mail import ConnectionConfig
+    return ConnectionConfig (
+        MAIL_USERNAME = os.getenv("USER"),
+        MAIL_PASSWORD = os.getenv("PASSWORD"),
+        MAIL_FROM = os.getenv("USER_EMAIL"),
+        MAIL_PORT = int(os.getenv("PORT")),
+        MAIL_SERVER = os.getenv("SERVER"),
+        MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME"),
+        MAIL_STARTTLS = True,
+        MAIL_SSL_TLS = False,
+        USE_CREDENTIALS = True,
+        VALIDATE_CERTS = True
+    )
+# Cola persistente de correos programados: un solo worker (el líder) despacha los vencidos
+@app.on_event("startup")
+async def iniciar_despachador_correos():
+    despachador.iniciar(envia)
+
+
+@app.on_event("shutdown")
+async def detener_despachador_correos():
+    await despachador.detener()
 
 
 async def envia(email: EmailSchema) -> None:
     """Envía el email usando FastMail (async)."""
+    from fastapi_mail import FastMail, MessageSchema, MessageType
     html = f"<p>{email.cuerpo}</p>"
     message = MessageSchema(
         subject=getattr(email, "asunto", "Notificación"),
@@ -1463,8 +1622,9 @@ async def envia(email: EmailSchema) -> None:
         body=html,
         subtype=MessageType.html,
     )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    fm = FastMail(config_correo())
+    with medir_llamada("smtp", "send_message"):
+        await fm.send_message(message)
 
 # HU 13: Como veterinaria quiero dejar alertas programadas que se envien al whatsApp de los dueños para hacerles recuerdos sobre citas
 app.include_router(whatsapp_router)
@@ -1472,25 +1632,22 @@ app.include_router(whatsapp_router)
 # HU 14: Cómo dueño quiero recibir alertas programadas por correo para recordar cada consulta.
 @app.post("/email/{fecha_envio}")
 async def programar_envio(email: EmailSchema, fecha_envio: datetime, current_user: dict = Depends(get_current_session_user)):
-    """Programa el envío de un correo en la fecha indicada.
+    """Programa el envío de un correo en la fecha indicada (sin zona horaria = UTC).
 
-    Si APScheduler está disponible, se usa `scheduler.add_job`. Si no, se usa
-    un fallback que crea una tarea asyncio que duerme hasta la fecha y luego
-    llama a `envia`.
+    El correo queda en govet.correo_programado y lo envía el despachador del worker líder
+    (ver services/correos_programados.py), así no se pierde al reiniciar ni se duplica con
+    varios workers.
     """
-    if APSCHEDULER_AVAILABLE and scheduler is not None:
-        scheduler.add_job(envia, 'date', run_date=fecha_envio, args=[email])
-    else:
-        # usar fallback sin dependencia externa
-        schedule_via_asyncio(fecha_envio, email)
+    id_correo = await encolar_correo(email, fecha_envio)
 
-    return JSONResponse(status_code=200, content={"message": "La notificación fue programada correctamente"})
+    return JSONResponse(status_code=200, content={"message": "La notificación fue programada correctamente", "id": id_correo})
 
 
 # HU 16: Cómo veterinaria quiero generar resumenes de citas que pueda enviar a los dueños
 @app.get("/consultas/{id_consulta}/pdf")
-def descargar_pdf_consulta(id_consulta: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def descargar_pdf_consulta(id_consulta: int, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     # Cuerpo del endpoint, se encuentra en Backend/services/pdf_service.py y devuelve los bytes del pdf
+    from services.pdf_service import generar_pdf_consulta
     pdf = generar_pdf_consulta(db, id_consulta)
     # Respuesta cruda de fastApi, permite mejor control
     return Response(
@@ -1503,7 +1660,7 @@ def descargar_pdf_consulta(id_consulta: int, db: Session = Depends(get_db), curr
 
 # Generar certificado de transporte
 @app.get("/pacientes/{id_paciente}/certificado-transporte")
-def descargar_certificado_transporte(id_paciente: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_session_user)):
+def descargar_certificado_transporte(id_paciente: int, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_session_user)):
     from services.pdf_service import generar_certificado_transporte
     pdf = generar_certificado_transporte(db, id_paciente)
     return Response(
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Crea las tablas de models.py que falten y aplica en orden las migraciones SQL numeradas de
+Dbase/migrations (NNN_descripcion.sql). La app ya no crea tablas al arrancar: este comando
+es el paso explícito de esquema en cada despliegue.
+
+Las migraciones aplicadas se registran en govet.schema_migrations, así que cada archivo
+corre una sola vez. Cada sentencia se ejecuta por separado en modo autocommit, porque
+CREATE INDEX CONCURRENTLY no puede correr dentro de una transacción.
+
+Un CREATE INDEX CONCURRENTLY que falla o se cancela deja el índice creado pero inválido
+(pg_index.indisvalid = false): PostgreSQL no lo usa y un reintento con IF NOT EXISTS lo da
+por existente. Antes de aplicar, los índices inválidos que crea alguna migración se eliminan
+y se vuelven a crear con su sentencia; si al terminar queda alguno inválido, el comando
+termina con error.
+
+Uso (desde Backend/):
+    python migrar.py            # crea las tablas que falten y aplica las migraciones pendientes
+    python migrar.py --listar   # muestra el estado de cada migración y los índices inválidos
+
+La carpeta se toma de MIGRATIONS_DIR (por defecto ../Dbase/migrations).
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import List
+
+from sqlalchemy import text
+
+import models
+from database import engine
+
+MIGRATIONS_DIR = os.getenv(
+    "MIGRATIONS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Dbase", "migrations"),
+)
+
+_ARCHIVO_REGEX = re.compile(r"^(\d{3})_[\w\-]+\.sql$")
+_DOLAR_REGEX = re.compile(r"\$[A-Za-z_]*\$")
+# Nombre del índice en CREATE [UNIQUE] INDEX [CONCURRENTLY] [IF NOT EXISTS] nombre
+_INDICE_REGEX = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s",
+    re.IGNORECASE,
+)
+
+
+def dividir_sentencias(sql: str) -> List[str]:
+    """
+    Separa un archivo SQL en sentencias por ';', respetando strings, identificadores
+    entre comillas, comentarios y cuerpos $$...$$ de funciones.
+    """
+    sentencias = []
+    inicio = 0
+    i = 0
+    n = len(sql)
+    while i < n:
+        c = sql[i]
+        if c == "-" and sql.startswith("--", i):
+            fin = sql.find("\n", i)
+            i = n if fin == -1 else fin + 1
+        elif c == "/" and sql.startswith("/*", i):
+            fin = sql.find("*/", i + 2)
+            i = n if fin == -1 else fin + 2
+        elif c in ("'", '"'):
+            fin = i + 1
+            while fin < n:
+                if sql[fin] == c:
+                    # Comilla duplicada = comilla escapada
+                    if fin + 1 < n and sql[fin + 1] == c:
+                        fin += 2
+                        continue
+                    break
+                fin += 1
+            i = fin + 1
+        elif c == "$" and _DOLAR_REGEX.match(sql, i):
+            etiqueta = _DOLAR_REGEX.match(sql, i).group(0)
+            fin = sql.find(etiqueta, i + len(etiqueta))
+            i = n if fin == -1 else fin + len(etiqueta)
+        elif c == ";":
+            sentencias.append(sql[inicio:i])
+            inicio = i + 1
+            i += 1
+        else:
+            i += 1
+    sentencias.append(sql[inicio:])
+    return [s.strip() for s in sentencias if _tiene_codigo(s)]
+
+
+def _tiene_codigo(sentencia: str) -> bool:
+    """True si la sentencia contiene algo más que comentarios y espacios."""
+    sin_comentarios = re.sub(r"--[^\n]*", "", sentencia)
+    sin_comentarios = re.sub(r"/\*.*?\*/", "", sin_comentarios, flags=re.S)
+    return bool(sin_comentarios.strip())
+
+
+def listar_archivos() -> List[str]:
+    if not os.path.isdir(MIGRATIONS_DIR):
+        raise SystemExit(f"❌ No existe la carpeta de migraciones: {MIGRATIONS_DIR}")
+    return sorted(f for f in os.listdir(MIGRATIONS_DIR) if _ARCHIVO_REGEX.match(f))
+
+
+def migraciones_aplicadas(conn) -> set:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS govet.schema_migrations ("
+        " version varchar PRIMARY KEY,"
+        " archivo varchar NOT NULL,"
+        " aplicada_en timestamptz NOT NULL DEFAULT now())"
+    ))
+    return {fila[0] for fila in conn.execute(text("SELECT version FROM govet.schema_migrations"))}
+
+
+def indices_invalidos(conn) -> List[str]:
+    """Índices del esquema govet que quedaron inválidos (un CREATE INDEX CONCURRENTLY interrumpido)."""
+    return [fila[0] for fila in conn.execute(text(
+        "SELECT c.relname FROM pg_index i"
+        " JOIN pg_class c ON c.oid = i.indexrelid"
+        " JOIN pg_namespace n ON n.oid = c.relnamespace"
+        " WHERE n.nspname = 'govet' AND NOT i.indisvalid"
+        " ORDER BY c.relname"
+    ))]
+
+
+def _sentencias_de(archivo: str) -> List[str]:
+    with open(os.path.join(MIGRATIONS_DIR, archivo), encoding="utf-8") as f:
+        return dividir_sentencias(f.read())
+
+
+def _indices_de_migraciones(archivos: List[str]) -> dict:
+    """{nombre del índice: (archivo, sentencia CREATE INDEX)} de todas las migraciones."""
+    indices = {}
+    for archivo in archivos:
+        for sentencia in _sentencias_de(archivo):
+            # Los comentarios previos quedan dentro de la sentencia
+            codigo = re.sub(r"^(\s*--[^\n]*\n)+", "", sentencia).strip()
+            coincide = _INDICE_REGEX.match(codigo)
+            if coincide:
+                indices[coincide.group(1).lower()] = (archivo, sentencia)
+    return indices
+
+
+def reparar_indices(conn, archivos: List[str], pendientes: List[str]) -> None:
+    """
+    Elimina los índices inválidos que crea alguna migración. Si la migración ya está aplicada
+    se vuelve a ejecutar su CREATE INDEX; si está pendiente, lo crea aplicar().
+    Los inválidos que no son de ninguna migración no se tocan (se informan al final).
+    """
+    invalidos = indices_invalidos(conn)
+    if not invalidos:
+        return
+    indices = _indices_de_migraciones(archivos)
+    for nombre in invalidos:
+        if nombre not in indices:
+            continue
+        archivo, sentencia = indices[nombre]
+        print(f"⚠️  Índice inválido {nombre} ({archivo}): se elimina y se vuelve a crear")
+        conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS govet."{nombre}"')
+        if archivo not in pendientes:
+            conn.execution_options(no_parameters=True).exec_driver_sql(sentencia)
+
+
+def crear_tablas(conn) -> None:
+    """
+    create_all de los modelos (solo crea las que no existen). Las proyecciones mantenidas por
+    triggers se excluyen: las crean sus migraciones.
+    """
+    tablas = [t for t in models.Base.metadata.sorted_tables if not t.info.get("proyeccion")]
+    models.Base.metadata.create_all(bind=conn, tables=tablas)
+    print(f"✅ Tablas base verificadas ({len(tablas)})")
+
+
+def aplicar(conn, archivo: str) -> None:
+    version = _ARCHIVO_REGEX.match(archivo).group(1)
+    sentencias = _sentencias_de(archivo)
+
+    print(f"▶️  {archivo} ({len(sentencias)} sentencias)")
+    for sentencia in sentencias:
+        # no_parameters: el SQL se envía tal cual (los '%' de los LIKE no son placeholders)
+        conn.execution_options(no_parameters=True).exec_driver_sql(sentencia)
+
+    conn.execute(
+        text("INSERT INTO govet.schema_migrations (version, archivo) VALUES (:version, :archivo)"),
+        {"version": version, "archivo": archivo},
+    )
+    print(f"✅ {archivo} aplicada")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea las tablas que falten y aplica las migraciones pendientes de Dbase/migrations")
+    parser.add_argument("--listar", action="store_true", help="Solo muestra qué migraciones faltan")
+    args = parser.parse_args()
+
+    archivos = listar_archivos()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not args.listar:
+            crear_tablas(conn)
+        aplicadas = migraciones_aplicadas(conn)
+        pendientes = [a for a in archivos if _ARCHIVO_REGEX.match(a).group(1) not in aplicadas]
+
+        if args.listar:
+            for archivo in archivos:
+                estado = "pendiente" if archivo in pendientes else "aplicada"
+                print(f"{archivo:<50}{estado}")
+            invalidos = indices_invalidos(conn)
+            if invalidos:
+                print(f"\n❌ Índices inválidos (no se usan en las consultas): {', '.join(invalidos)}")
+                print("   `python migrar.py` los vuelve a crear si pertenecen a una migración.")
+                sys.exit(1)
+            return
+
+        try:
+            reparar_indices(conn, archivos, pendientes)
+        except Exception as e:
+            print(f"❌ Error al recrear índices inválidos: {e}")
+            sys.exit(1)
+
+        if not pendientes:
+            print("✅ No hay migraciones pendientes")
+
+        for archivo in pendientes:
+            try:
+                aplicar(conn, archivo)
+            except Exception as e:
+                # Las sentencias ya ejecutadas quedan aplicadas; las migraciones usan IF NOT EXISTS
+                # para poder reintentarse después de corregir el error, y los índices que un
+                # CREATE INDEX CONCURRENTLY fallido dejó inválidos se recrean en el reintento.
+                print(f"❌ Error en {archivo}: {e}")
+                sys.exit(1)
+
+        invalidos = indices_invalidos(conn)
+        if invalidos:
+            print(f"❌ Quedan índices inválidos: {', '.join(invalidos)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
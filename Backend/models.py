@@ -1,5 +1,6 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Date, CHAR, BigInteger, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Date, CHAR, BigInteger, Float, Computed, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 
 class Tutor(Base):
@@ -21,6 +22,21 @@ class Tutor(Base):
     telefono2 = Column(BigInteger, nullable=True)
     activo = Column(Boolean, default=True)
 
+    # Columnas generadas para búsqueda (Dbase/migrations/001_busqueda_trigram.sql)
+    # Son diferidas: no se cargan al leer un Tutor, solo se usan en filtros
+    nombre_completo = deferred(Column(String, Computed(
+        "coalesce(nombre, '') || ' ' || coalesce(apellido_paterno, '') || ' ' || coalesce(apellido_materno, '')",
+        persisted=True
+    )))
+    rut_normalizado = deferred(Column(String, Computed(
+        "lower(replace(replace(rut, '.', ''), '-', ''))",
+        persisted=True
+    )))
+    # Últimos 9 dígitos del número (formato nacional), para búsqueda exacta
+    # (Dbase/migrations/002_busqueda_exacta_rut_telefono.sql)
+    celular_normalizado = deferred(Column(String, Computed("right(celular::text, 9)", persisted=True)))
+    telefono_normalizado = deferred(Column(String, Computed("right(telefono::text, 9)", persisted=True)))
+
     # Relaciones
     consultas = relationship("Consulta", back_populates="tutor")
     pacientes = relationship("TutorPaciente", back_populates="tutor")
@@ -158,4 +174,63 @@ class TutorPaciente(Base):
     
     # Relaciones
     paciente = relationship("Paciente", back_populates="tutores")
-    tutor = relationship("Tutor", back_populates="pacientes")
\ No newline at end of file
+    tutor = relationship("Tutor", back_populates="pacientes")
+
+class VacunaProgramada(Base):
+    """
+    Proyección de consulta_tratamiento para vacunas (Dbase/migrations/004_vacunas_programadas.sql).
+    La mantienen triggers en la base: solo lectura desde el backend.
+    """
+    __tablename__ = "vacuna_programada"
+    # proyeccion: la crea la migración junto con sus triggers, no create_all
+    __table_args__ = {'schema': 'govet', 'info': {'proyeccion': True}}
+
+    id_aplicacion = Column(BigInteger, primary_key=True)
+    id_consulta = Column(Integer)
+    id_tratamiento = Column(Integer, nullable=False)
+    id_paciente = Column(Integer, nullable=False)
+    dosis = Column(String)
+    fecha_tratamiento = Column(Date)
+    marca = Column(String)
+    proxima_dosis = Column(Date)
+    numero_serial = Column(String)
+    nombre_tratamiento = Column(String, nullable=False)
+    descripcion_tratamiento = Column(String)
+    tipo_tratamiento = Column(String, nullable=False)
+    nombre_paciente = Column(String)
+
+class PacienteListado(Base):
+    """
+    Proyección del listado de pacientes (Dbase/migrations/005_paciente_listado.sql): paciente,
+    raza, especie, tutor principal y documento de búsqueda en una fila. La mantienen triggers
+    en la base: solo lectura desde el backend.
+    """
+    __tablename__ = "paciente_listado"
+    # proyeccion: la crea la migración junto con sus triggers, no create_all
+    __table_args__ = {'schema': 'govet', 'info': {'proyeccion': True}}
+
+    id_paciente = Column(BigInteger, primary_key=True)
+    nombre = Column(String, nullable=False)
+    fecha_nacimiento = Column(Date)
+    color = Column(String)
+    sexo = Column(CHAR(1))
+    esterilizado = Column(Boolean)
+    id_raza = Column(BigInteger)
+    codigo_chip = Column(String)
+    activo = Column(Boolean, nullable=False)
+    raza = Column(String)
+    especie = Column(String)
+    # Tutor principal: la asociación más reciente de tutor_paciente
+    tutor_rut = Column(String)
+    tutor_nombre = Column(String)
+    tutor_apellido_paterno = Column(String)
+    tutor_apellido_materno = Column(String)
+    tutor_telefono = Column(BigInteger)
+    tutor_celular = Column(BigInteger)
+    tutor_email = Column(String)
+    # Búsqueda sobre todos los tutores del paciente (solo se usan en filtros)
+    documento_busqueda = deferred(Column(Text, nullable=False))
+    ruts_busqueda = deferred(Column(Text, nullable=False))
+    ruts_tutores = deferred(Column(ARRAY(Text), nullable=False))
+    telefonos_tutores = deferred(Column(ARRAY(Text), nullable=False))
+
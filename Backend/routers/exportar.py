@@ -0,0 +1,145 @@
+# Módulo: Exportación de datos
+
+"""
+Router para exportar tablas completas sin cargarlas en memoria:
+- GET /export/tutores
+- GET /export/pacientes
+- GET /export/consultas
+- GET /export/consultas_tratamientos
+
+Formato NDJSON (una fila JSON por línea, por defecto) o CSV con ?formato=csv.
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se envían a medida que
+llegan, de a EXPORT_CHUNK_SIZE filas: la memoria no crece con el tamaño de la tabla y el
+cliente recibe los primeros bytes antes de que termine la lectura.
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import inspect, select
+
+import models
+from services.replica import sesion_lectura
+from session_auth import get_current_session_user
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+    dependencies=[Depends(get_current_session_user)],
+)
+
+
+def _columnas(modelo):
+    """Columnas del modelo con el nombre del atributo (sin las columnas generadas de búsqueda)."""
+    return [
+        attr.columns[0].label(attr.key)
+        for attr in inspect(modelo).column_attrs
+        if attr.columns[0].computed is None
+    ]
+
+
+def _select_tutores():
+    return select(*_columnas(models.Tutor)).where(models.Tutor.activo == True).order_by(models.Tutor.rut)
+
+
+def _select_pacientes():
+    return select(
+        *_columnas(models.Paciente),
+        models.Raza.nombre.label("raza"),
+        models.Especie.nombre_comun.label("especie"),
+    ).join(
+        models.Raza, models.Paciente.id_raza == models.Raza.id_raza, isouter=True
+    ).join(
+        models.Especie, models.Raza.id_especie == models.Especie.id_especie, isouter=True
+    ).where(models.Paciente.activo == True).order_by(models.Paciente.id_paciente)
+
+
+def _select_consultas():
+    return select(*_columnas(models.Consulta)).order_by(models.Consulta.id_consulta)
+
+
+def _select_consultas_tratamientos():
+    return select(
+        *_columnas(models.ConsultaTratamiento),
+        models.Tratamiento.nombre.label("nombre_tratamiento"),
+    ).join(
+        models.Tratamiento, models.ConsultaTratamiento.id_tratamiento == models.Tratamiento.id_tratamiento
+    ).order_by(models.ConsultaTratamiento.id_aplicacion)
+
+
+ENTIDADES = {
+    "tutores": _select_tutores,
+    "pacientes": _select_pacientes,
+    "consultas": _select_consultas,
+    "consultas_tratamientos": _select_consultas_tratamientos,
+}
+
+
+def _valor_json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return str(valor)
+
+
+def _filas_ndjson(filas) -> str:
+    return "".join(
+        json.dumps(dict(fila._mapping), default=_valor_json, ensure_ascii=False) + "\n"
+        for fila in filas
+    )
+
+
+def _filas_csv(filas) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        ["" if v is None else (v.isoformat() if isinstance(v, (date, datetime)) else v) for v in fila]
+        for fila in filas
+    )
+    return buffer.getvalue()
+
+
+def _generar(entidad: str, formato: str):
+    """
+    Generador síncrono (Starlette lo itera en el threadpool). Abre su propia sesión de
+    lectura: la de Depends se cerraría antes de terminar de enviar la respuesta.
+    """
+    db = sesion_lectura()
+    try:
+        stmt = ENTIDADES[entidad]().execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        resultado = db.execute(stmt)
+        if formato == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(resultado.keys())
+            yield buffer.getvalue()
+        serializar = _filas_csv if formato == "csv" else _filas_ndjson
+        for filas in resultado.partitions():
+            yield serializar(filas)
+    finally:
+        db.close()
+
+
+@router.get("/{entidad}")
+async def exportar(
+    entidad: str,
+    formato: str = Query("ndjson", regex="^(ndjson|csv)$", description="ndjson o csv"),
+):
+    """Exporta todas las filas de la entidad como descarga en streaming."""
+    if entidad not in ENTIDADES:
+        raise HTTPException(status_code=404, detail=f"Entidad no exportable. Opciones: {', '.join(ENTIDADES)}")
+    media_type = "text/csv; charset=utf-8" if formato == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _generar(entidad, formato),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{entidad}.{formato}"'},
+    )
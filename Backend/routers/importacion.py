@@ -0,0 +1,72 @@
+# Módulo: Importación masiva
+
+"""
+Router para importar planillas completas (xlsx o CSV) de una clínica:
+- POST /import/tutores
+- POST /import/pacientes
+- POST /import/paciente_tutor
+
+El archivo se sube como multipart (campo `archivo`). La importación la hace
+services/importacion.py (lectura por bloques, validación vectorizada, COPY a una tabla
+temporal y un INSERT ... ON CONFLICT por tabla) y la respuesta trae los conteos y el
+detalle de las filas rechazadas. Con ?simular=true se valida sin guardar.
+
+services/importacion.py (pandas y numpy) se importa en el primer request, no al arrancar la app.
+"""
+
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+
+from services.cache_respuestas import invalidar_respuestas
+from services.conteos import invalidar_totales
+from session_auth import get_current_session_user
+
+# Tamaño máximo del archivo subido
+IMPORT_MAX_MB = float(os.getenv("IMPORT_MAX_MB", "50"))
+
+# Listados y búsquedas que cambian con cada importación
+_INVALIDAR = {
+    "tutores": "tutores",
+    "pacientes": "pacientes",
+    "paciente_tutor": "pacientes",
+}
+
+router = APIRouter(
+    prefix="/import",
+    tags=["import"],
+    dependencies=[Depends(get_current_session_user)],
+)
+
+
+@router.post("/{entidad}")
+def importar_planilla(
+    entidad: str,
+    archivo: UploadFile = File(...),
+    actualizar: bool = Query(False, description="Actualiza los registros existentes en vez de omitirlos"),
+    simular: bool = Query(False, description="Valida e informa sin guardar cambios"),
+    hoja: Optional[str] = Query(None, description="Hoja del xlsx"),
+):
+    """
+    Síncrono a propósito: la lectura, pandas y el COPY bloquean, así corre en el threadpool.
+    """
+    from services.importacion import ENTIDADES, importar
+
+    if entidad not in ENTIDADES:
+        raise HTTPException(status_code=404, detail=f"Entidad desconocida (opciones: {', '.join(ENTIDADES)})")
+    if archivo.size is not None and archivo.size > IMPORT_MAX_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"El archivo supera {IMPORT_MAX_MB:g} MB")
+
+    try:
+        resultado = importar(
+            archivo.file, archivo.filename or "", entidad,
+            actualizar=actualizar, simular=simular, hoja=hoja,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not simular and (resultado.insertadas or resultado.actualizadas):
+        invalidar_totales(_INVALIDAR[entidad])
+        invalidar_respuestas(_INVALIDAR[entidad])
+    return resultado.como_dict()
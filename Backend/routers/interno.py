@@ -0,0 +1,88 @@
+# Módulo: Diagnóstico interno
+
+"""
+Router de diagnóstico para operar el backend (requiere sesión):
+- GET /internal/db-pool
+- GET /internal/db-replica
+- GET /internal/response-cache
+- GET /internal/slow-queries
+- GET /internal/email-queue
+
+Los valores son por proceso: con varios workers de uvicorn cada uno reporta su propio pool.
+"""
+
+import os
+
+from fastapi import APIRouter, Depends, Query
+
+from database import engine, async_engine, HAY_REPLICA, read_engine, async_read_engine
+from services.pool_db import estado_pool, usa_pgbouncer
+from services.replica import estado_replica
+from services.cache_respuestas import estado_cache
+from services.consultas_lentas import estado_consultas_lentas
+from services.correos_programados import estado_correos
+from session_auth import get_current_session_user
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(get_current_session_user)],
+)
+
+
+@router.get("/db-pool")
+async def db_pool():
+    """
+    Uso de los pools de conexiones (síncrono psycopg2 y async asyncpg): conexiones en uso,
+    overflow, llamadores esperando una conexión y tiempo de espera del checkout.
+    Un `waiters` sostenido o `checkout_wait_avg_ms` creciente indica que el pool se queda corto.
+    """
+    pools = {
+        "sync": estado_pool(engine.pool),
+        "async": estado_pool(async_engine.sync_engine.pool),
+    }
+    if HAY_REPLICA:
+        pools["read_sync"] = estado_pool(read_engine.pool)
+        pools["read_async"] = estado_pool(async_read_engine.sync_engine.pool)
+    return {
+        "pid": os.getpid(),
+        "pgbouncer": usa_pgbouncer(),
+        "pools": pools,
+    }
+
+
+@router.get("/db-replica")
+async def db_replica():
+    """
+    Retraso de la réplica de lectura según la última medición y si se está usando
+    (`in_use` es false si supera DATABASE_READ_MAX_LAG o no responde).
+    """
+    return {"pid": os.getpid(), "replica": estado_replica()}
+
+
+@router.get("/response-cache")
+async def response_cache():
+    """
+    Aciertos y fallos de la caché de respuestas (services/cache_respuestas.py). Con el backend
+    local los contadores y las entradas son de este worker; con Redis las entradas son compartidas.
+    """
+    return {"pid": os.getpid(), "cache": estado_cache()}
+
+
+@router.get("/slow-queries")
+async def slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """
+    Últimas consultas que superaron SLOW_QUERY_MS en este worker, con sus parámetros y, para
+    las muestreadas (SLOW_QUERY_EXPLAIN_SAMPLE), el plan de EXPLAIN (ANALYZE, BUFFERS).
+    """
+    return {"pid": os.getpid(), "slow_queries": estado_consultas_lentas(limit)}
+
+
+@router.get("/email-queue")
+async def email_queue():
+    """
+    Correos programados por estado (govet.correo_programado), vencidos sin despachar y si este
+    worker es el líder que los despacha. `oldest_due_s` creciente: el despachador no da abasto
+    o no hay líder (ver `last_error`).
+    """
+    return {"pid": os.getpid(), "email_queue": await estado_correos()}
@@ -0,0 +1,28 @@
+# Módulo: Métricas
+
+"""
+Router de métricas para Prometheus:
+- GET /metrics
+
+No usa la sesión de la aplicación (Prometheus no inicia sesión); si METRICS_TOKEN está
+definido se exige `Authorization: Bearer <token>` (bearer_token en el scrape_config).
+Con PROMETHEUS_MULTIPROC_DIR la respuesta suma los valores de todos los workers.
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+
+from services.metricas import CONTENT_TYPE_LATEST, METRICS_TOKEN, exportar_metricas
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)):
+    # Síncrono: en modo multiproceso se leen los archivos de todos los workers
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Token de métricas inválido")
+    return Response(content=exportar_metricas(), media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +0,0 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-
-scheduler = BackgroundScheduler()
-scheduler.start()
\ No newline at end of file
@@ -2,6 +2,16 @@ from typing import Optional, List
 from pydantic import BaseModel, EmailStr
 from datetime import date
 
+def construir_desde_orm(esquema, obj, **valores):
+    """
+    Crea el esquema con model_construct (sin validar) copiando los campos del objeto ORM.
+    Solo para datos que vienen de la base: ya tienen los tipos de las columnas.
+    Los campos en `valores` reemplazan a los del objeto (relaciones ya convertidas, alias...).
+    """
+    datos = {campo: getattr(obj, campo, None) for campo in esquema.model_fields if campo not in valores}
+    datos.update(valores)
+    return esquema.model_construct(**datos)
+
 """ Esquema de datos para la entidad Tutor (dueño de una mascota) """
 
 class TutorBase(BaseModel):
@@ -265,49 +275,41 @@ class ConsultaResponse(ConsultaBase):
     
     @staticmethod
     def from_orm_with_tratamientos(db_consulta):
-        """Convierte una Consulta ORM a ConsultaResponse transformando tratamientos"""
+        """
+        Convierte una Consulta ORM a ConsultaResponse transformando tratamientos.
+        Los datos vienen de la base, así que se construye sin validar (model_construct):
+        la validación queda a cargo de response_model, o se omite con respuesta_rapida.
+        """
         # Convertir tratamientos de ConsultaTratamiento a TratamientoAplicadoResponse
-        tratamientos_aplicados = []
-        for ct in db_consulta.tratamientos:
-            tratamientos_aplicados.append(TratamientoAplicadoResponse(
-                fecha_tratamiento=ct.fecha_tratamiento,
-                dosis=ct.dosis,
-                marca=ct.marca,
-                numero_serial=ct.numero_serial,
-                proxima_dosis=ct.proxima_dosis,
+        tratamientos_aplicados = [
+            construir_desde_orm(
+                TratamientoAplicadoResponse, ct,
                 nombre_tratamiento=ct.tratamiento.nombre if ct.tratamiento else "Tratamiento",
                 tipo_tratamiento=ct.tratamiento.tipo_tratamiento if ct.tratamiento else None
-            ))
+            ) for ct in db_consulta.tratamientos
+        ]
         
         # Crear el response con los datos transformados
-        return ConsultaResponse(
-            id_consulta=db_consulta.id_consulta,
-            id_paciente=db_consulta.id_paciente,
-            rut=db_consulta.rut,
-            fecha_consulta=db_consulta.fecha_consulta,
-            motivo=db_consulta.motivo,
-            diagnostico=db_consulta.diagnostico,
-            observaciones=db_consulta.observaciones,
-            dht=db_consulta.dht,
-            nodulos_linfaticos=db_consulta.nodulos_linfaticos,
-            mucosas=db_consulta.mucosas,
-            peso=db_consulta.peso,
-            auscultacion_cardiaca_toraxica=db_consulta.auscultacion_cardiaca_toraxica,
-            estado_pelaje=db_consulta.estado_pelaje,
-            condicion_corporal=db_consulta.condicion_corporal,
-            tllc=db_consulta.tllc,
-            estado_piel=db_consulta.estado_piel,
-            frecuencia_respiratoria=db_consulta.frecuencia_respiratoria,
-            frecuencia_cardiaca=db_consulta.frecuencia_cardiaca,
-            examen_clinico=db_consulta.examen_clinico,
-            prediagnostico=db_consulta.prediagnostico,
-            pronostico=db_consulta.pronostico,
-            indicaciones_generales=db_consulta.indicaciones_generales,
-            temperatura=db_consulta.temperatura,
-            recetas=[RecetaResponse.from_orm(r) for r in db_consulta.recetas],
+        return construir_desde_orm(
+            ConsultaResponse, db_consulta,
+            recetas=[construir_desde_orm(RecetaResponse, r) for r in db_consulta.recetas],
             tratamientos=tratamientos_aplicados
         )
 
+""" Esquema para crear una consulta completa (POST /consultas/completa) """
+class TratamientoAplicadoCreate(BaseModel):
+    id_tratamiento: int
+    dosis: Optional[str] = None
+    fecha_tratamiento: Optional[date] = None  # por defecto, la fecha de la consulta
+    marca: Optional[str] = None
+    proxima_dosis: Optional[date] = None
+    numero_serial: Optional[str] = None
+
+class ConsultaCompletaCreate(ConsultaBase):
+    # El id de la consulta (y el paciente de los tratamientos) se asignan al guardar
+    recetas: List[RecetaBase] = []
+    tratamientos: List[TratamientoAplicadoCreate] = []
+
 """ Esquema de datos para el envío de correos electrónicos """
 class EmailSchema(BaseModel):
     email: EmailStr
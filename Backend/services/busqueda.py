@@ -0,0 +1,207 @@
+"""
+Filtros de búsqueda para los endpoints paginados (tutores, pacientes y consultas).
+
+Cada filtro se arma para que PostgreSQL pueda resolverlo con índices:
+- Las columnas de texto tienen índices GIN con pg_trgm, que sirven a `ILIKE '%term%'`.
+- El nombre completo y el RUT sin formato del tutor son columnas generadas e
+  indexadas (tutor.nombre_completo y tutor.rut_normalizado), en vez de
+  calcular func.concat / func.replace en cada fila.
+- Las búsquedas sobre tablas unidas se expresan como `id IN (UNION de subconsultas)`,
+  una por tabla, porque un OR entre columnas de tablas distintas no puede usar índices.
+
+Cuando el texto tiene forma de RUT completo o de teléfono, la búsqueda se resuelve por
+igualdad sobre columnas normalizadas (tutor.rut_normalizado, tutor.celular_normalizado,
+tutor.telefono_normalizado) con índices btree, en vez de la cadena de ILIKE.
+
+El listado de pacientes busca sobre la proyección govet.paciente_listado, que ya trae en una
+fila el documento de búsqueda (paciente, raza, especie y tutores) y los RUT y teléfonos
+normalizados de sus tutores: el filtro es sobre una sola tabla, sin subconsultas.
+
+Los índices y columnas se crean en Dbase/migrations/001_busqueda_trigram.sql,
+Dbase/migrations/002_busqueda_exacta_rut_telefono.sql y Dbase/migrations/005_paciente_listado.sql.
+"""
+
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import or_, select, union
+
+import models
+
+# RUT completo con guión: 12.345.678-5, 12345678-5, 1234567-k
+RUT_REGEX = re.compile(r"^\d{1,2}\.?\d{3}\.?\d{3}-[\dkK]$")
+# RUT normalizado (sin puntos ni guión): cuerpo de 7 u 8 dígitos + dígito verificador
+RUT_NORMALIZADO_REGEX = re.compile(r"^\d{7,8}[\dk]$")
+# Teléfono chileno: 9 dígitos nacionales, opcionalmente con prefijo 56
+TELEFONO_REGEX = re.compile(r"^(56)?[2-9]\d{8}$")
+
+
+def normalize_search_text(text: str) -> str:
+    """
+    Normaliza el texto de búsqueda eliminando puntos, guiones y espacios extras.
+    Útil para búsquedas de RUT, nombres completos, etc.
+    """
+    if not text:
+        return ""
+    # Eliminar puntos y guiones
+    normalized = text.replace(".", "").replace("-", "")
+    # Reemplazar múltiples espacios por uno solo
+    normalized = " ".join(normalized.split())
+    return normalized.strip()
+
+
+def normalizar_rut(texto: str) -> Optional[str]:
+    """Devuelve el RUT sin puntos, guión ni espacios y en minúsculas, o None si no es un RUT."""
+    if not texto:
+        return None
+    rut = texto.replace(".", "").replace("-", "").replace(" ", "").lower()
+    return rut if RUT_NORMALIZADO_REGEX.match(rut) else None
+
+
+def normalizar_telefono(texto: str) -> Optional[str]:
+    """Devuelve los 9 dígitos nacionales del teléfono (sin +56), o None si no es un teléfono."""
+    if not texto:
+        return None
+    digitos = re.sub(r"\D", "", texto)
+    return digitos[-9:] if TELEFONO_REGEX.match(digitos) else None
+
+
+def busqueda_exacta(search: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (rut, teléfono) normalizados si el texto tiene forma de RUT completo (con guión) o de
+    teléfono; (None, None) si no, y se usa la búsqueda parcial.
+
+    Un número de 9 dígitos que empieza con 2-9 puede ser un teléfono o un RUT sin formato con
+    cuerpo de 20.000.000 o más (p. ej. 201234567): en ese caso se devuelven ambos y la búsqueda
+    debe aceptar cualquiera de los dos.
+    """
+    texto = search.strip()
+    if RUT_REGEX.match(texto):
+        return normalizar_rut(texto), None
+    if texto.startswith("+") or re.fullmatch(r"[\d\s()]+", texto):
+        telefono = normalizar_telefono(texto)
+        # Solo se prueba como RUT lo que también es teléfono; el resto sigue a la búsqueda parcial
+        return (normalizar_rut(texto) if telefono else None), telefono
+    return None, None
+
+
+def condicion_tutor_exacta(search: str):
+    """
+    Si el texto tiene forma de RUT completo o de teléfono, devuelve una condición de igualdad
+    sobre las columnas normalizadas del tutor (ambas, con OR, si puede ser cualquiera de los
+    dos). Si no, devuelve None.
+    """
+    rut, telefono = busqueda_exacta(search)
+    condiciones = []
+    if rut:
+        condiciones.append(models.Tutor.rut_normalizado == rut)
+    if telefono:
+        condiciones.append(models.Tutor.celular_normalizado == telefono)
+        condiciones.append(models.Tutor.telefono_normalizado == telefono)
+    return or_(*condiciones) if condiciones else None
+
+
+def condicion_tutor_lookup(valor: str):
+    """
+    Condición para /tutores/buscar/: acepta un RUT o un teléfono en cualquier formato
+    y lo resuelve por igualdad (una sonda de índice por columna). None si no es ninguno.
+    """
+    condiciones = []
+    rut = normalizar_rut(valor)
+    if rut:
+        condiciones.append(models.Tutor.rut_normalizado == rut)
+    telefono = normalizar_telefono(valor)
+    if telefono:
+        condiciones.append(models.Tutor.celular_normalizado == telefono)
+        condiciones.append(models.Tutor.telefono_normalizado == telefono)
+    return or_(*condiciones) if condiciones else None
+
+
+def condicion_tutor(search: str, incluir_email: bool = False):
+    """Condición sobre govet.tutor: nombre, apellidos, nombre completo y RUT sin formato."""
+    patron = f"%{search}%"
+    patron_rut = f"%{normalize_search_text(search)}%"
+    condiciones = [
+        models.Tutor.nombre.ilike(patron),
+        models.Tutor.apellido_paterno.ilike(patron),
+        models.Tutor.apellido_materno.ilike(patron),
+        models.Tutor.nombre_completo.ilike(patron),
+        models.Tutor.rut_normalizado.ilike(patron_rut),
+    ]
+    if incluir_email:
+        condiciones.append(models.Tutor.email.ilike(patron))
+    return or_(*condiciones)
+
+
+def _selects_pacientes_por_datos(search: str, incluir_chip: bool = False) -> list:
+    """Subconsultas de id_paciente que coinciden por nombre (o chip), raza o especie."""
+    patron = f"%{search}%"
+    condicion_paciente = models.Paciente.nombre.ilike(patron)
+    if incluir_chip:
+        condicion_paciente = or_(condicion_paciente, models.Paciente.codigo_chip.ilike(patron))
+    return [
+        select(models.Paciente.id_paciente).where(condicion_paciente),
+        select(models.Paciente.id_paciente).join(
+            models.Raza, models.Paciente.id_raza == models.Raza.id_raza
+        ).join(
+            models.Especie, models.Raza.id_especie == models.Especie.id_especie, isouter=True
+        ).where(
+            or_(
+                models.Raza.nombre.ilike(patron),
+                models.Especie.nombre_comun.ilike(patron)
+            )
+        ),
+    ]
+
+
+def filtro_busqueda_tutores(search: str):
+    """Filtro para /tutores/paginated/ (una sola tabla, se resuelve con BitmapOr)."""
+    exacta = condicion_tutor_exacta(search)
+    if exacta is not None:
+        return exacta
+    return condicion_tutor(search, incluir_email=True)
+
+
+def filtro_busqueda_pacientes(search: str):
+    """
+    Filtro para /pacientes/paginated/ sobre govet.paciente_listado: paciente, raza, especie o
+    cualquiera de sus tutores (no solo el principal).
+    """
+    listado = models.PacienteListado
+    rut, telefono = busqueda_exacta(search)
+    condiciones = []
+    if rut:
+        condiciones.append(listado.ruts_tutores.contains([rut]))
+    if telefono:
+        condiciones.append(listado.telefonos_tutores.contains([telefono]))
+    if condiciones:
+        return or_(*condiciones)
+    # Mismo criterio que condicion_tutor: el RUT se compara sin puntos ni guiones
+    return or_(
+        listado.documento_busqueda.ilike(f"%{search}%"),
+        listado.ruts_busqueda.ilike(f"%{normalize_search_text(search)}%"),
+    )
+
+
+def filtro_busqueda_consultas(search: str):
+    """Filtro para /consultas/paginated/: texto de la consulta, paciente, raza, especie o tutor."""
+    exacta = condicion_tutor_exacta(search)
+    if exacta is not None:
+        # RUT o teléfono: consultas del tutor encontrado por igualdad
+        return models.Consulta.rut.in_(select(models.Tutor.rut).where(exacta))
+    patron = f"%{search}%"
+    ids_pacientes = union(*_selects_pacientes_por_datos(search, incluir_chip=True))
+    ruts_tutores = select(models.Tutor.rut).where(condicion_tutor(search))
+    return models.Consulta.id_consulta.in_(
+        union(
+            select(models.Consulta.id_consulta).where(
+                or_(
+                    models.Consulta.diagnostico.ilike(patron),
+                    models.Consulta.motivo.ilike(patron),
+                    models.Consulta.observaciones.ilike(patron)
+                )
+            ),
+            select(models.Consulta.id_consulta).where(models.Consulta.id_paciente.in_(ids_pacientes)),
+            select(models.Consulta.id_consulta).where(models.Consulta.rut.in_(ruts_tutores)),
+        )
+    )
@@ -0,0 +1,273 @@
+"""
+Caché de respuestas para los GET costosos: búsquedas paginadas, próximas vacunas y /events/*.
+
+- La clave combina la ruta, los parámetros de la query, el usuario (claim `sub` del token de
+  sesión) y la versión actual de cada etiqueta de la respuesta ('tutores', 'pacientes',
+  'consultas', 'vacunas', 'events').
+- Los endpoints de escritura llaman a `invalidar_respuestas(etiqueta, ...)`, que incrementa la
+  versión de esas etiquetas: las claves antiguas dejan de consultarse y vencen solas por TTL
+  (o salen del LRU). Como la versión se lee antes de calcular la respuesta, un cálculo que
+  empezó antes de una escritura queda guardado con la versión vieja y nunca se sirve.
+- Backends:
+    * Redis: con RESPONSE_CACHE_URL (redis://host:6379/0) todos los workers comparten
+      aciertos e invalidaciones. Es la forma de activar la caché con varios workers. Sirve
+      cualquier servidor que hable el protocolo de Redis (Redis, Valkey, KeyDB, un contenedor
+      local). Conviene `maxmemory-policy allkeys-lru`.
+    * local: LRU en memoria por proceso, hasta RESPONSE_CACHE_MAX_ENTRIES respuestas. Cada
+      worker ve solo sus propias invalidaciones: tras una escritura, los demás seguirían
+      sirviendo la respuesta vieja hasta el TTL (y un mismo usuario no vería su cambio si el
+      siguiente request cae en otro worker). Por eso sin RESPONSE_CACHE_URL la caché queda
+      desactivada (TTL 0) salvo que se defina RESPONSE_CACHE_TTL, lo que solo conviene con
+      un único worker.
+- Si el backend falla, la respuesta se calcula normalmente (la caché nunca rompe un request).
+- Las respuestas se guardan ya serializadas (bytes JSON) y llevan la cabecera X-Cache: HIT/MISS.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from services.serializacion import dumps
+
+# Vacío = LRU local (desactivado salvo RESPONSE_CACHE_TTL explícito); redis://... = backend compartido
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+# Segundos de vida de una respuesta (0 = caché desactivada). Por defecto solo con backend compartido:
+# el LRU local no se entera de las escrituras hechas en otros workers
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30" if RESPONSE_CACHE_URL else "0"))
+# /events/* consulta Google Calendar: se puede cachear más tiempo
+RESPONSE_CACHE_EVENTS_TTL = float(os.getenv("RESPONSE_CACHE_EVENTS_TTL", "60" if RESPONSE_CACHE_URL else "0"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_PREFIX = os.getenv("RESPONSE_CACHE_PREFIX", "govet:resp:")
+
+# Etiquetas usadas por los endpoints
+TAGS_TUTORES = ("tutores",)
+TAGS_PACIENTES = ("pacientes", "tutores")
+TAGS_CONSULTAS = ("consultas", "pacientes", "tutores")
+TAGS_VACUNAS = ("vacunas", "pacientes")
+TAGS_EVENTOS = ("events",)
+
+
+class CacheLocal:
+    """LRU en memoria del proceso."""
+
+    nombre = "local"
+    remoto = False
+
+    def __init__(self, max_entradas: int):
+        self._lock = threading.Lock()
+        self._max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._versiones = {}
+
+    def versiones(self, tags: Sequence[str]) -> List[int]:
+        with self._lock:
+            return [self._versiones.get(tag, 0) for tag in tags]
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            expira, cuerpo = entrada
+            if expira < time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return cuerpo
+
+    def guardar(self, clave: str, cuerpo: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + ttl, cuerpo)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self._max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, tags: Sequence[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._versiones[tag] = self._versiones.get(tag, 0) + 1
+
+    def entradas(self) -> Optional[int]:
+        return len(self._entradas)
+
+
+class CacheRedis:
+    """Backend compartido sobre el protocolo de Redis (dependencia opcional `redis`)."""
+
+    nombre = "redis"
+    remoto = True
+
+    def __init__(self, url: str):
+        import redis  # solo se necesita si RESPONSE_CACHE_URL está configurada
+
+        self._cliente = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def _clave_tag(self, tag: str) -> str:
+        return f"{RESPONSE_CACHE_PREFIX}tag:{tag}"
+
+    def versiones(self, tags: Sequence[str]) -> List[int]:
+        valores = self._cliente.mget([self._clave_tag(tag) for tag in tags])
+        return [int(v) if v is not None else 0 for v in valores]
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        return self._cliente.get(clave)
+
+    def guardar(self, clave: str, cuerpo: bytes, ttl: float) -> None:
+        self._cliente.set(clave, cuerpo, px=max(1, int(ttl * 1000)))
+
+    def invalidar(self, tags: Sequence[str]) -> None:
+        pipe = self._cliente.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(self._clave_tag(tag))
+        pipe.execute()
+
+    def entradas(self) -> Optional[int]:
+        return None  # el servidor puede ser compartido con otras claves
+
+
+def _crear_backend():
+    if RESPONSE_CACHE_URL:
+        return CacheRedis(RESPONSE_CACHE_URL)
+    return CacheLocal(RESPONSE_CACHE_MAX_ENTRIES)
+
+
+backend = _crear_backend()
+
+
+class _Estadisticas:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.errores = 0
+        self.ultimo_error: Optional[str] = None
+
+    def sumar(self, campo: str, error: Optional[Exception] = None) -> None:
+        with self.lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+            if error is not None:
+                self.ultimo_error = str(error)
+
+
+_estadisticas = _Estadisticas()
+
+
+def _clave(request: Request, usuario: Optional[dict], tags: Sequence[str], versiones: Sequence[int]) -> str:
+    partes = [
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        (usuario or {}).get("sub"),
+        list(zip(tags, versiones)),
+    ]
+    resumen = hashlib.blake2b(json.dumps(partes, separators=(",", ":")).encode(), digest_size=16).hexdigest()
+    return f"{RESPONSE_CACHE_PREFIX}{resumen}"
+
+
+def _buscar(request: Request, usuario: Optional[dict], tags: Sequence[str]) -> Tuple[Optional[str], Optional[bytes]]:
+    """(clave, cuerpo cacheado o None). Si el backend falla, clave None: no se guarda nada."""
+    try:
+        clave = _clave(request, usuario, tags, backend.versiones(tags))
+        return clave, backend.obtener(clave)
+    except Exception as e:
+        _estadisticas.sumar("errores", e)
+        print(f"⚠️ Caché de respuestas no disponible: {e}")
+        return None, None
+
+
+def _guardar(clave: str, cuerpo: bytes, ttl: float) -> None:
+    try:
+        backend.guardar(clave, cuerpo, ttl)
+    except Exception as e:
+        _estadisticas.sumar("errores", e)
+        print(f"⚠️ No se pudo guardar en la caché de respuestas: {e}")
+
+
+def _respuesta(cuerpo: bytes, estado: str) -> Response:
+    return Response(content=cuerpo, media_type="application/json", headers={"X-Cache": estado})
+
+
+async def responder(
+    request: Request,
+    usuario: Optional[dict],
+    tags: Sequence[str],
+    calcular: Callable[[], Awaitable],
+    ttl: float = RESPONSE_CACHE_TTL,
+) -> Response:
+    """
+    Respuesta cacheada para endpoints async. `calcular` es una corrutina sin argumentos que
+    devuelve los datos; sus HTTPException (404, 400...) no se cachean.
+    """
+    if ttl <= 0:
+        return _respuesta(dumps(await calcular()), "BYPASS")
+    if backend.remoto:
+        clave, cuerpo = await run_in_threadpool(_buscar, request, usuario, tags)
+    else:
+        clave, cuerpo = _buscar(request, usuario, tags)
+    if cuerpo is not None:
+        _estadisticas.sumar("aciertos")
+        return _respuesta(cuerpo, "HIT")
+
+    _estadisticas.sumar("fallos")
+    cuerpo = dumps(await calcular())
+    if clave is not None:
+        if backend.remoto:
+            await run_in_threadpool(_guardar, clave, cuerpo, ttl)
+        else:
+            _guardar(clave, cuerpo, ttl)
+    return _respuesta(cuerpo, "MISS")
+
+
+def responder_sync(
+    request: Request,
+    usuario: Optional[dict],
+    tags: Sequence[str],
+    calcular: Callable[[], object],
+    ttl: float = RESPONSE_CACHE_TTL,
+) -> Response:
+    """Igual que `responder`, para endpoints síncronos (corren en el threadpool)."""
+    if ttl <= 0:
+        return _respuesta(dumps(calcular()), "BYPASS")
+    clave, cuerpo = _buscar(request, usuario, tags)
+    if cuerpo is not None:
+        _estadisticas.sumar("aciertos")
+        return _respuesta(cuerpo, "HIT")
+
+    _estadisticas.sumar("fallos")
+    cuerpo = dumps(calcular())
+    if clave is not None:
+        _guardar(clave, cuerpo, ttl)
+    return _respuesta(cuerpo, "MISS")
+
+
+def invalidar_respuestas(*tags: str) -> None:
+    """Invalida las respuestas cacheadas con esas etiquetas (se llama desde los endpoints de escritura)."""
+    try:
+        backend.invalidar(tags)
+    except Exception as e:
+        # Sin la invalidación, lo cacheado vence igual al cumplirse el TTL
+        _estadisticas.sumar("errores", e)
+        print(f"⚠️ No se pudo invalidar la caché de respuestas ({', '.join(tags)}): {e}")
+
+
+def estado_cache() -> dict:
+    """Estado de la caché para /internal/response-cache."""
+    with _estadisticas.lock:
+        total = _estadisticas.aciertos + _estadisticas.fallos
+        return {
+            "backend": backend.nombre,
+            "ttl_s": RESPONSE_CACHE_TTL,
+            "events_ttl_s": RESPONSE_CACHE_EVENTS_TTL,
+            "entries": backend.entradas(),
+            "hits": _estadisticas.aciertos,
+            "misses": _estadisticas.fallos,
+            "hit_ratio": round(_estadisticas.aciertos / total, 3) if total else None,
+            "errors": _estadisticas.errores,
+            "last_error": _estadisticas.ultimo_error,
+        }
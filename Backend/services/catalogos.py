@@ -0,0 +1,194 @@
+"""
+Caché en memoria de los catálogos casi estáticos: especies, razas, tratamientos y regiones.
+
+- Se carga al iniciar la app y se recarga cuando queda inválida: al crear un registro por
+  los POST de catálogo, al confirmar (after_commit) cualquier sesión ORM que haya modificado
+  Especie/Raza/Tratamiento, o al cumplirse CATALOGOS_TTL segundos (para ver cambios hechos
+  por otros workers o por scripts).
+- Cada respuesta se guarda ya serializada (bytes JSON) con su ETag, así un GET no toca la
+  base ni vuelve a serializar; con If-None-Match se responde 304.
+- Los filtros por nombre (razas, especies, tratamientos) se resuelven con un índice de
+  nombres en minúsculas en memoria, con la misma semántica que el ilike '%nombre%'.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import models
+from database import PrimaryReadSessionLocal
+from regiones_data import REGIONES_CHILE
+from schemas import EspecieResponse, RazaResponse, TratamientoResponse
+from services.serializacion import dumps
+
+# Segundos tras los que se recarga aunque no haya habido escrituras en este proceso (0 = nunca)
+CATALOGOS_TTL = float(os.getenv("CATALOGOS_TTL", "300"))
+# max-age para el navegador; con 0 siempre revalida (If-None-Match -> 304)
+CATALOGOS_MAX_AGE = int(os.getenv("CATALOGOS_MAX_AGE", "0"))
+# Respuestas filtradas memorizadas por versión antes de vaciarlas
+_MAX_RESPUESTAS_FILTRADAS = 512
+
+_MODELOS_CATALOGO = (models.Especie, models.Raza, models.Tratamiento)
+
+
+def _serializar(datos) -> Tuple[bytes, str]:
+    cuerpo = dumps(datos)
+    etag = '"' + hashlib.blake2b(cuerpo, digest_size=10).hexdigest() + '"'
+    return cuerpo, etag
+
+
+class CacheCatalogos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_recarga = threading.Lock()
+        self.version = 0
+        self.cargado_en = 0.0
+        self._vencido = True
+        self._especies: List[dict] = []
+        self._razas: List[dict] = []
+        self._tratamientos: List[dict] = []
+        # Índice de nombres: (nombre en minúsculas, registro)
+        self._indice_razas: List[Tuple[str, dict]] = []
+        self._indice_especies: List[Tuple[str, str, dict]] = []
+        self._indice_tratamientos: List[Tuple[str, dict]] = []
+        self._respuestas: Dict[str, Optional[Tuple[bytes, str]]] = {}
+
+    def necesita_recarga(self) -> bool:
+        if self._vencido:
+            return True
+        return CATALOGOS_TTL > 0 and time.monotonic() - self.cargado_en > CATALOGOS_TTL
+
+    def invalidar(self) -> None:
+        self._vencido = True
+
+    def recargar(self) -> None:
+        """Lee los catálogos desde la base principal (una réplica atrasada no vería lo recién creado)."""
+        with self._lock_recarga:
+            if not self.necesita_recarga():
+                return  # otro hilo recargó mientras se esperaba el lock
+            # Se marca vigente antes de leer: si llega una invalidación durante la lectura,
+            # queda vencido otra vez y el siguiente request recarga
+            self._vencido = False
+            db = PrimaryReadSessionLocal()
+            try:
+                especies = [EspecieResponse.model_validate(e).model_dump(mode="json")
+                            for e in db.query(models.Especie).order_by(models.Especie.id_especie)]
+                razas = [RazaResponse.model_validate(r).model_dump(mode="json")
+                         for r in db.query(models.Raza).order_by(models.Raza.id_raza)]
+                tratamientos = [TratamientoResponse.model_validate(t).model_dump(mode="json")
+                                for t in db.query(models.Tratamiento).order_by(models.Tratamiento.id_tratamiento)]
+            except Exception:
+                self._vencido = True
+                raise
+            finally:
+                db.close()
+
+            with self._lock:
+                self._especies, self._razas, self._tratamientos = especies, razas, tratamientos
+                self._indice_razas = [(r["nombre"].lower(), r) for r in razas]
+                self._indice_especies = [(e["nombre_comun"].lower(), e["nombre_cientifico"].lower(), e) for e in especies]
+                self._indice_tratamientos = [(t["nombre"].lower(), t) for t in tratamientos]
+                self._respuestas = {
+                    "especies": _serializar(especies) if especies else None,
+                    "razas": _serializar(razas) if razas else None,
+                    "tratamientos": _serializar(tratamientos) if tratamientos else None,
+                }
+                self.version += 1
+                self.cargado_en = time.monotonic()
+
+    def _memorizar(self, clave: str, calcular) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            if clave in self._respuestas:
+                return self._respuestas[clave]
+            datos = calcular()
+            respuesta = _serializar(datos) if datos else None
+            if len(self._respuestas) >= _MAX_RESPUESTAS_FILTRADAS:
+                self._respuestas = {k: v for k, v in self._respuestas.items() if "/" not in k}
+            self._respuestas[clave] = respuesta
+            return respuesta
+
+    def todos(self, catalogo: str) -> Optional[Tuple[bytes, str]]:
+        """Listado completo ('especies', 'razas' o 'tratamientos'); None si está vacío."""
+        with self._lock:
+            return self._respuestas.get(catalogo)
+
+    def razas_por_nombre(self, nombre: str) -> Optional[Tuple[bytes, str]]:
+        termino = nombre.lower()
+        return self._memorizar(
+            f"razas/nombre/{termino}",
+            lambda: [r for clave, r in self._indice_razas if termino in clave],
+        )
+
+    def razas_por_especie(self, nombre_especie: str) -> Optional[Tuple[bytes, str]]:
+        termino = nombre_especie.lower()
+
+        def calcular():
+            ids = {e["id_especie"] for comun, _, e in self._indice_especies if termino in comun}
+            return [r for r in self._razas if r["id_especie"] in ids]
+
+        return self._memorizar(f"razas/especie/{termino}", calcular)
+
+    def especies_por_nombre(self, nombre: str) -> Optional[Tuple[bytes, str]]:
+        termino = nombre.lower()
+        return self._memorizar(
+            f"especies/nombre/{termino}",
+            lambda: [e for comun, cientifico, e in self._indice_especies if termino in comun or termino in cientifico],
+        )
+
+    def tratamiento_por_nombre(self, nombre: str) -> Optional[Tuple[bytes, str]]:
+        """Primer tratamiento (por id) cuyo nombre contiene el término."""
+        termino = nombre.lower()
+        return self._memorizar(
+            f"tratamientos/nombre/{termino}",
+            lambda: next((t for clave, t in self._indice_tratamientos if termino in clave), None),
+        )
+
+
+catalogos = CacheCatalogos()
+
+# Las regiones son datos estáticos del código: se serializan una sola vez
+REGIONES_SERIALIZADAS = _serializar(REGIONES_CHILE)
+REGIONES_MAX_AGE = 86400
+
+
+def invalidar_catalogos() -> None:
+    catalogos.invalidar()
+
+
+def respuesta_cacheada(request: Request, cuerpo_etag: Tuple[bytes, str], max_age: int = CATALOGOS_MAX_AGE) -> Response:
+    """JSON pre-serializado con ETag/Cache-Control, o 304 si el cliente ya tiene esa versión."""
+    cuerpo, etag = cuerpo_etag
+    cache_control = f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etiquetas = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+        if etag in etiquetas or "*" in etiquetas:
+            return Response(status_code=304, headers=headers)
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
+
+
+# Hook ORM: cualquier commit que toque un catálogo invalida la caché de este proceso
+
+@event.listens_for(Session, "after_flush")
+def _marcar_cambio_catalogo(session, flush_context):
+    if any(isinstance(obj, _MODELOS_CATALOGO) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["catalogo_modificado"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tras_commit(session):
+    if session.info.pop("catalogo_modificado", False):
+        catalogos.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marca(session):
+    session.info.pop("catalogo_modificado", None)
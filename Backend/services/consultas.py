@@ -0,0 +1,127 @@
+"""
+Creación de una consulta completa (consulta + recetas + tratamientos aplicados) en una sola
+transacción, para POST /consultas/completa.
+
+Antes una atención se guardaba con POST /consultas/ y un POST /consultas_tratamientos/ por
+cada tratamiento (y las recetas no tenían endpoint). Aquí la cantidad de sentencias SQL no
+depende de cuántas recetas o tratamientos traiga la consulta:
+
+1. Tratamientos usados: nombre y tipo (para validar y para la respuesta). Solo si hay tratamientos.
+2. Una sola consulta que verifica el paciente y el tutor y reserva los ids de las secuencias
+   de consulta, receta_medica y consulta_tratamiento (nextval en lote con generate_series).
+3. Un INSERT por tabla con todas sus filas (executemany de SQLAlchemy: un INSERT ... VALUES
+   con varias filas).
+
+Como los ids ya se conocen, la respuesta se arma con lo enviado, sin volver a leer la base.
+Si algo falla se hace rollback y no queda nada a medias; los ids reservados se pierden
+(las secuencias igual tienen huecos con cualquier rollback).
+"""
+
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+
+import models
+from schemas import ConsultaCompletaCreate, ConsultaResponse, RecetaResponse, TratamientoAplicadoResponse
+
+# Las columnas bigserial no tienen un nombre de secuencia fijo en todas las bases
+# (generador_schema.sql crea varias con sufijo): se resuelve con pg_get_serial_sequence
+SQL_RESERVAR_IDS = text("""
+    SELECT
+        EXISTS (SELECT 1 FROM govet.paciente WHERE id_paciente = :id_paciente) AS paciente_existe,
+        EXISTS (SELECT 1 FROM govet.tutor WHERE rut = :rut) AS tutor_existe,
+        nextval(pg_get_serial_sequence('govet.consulta', 'id_consulta')) AS id_consulta,
+        ARRAY(
+            SELECT nextval(pg_get_serial_sequence('govet.receta_medica', 'id_receta'))
+            FROM generate_series(1, :recetas)
+        ) AS ids_recetas,
+        ARRAY(
+            SELECT nextval(pg_get_serial_sequence('govet.consulta_tratamiento', 'id_aplicacion'))
+            FROM generate_series(1, :tratamientos)
+        ) AS ids_aplicaciones
+""")
+
+
+def _tratamientos_usados(db: Session, ids: List[int]) -> Dict[int, models.Tratamiento]:
+    """Tratamientos por id; 404 si alguno no existe."""
+    if not ids:
+        return {}
+    tratamientos = {
+        t.id_tratamiento: t
+        for t in db.execute(
+            select(models.Tratamiento).where(models.Tratamiento.id_tratamiento.in_(set(ids)))
+        ).scalars()
+    }
+    faltantes = sorted(set(ids) - tratamientos.keys())
+    if faltantes:
+        raise HTTPException(status_code=404, detail=f"Tratamiento no encontrado: {', '.join(map(str, faltantes))}")
+    return tratamientos
+
+
+def crear_consulta_completa(db: Session, datos: ConsultaCompletaCreate) -> ConsultaResponse:
+    """
+    Inserta la consulta con sus recetas y tratamientos y hace commit.
+    Lanza 404 (sin escribir nada) si el paciente, el tutor o algún tratamiento no existe.
+    """
+    campos_consulta = datos.model_dump(exclude={"recetas", "tratamientos"})
+    try:
+        tratamientos = _tratamientos_usados(db, [t.id_tratamiento for t in datos.tratamientos])
+
+        reserva = db.execute(SQL_RESERVAR_IDS, {
+            "id_paciente": datos.id_paciente,
+            "rut": datos.rut,
+            "recetas": len(datos.recetas),
+            "tratamientos": len(datos.tratamientos),
+        }).one()
+        if not reserva.paciente_existe:
+            raise HTTPException(status_code=404, detail="Paciente no encontrado")
+        if not reserva.tutor_existe:
+            raise HTTPException(status_code=404, detail="Tutor no encontrado")
+        id_consulta = reserva.id_consulta
+
+        filas_recetas = [
+            {**receta.model_dump(), "id_receta": id_receta, "id_consulta": id_consulta}
+            for receta, id_receta in zip(datos.recetas, reserva.ids_recetas)
+        ]
+        filas_tratamientos = [
+            {
+                **tratamiento.model_dump(),
+                "id_aplicacion": id_aplicacion,
+                "id_consulta": id_consulta,
+                "id_paciente": datos.id_paciente,
+                # Sin fecha propia, el tratamiento se aplicó en la consulta
+                "fecha_tratamiento": tratamiento.fecha_tratamiento or datos.fecha_consulta,
+            }
+            for tratamiento, id_aplicacion in zip(datos.tratamientos, reserva.ids_aplicaciones)
+        ]
+
+        db.execute(insert(models.Consulta), [{**campos_consulta, "id_consulta": id_consulta}])
+        if filas_recetas:
+            db.execute(insert(models.Receta), filas_recetas)
+        if filas_tratamientos:
+            db.execute(insert(models.ConsultaTratamiento), filas_tratamientos)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Respuesta con los datos ya validados por el esquema de entrada (sin releer la base)
+    return ConsultaResponse.model_construct(
+        **campos_consulta,
+        id_consulta=id_consulta,
+        recetas=[RecetaResponse.model_construct(**fila) for fila in filas_recetas],
+        tratamientos=[
+            TratamientoAplicadoResponse.model_construct(
+                fecha_tratamiento=fila["fecha_tratamiento"],
+                dosis=fila["dosis"],
+                marca=fila["marca"],
+                numero_serial=fila["numero_serial"],
+                proxima_dosis=fila["proxima_dosis"],
+                nombre_tratamiento=tratamientos[fila["id_tratamiento"]].nombre,
+                tipo_tratamiento=tratamientos[fila["id_tratamiento"]].tipo_tratamiento,
+            )
+            for fila in filas_tratamientos
+        ],
+    )
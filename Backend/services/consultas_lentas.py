@@ -0,0 +1,264 @@
+"""
+Registro de consultas lentas con captura automática del plan (EXPLAIN).
+
+Cada sentencia que tarda más de SLOW_QUERY_MS queda registrada con sus parámetros en un
+buffer circular (GET /internal/slow-queries) y, si SLOW_QUERY_LOG_FILE está definida, como una
+línea JSON en un archivo rotativo. Una fracción SLOW_QUERY_EXPLAIN_SAMPLE de las consultas
+lentas (solo SELECT) se repite con EXPLAIN (ANALYZE, BUFFERS) en un hilo aparte, dentro de
+una transacción READ ONLY con statement_timeout, y el plan se agrega al registro.
+
+El EXPLAIN se hace con un motor psycopg2 propio (NullPool, una conexión por EXPLAIN) sobre la
+misma base del grupo, para no ocupar conexiones del pool de la aplicación justo cuando hay
+consultas lentas. Las sentencias del motor asyncpg ($1, $2...) se pasan al formato de
+psycopg2 antes de repetirlas.
+
+Variables de entorno:
+- SLOW_QUERY_MS (500): umbral en ms; 0 o negativo desactiva el registro
+- SLOW_QUERY_EXPLAIN_SAMPLE (0): fracción de consultas lentas a las que se les saca el plan (0 a 1)
+- SLOW_QUERY_EXPLAIN_TIMEOUT_MS (10000): statement_timeout del EXPLAIN ANALYZE
+- SLOW_QUERY_BUFFER_SIZE (200): consultas que guarda el buffer de cada proceso
+- SLOW_QUERY_LOG_FILE (vacío): archivo JSON lines; SLOW_QUERY_LOG_MAX_MB (10) y
+  SLOW_QUERY_LOG_BACKUPS (5) controlan la rotación
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", "")
+SLOW_QUERY_LOG_MAX_MB = float(os.getenv("SLOW_QUERY_LOG_MAX_MB", "10"))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# Largo máximo de la sentencia y de cada parámetro guardados
+_MAX_SENTENCIA = 5000
+_MAX_PARAMETRO = 200
+# EXPLAIN pendientes; si el hilo no da abasto se descartan en vez de acumular
+_MAX_PENDIENTES = 20
+
+_SOLO_SELECT = re.compile(r"^\s*(\(\s*)*select\b", re.IGNORECASE)
+_ESCRITURA = re.compile(r"\b(insert|update|delete|merge|truncate|nextval|setval)\b", re.IGNORECASE)
+_PARAMETRO_ASYNCPG = re.compile(r"\$(\d+)")
+
+logger = logging.getLogger("govet.consultas_lentas")
+
+
+class _Registro:
+    """Buffer circular de consultas lentas (por proceso) y contadores."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.consultas = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+        self.total = 0
+        self.explains = 0
+        self.explains_descartados = 0
+        self.explains_fallidos = 0
+
+    def agregar(self, entrada: dict) -> None:
+        with self.lock:
+            self.consultas.append(entrada)
+            self.total += 1
+
+
+_registro = _Registro()
+_pendientes: "queue.Queue" = queue.Queue(maxsize=_MAX_PENDIENTES)
+_hilo_explain: Optional[threading.Thread] = None
+_hilo_lock = threading.Lock()
+
+
+# =============================================================================
+# Serialización de parámetros
+# =============================================================================
+def _valor(valor):
+    if valor is None or isinstance(valor, (bool, int, float)):
+        return valor
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (list, tuple)):
+        return [_valor(v) for v in valor[:20]] + (["..."] if len(valor) > 20 else [])
+    texto = str(valor)
+    return texto if len(texto) <= _MAX_PARAMETRO else texto[:_MAX_PARAMETRO] + "..."
+
+
+def _parametros(parameters, executemany: bool):
+    """Parámetros en JSON; de un executemany solo los primeros 3 juegos."""
+    if executemany:
+        juegos = list(parameters[:3]) if isinstance(parameters, (list, tuple)) else []
+        return {"executemany": len(parameters), "primeros": [_parametros(p, False) for p in juegos]}
+    if isinstance(parameters, dict):
+        return {k: _valor(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_valor(v) for v in parameters]
+    return _valor(parameters)
+
+
+# =============================================================================
+# EXPLAIN en segundo plano
+# =============================================================================
+def _a_psycopg2(sentencia: str, parameters):
+    """Sentencia y parámetros del formato de asyncpg ($1, $2...) al de psycopg2 (%(p1)s)."""
+    if isinstance(parameters, dict) or not _PARAMETRO_ASYNCPG.search(sentencia):
+        return sentencia, parameters
+    sentencia = sentencia.replace("%", "%%")
+    sentencia = _PARAMETRO_ASYNCPG.sub(lambda m: f"%(p{m.group(1)})s", sentencia)
+    return sentencia, {f"p{i}": v for i, v in enumerate(parameters or (), start=1)}
+
+
+def _explicar(motor_explain, sentencia: str, parameters) -> List[str]:
+    sentencia, parameters = _a_psycopg2(sentencia, parameters)
+    conexion = motor_explain.raw_connection()
+    try:
+        with conexion.cursor() as cur:
+            cur.execute("SET TRANSACTION READ ONLY")
+            cur.execute(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + sentencia, parameters or None)
+            return [fila[0] for fila in cur.fetchall()]
+    finally:
+        conexion.rollback()
+        conexion.close()
+
+
+def _escribir(entrada: dict) -> None:
+    if logger.handlers:
+        logger.warning(json.dumps(entrada, ensure_ascii=False, default=str))
+
+
+def _trabajar_explains() -> None:
+    while True:
+        motor_explain, entrada, sentencia, parameters = _pendientes.get()
+        try:
+            plan = _explicar(motor_explain, sentencia, parameters)
+            with _registro.lock:
+                entrada["explain"] = plan
+                _registro.explains += 1
+        except Exception as e:
+            with _registro.lock:
+                entrada["explain_error"] = f"{type(e).__name__}: {e}"[:500]
+                _registro.explains_fallidos += 1
+        _escribir(entrada)
+
+
+def _encolar_explain(motor_explain, entrada: dict, sentencia: str, parameters) -> bool:
+    global _hilo_explain
+    with _hilo_lock:
+        if _hilo_explain is None:
+            _hilo_explain = threading.Thread(target=_trabajar_explains, name="explain-consultas-lentas", daemon=True)
+            _hilo_explain.start()
+    try:
+        _pendientes.put_nowait((motor_explain, entrada, sentencia, parameters))
+        return True
+    except queue.Full:
+        with _registro.lock:
+            _registro.explains_descartados += 1
+        return False
+
+
+def _se_puede_explicar(sentencia: str, executemany: bool) -> bool:
+    """Solo SELECT sin escrituras: EXPLAIN ANALYZE ejecuta la sentencia."""
+    return not executemany and bool(_SOLO_SELECT.match(sentencia)) and not _ESCRITURA.search(sentencia)
+
+
+# =============================================================================
+# Eventos de SQLAlchemy
+# =============================================================================
+def _escuchar(motor, motor_explain, nombre: str) -> None:
+    @event.listens_for(motor, "before_cursor_execute")
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        context._lenta_inicio = time.perf_counter()
+
+    @event.listens_for(motor, "after_cursor_execute")
+    def despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_lenta_inicio", None)
+        if inicio is None:
+            return
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        if duracion_ms < SLOW_QUERY_MS:
+            return
+        entrada = {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duracion_ms": round(duracion_ms, 2),
+            "motor": nombre,
+            "pid": os.getpid(),
+            "filas": cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None,
+            "sentencia": statement[:_MAX_SENTENCIA],
+            "parametros": _parametros(parameters, executemany),
+        }
+        _registro.agregar(entrada)
+        if (
+            SLOW_QUERY_EXPLAIN_SAMPLE > 0
+            and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE
+            and _se_puede_explicar(statement, executemany)
+        ):
+            entrada["explain"] = "pendiente"
+            # El hilo escribe la línea del archivo cuando tenga el plan
+            if _encolar_explain(motor_explain, entrada, statement, parameters):
+                return
+            entrada["explain"] = None
+        _escribir(entrada)
+
+
+def _configurar_archivo() -> None:
+    if logger.handlers or not SLOW_QUERY_LOG_FILE:
+        return
+    directorio = os.path.dirname(SLOW_QUERY_LOG_FILE)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    manejador = RotatingFileHandler(
+        SLOW_QUERY_LOG_FILE,
+        maxBytes=int(SLOW_QUERY_LOG_MAX_MB * 1024 * 1024),
+        backupCount=SLOW_QUERY_LOG_BACKUPS,
+        encoding="utf-8",
+    )
+    manejador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(manejador)
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+
+
+def vigilar_consultas_lentas(motor_explain, motores: dict) -> None:
+    """
+    Engancha el registro en los motores dados ({nombre: motor síncrono}; para los async,
+    `.sync_engine`). Los EXPLAIN se repiten en la base de `motor_explain` (psycopg2), con un
+    motor NullPool aparte que no comparte su pool.
+    """
+    if SLOW_QUERY_MS <= 0:
+        return
+    _configurar_archivo()
+    # Sin eventos propios: el EXPLAIN no vuelve a quedar registrado como consulta lenta
+    motor_explain = create_engine(motor_explain.url, poolclass=NullPool)
+    for nombre, motor in motores.items():
+        _escuchar(motor, motor_explain, nombre)
+
+
+def estado_consultas_lentas(limite: int = 50) -> dict:
+    """Configuración, contadores y las últimas `limite` consultas lentas (la más reciente primero)."""
+    with _registro.lock:
+        consultas = [dict(c) for c in reversed(_registro.consultas)][:limite]
+        return {
+            "threshold_ms": SLOW_QUERY_MS,
+            "explain_sample": SLOW_QUERY_EXPLAIN_SAMPLE,
+            "log_file": SLOW_QUERY_LOG_FILE or None,
+            "total": _registro.total,
+            "explains": _registro.explains,
+            "explains_failed": _registro.explains_fallidos,
+            "explains_dropped": _registro.explains_descartados,
+            "queries": consultas,
+        }
@@ -0,0 +1,91 @@
+"""
+Totales para los endpoints paginados.
+
+- Caché de totales por entidad + término de búsqueda, con TTL corto, para no recalcular el
+  conteo completo en cada página. Se guarda en el mismo backend que la caché de respuestas
+  (services/cache_respuestas.py) con una etiqueta versionada por entidad (`totales:<entidad>`):
+  con RESPONSE_CACHE_URL (Redis) la invalidación de un worker vale para todos. Sin backend
+  compartido queda desactivada por defecto (PAGINATION_COUNT_TTL 0), porque el resto de los
+  workers seguiría entregando el total anterior a una escritura.
+- Estimación del total con el planificador de PostgreSQL (EXPLAIN), usada por la opción
+  `approximate_total` en listados sin filtro de búsqueda.
+"""
+
+import hashlib
+import json
+import os
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+from services import cache_respuestas
+
+# Segundos que un total se considera vigente (0 = sin caché). Por defecto solo con backend compartido
+PAGINATION_COUNT_TTL = float(os.getenv(
+    "PAGINATION_COUNT_TTL", "30" if cache_respuestas.RESPONSE_CACHE_URL else "0"
+))
+
+
+def clave_total(entidad: str, search: Optional[str]) -> str:
+    return f"{entidad}:{(search or '').strip().lower()}"
+
+
+def _etiqueta(clave: str) -> str:
+    return f"totales:{clave.split(':', 1)[0]}"
+
+
+def _clave_backend(clave: str, version: int) -> str:
+    resumen = hashlib.blake2b(f"{clave}|{version}".encode(), digest_size=16).hexdigest()
+    return f"{cache_respuestas.RESPONSE_CACHE_PREFIX}total:{resumen}"
+
+
+def obtener_total(clave: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    (total cacheado o None, versión de la entidad). La versión se pasa a guardar_total: se lee
+    antes de contar, así un total calculado antes de una escritura queda con la versión vieja
+    y nunca se sirve. Versión None = caché desactivada o backend caído (no se guarda).
+    """
+    if PAGINATION_COUNT_TTL <= 0:
+        return None, None
+    backend = cache_respuestas.backend
+    try:
+        (version,) = backend.versiones([_etiqueta(clave)])
+        valor = backend.obtener(_clave_backend(clave, version))
+    except Exception as e:
+        print(f"⚠️ Caché de totales no disponible: {e}")
+        return None, None
+    return (json.loads(valor) if valor is not None else None), version
+
+
+def guardar_total(clave: str, total: int, version: Optional[int]) -> None:
+    if version is None:
+        return
+    try:
+        cache_respuestas.backend.guardar(
+            _clave_backend(clave, version), json.dumps(total).encode(), PAGINATION_COUNT_TTL
+        )
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar en la caché de totales: {e}")
+
+
+def invalidar_totales(entidad: str) -> None:
+    """Invalida los totales cacheados de una entidad en todos los workers (se llama desde los endpoints de escritura)."""
+    try:
+        cache_respuestas.backend.invalidar([f"totales:{entidad}"])
+    except Exception as e:
+        # Sin la invalidación, el total vence igual al cumplirse el TTL
+        print(f"⚠️ No se pudo invalidar la caché de totales: {e}")
+
+
+def estimar_total(db: Session, query: Query) -> int:
+    """
+    Estima la cantidad de filas de la consulta con EXPLAIN (sin ejecutarla).
+    Solo debe usarse con consultas sin texto de usuario: los parámetros se compilan literales.
+    """
+    sql = str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
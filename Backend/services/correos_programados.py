@@ -0,0 +1,295 @@
+"""
+Cola persistente de correos programados (tabla govet.correo_programado, migración 006).
+
+- POST /email/{fecha_envio} solo inserta la fila: el correo sobrevive a reinicios y no
+  depende del worker que atendió el request.
+- Cada worker corre el bucle del despachador, pero solo despacha el que tiene el advisory lock
+  de líder (pg_try_advisory_lock en una conexión propia, fuera del pool). Si ese worker
+  muere, su conexión se cierra, Postgres suelta el lock y otro worker lo toma en el siguiente
+  ciclo.
+- El líder reclama los vencidos por lotes con FOR UPDATE SKIP LOCKED (pasan a `enviando` en
+  una transacción corta), los envía y marca cada uno como `enviado`, o lo reprograma con
+  espera exponencial hasta EMAIL_QUEUE_MAX_ATTEMPTS intentos (después queda `fallido`).
+- Entrega al menos una vez: si el worker muere entre el envío y la marca, la fila vuelve a
+  `pendiente` tras EMAIL_QUEUE_CLAIM_TIMEOUT y se reenvía.
+
+Con PgBouncer en modo transacción (DB_PGBOUNCER) un lock de sesión no es confiable; en ese caso
+el liderazgo se decide en cada ciclo con pg_try_advisory_xact_lock dentro de la transacción
+del reclamo.
+
+Variables de entorno:
+- EMAIL_QUEUE_ENABLED (true): false deja el bucle apagado en este proceso (los correos se encolan igual)
+- EMAIL_QUEUE_POLL_INTERVAL (5): segundos entre ciclos del despachador
+- EMAIL_QUEUE_BATCH_SIZE (20): correos reclamados por ciclo
+- EMAIL_QUEUE_MAX_ATTEMPTS (5): intentos antes de marcar el correo como fallido
+- EMAIL_QUEUE_RETRY_DELAY (60): segundos antes del primer reintento (se duplica en cada uno)
+- EMAIL_QUEUE_CLAIM_TIMEOUT (300): segundos tras los que un correo en `enviando` se libera
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from database import async_engine
+from schemas import EmailSchema
+from services.metricas import COLA_CORREOS, COLA_CORREOS_ATRASO, DESPACHADOR_LIDER, medir_tarea
+from services.pool_db import usa_pgbouncer
+
+EMAIL_QUEUE_ENABLED = os.getenv("EMAIL_QUEUE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "si", "sí", "on")
+EMAIL_QUEUE_POLL_INTERVAL = float(os.getenv("EMAIL_QUEUE_POLL_INTERVAL", "5"))
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv("EMAIL_QUEUE_BATCH_SIZE", "20"))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("EMAIL_QUEUE_MAX_ATTEMPTS", "5"))
+EMAIL_QUEUE_RETRY_DELAY = float(os.getenv("EMAIL_QUEUE_RETRY_DELAY", "60"))
+EMAIL_QUEUE_CLAIM_TIMEOUT = float(os.getenv("EMAIL_QUEUE_CLAIM_TIMEOUT", "300"))
+
+# Clave del advisory lock de líder ("GoVet" en ASCII); única entre los locks de la base
+_CLAVE_LIDER = 0x476F566574
+
+logger = logging.getLogger("govet.correos")
+
+_ENCOLAR = text("""
+    INSERT INTO govet.correo_programado (email, cuerpo, programado_para, disponible_desde)
+    VALUES (:email, :cuerpo, :programado_para, :programado_para)
+    RETURNING id_correo
+""")
+
+# Correos que quedaron en `enviando` porque el worker murió a mitad del envío
+_LIBERAR_ABANDONADOS = text("""
+    UPDATE govet.correo_programado
+    SET estado = 'pendiente', disponible_desde = now()
+    WHERE estado = 'enviando' AND reclamado_en < now() - make_interval(secs => :timeout)
+""")
+
+# SKIP LOCKED: un reclamo concurrente (otro líder durante un cambio de liderazgo) salta estas filas
+_RECLAMAR = text("""
+    UPDATE govet.correo_programado c
+    SET estado = 'enviando', intentos = c.intentos + 1, reclamado_en = now()
+    FROM (
+        SELECT id_correo FROM govet.correo_programado
+        WHERE estado = 'pendiente' AND disponible_desde <= now()
+        ORDER BY disponible_desde
+        LIMIT :lote
+        FOR UPDATE SKIP LOCKED
+    ) vencidos
+    WHERE c.id_correo = vencidos.id_correo
+    RETURNING c.id_correo, c.email, c.cuerpo, c.programado_para, c.intentos
+""")
+
+_MARCAR_ENVIADO = text("""
+    UPDATE govet.correo_programado
+    SET estado = 'enviado', enviado_en = now(), ultimo_error = NULL
+    WHERE id_correo = :id_correo
+""")
+
+_MARCAR_ERROR = text("""
+    UPDATE govet.correo_programado
+    SET estado = CASE WHEN intentos >= :max_intentos THEN 'fallido' ELSE 'pendiente' END,
+        disponible_desde = now() + make_interval(secs => :espera),
+        ultimo_error = :error
+    WHERE id_correo = :id_correo
+""")
+
+# Profundidad de la cola (usa el índice parcial de pendientes)
+_PROFUNDIDAD = text("""
+    SELECT count(*) AS pendientes,
+           count(*) FILTER (WHERE disponible_desde <= now()) AS vencidos,
+           COALESCE(EXTRACT(EPOCH FROM now() - min(disponible_desde)), 0) AS atraso
+    FROM govet.correo_programado
+    WHERE estado = 'pendiente'
+""")
+
+_POR_ESTADO = text("SELECT estado, count(*) FROM govet.correo_programado GROUP BY estado")
+
+
+async def encolar_correo(email: EmailSchema, fecha_envio: datetime) -> int:
+    """Guarda el correo para enviarlo en `fecha_envio` (sin zona horaria = UTC). Devuelve su id."""
+    if fecha_envio.tzinfo is None:
+        fecha_envio = fecha_envio.replace(tzinfo=timezone.utc)
+    async with async_engine.begin() as conn:
+        resultado = await conn.execute(_ENCOLAR, {
+            "email": email.email,
+            "cuerpo": email.cuerpo,
+            "programado_para": fecha_envio,
+        })
+        return resultado.scalar_one()
+
+
+class DespachadorCorreos:
+    """Bucle de despacho de un worker; solo actúa mientras este worker es el líder."""
+
+    def __init__(self):
+        self.enviar: Optional[Callable[[EmailSchema], Awaitable[None]]] = None
+        self.es_lider = False
+        self.ultimo_ciclo: Optional[datetime] = None
+        self.ultimo_error: Optional[str] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._motor_lider = None
+        self._conexion_lider: Optional[AsyncConnection] = None
+
+    def iniciar(self, enviar: Callable[[EmailSchema], Awaitable[None]]) -> None:
+        self.enviar = enviar
+        if EMAIL_QUEUE_ENABLED and self._tarea is None:
+            self._tarea = asyncio.create_task(self._bucle(), name="despachador-correos")
+
+    async def detener(self) -> None:
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self._soltar_liderazgo()
+        if self._motor_lider is not None:
+            await self._motor_lider.dispose()
+            self._motor_lider = None
+
+    # -------------------------------------------------------------------------
+    # Liderazgo
+    # -------------------------------------------------------------------------
+    def _marcar_lider(self, es_lider: bool) -> None:
+        if es_lider != self.es_lider:
+            logger.warning("Despachador de correos: %s líder (pid %s)", "es" if es_lider else "deja de ser", os.getpid())
+        self.es_lider = es_lider
+        DESPACHADOR_LIDER.set(1 if es_lider else 0)
+
+    async def _asegurar_liderazgo(self) -> bool:
+        """
+        Toma o confirma el lock de líder. La conexión es propia (NullPool, AUTOCOMMIT): el lock
+        vive mientras ella esté abierta y no ocupa una conexión del pool de la app.
+        """
+        if usa_pgbouncer():
+            # Se decide en cada reclamo con el lock de transacción
+            return True
+        if self._conexion_lider is not None:
+            # Si la conexión se cortó, el lock ya no es nuestro: se suelta y se reintenta
+            try:
+                await self._conexion_lider.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                await self._soltar_liderazgo()
+
+        if self._motor_lider is None:
+            self._motor_lider = create_async_engine(async_engine.url, poolclass=NullPool)
+        conexion = await self._motor_lider.connect()
+        try:
+            conexion = await conexion.execution_options(isolation_level="AUTOCOMMIT")
+            obtenido = (await conexion.execute(
+                text("SELECT pg_try_advisory_lock(:clave)"), {"clave": _CLAVE_LIDER}
+            )).scalar()
+        except Exception:
+            await conexion.close()
+            raise
+        if not obtenido:
+            await conexion.close()
+            self._marcar_lider(False)
+            return False
+        self._conexion_lider = conexion
+        self._marcar_lider(True)
+        return True
+
+    async def _soltar_liderazgo(self) -> None:
+        conexion, self._conexion_lider = self._conexion_lider, None
+        if conexion is not None:
+            # Cerrar la conexión suelta el lock de sesión aunque el unlock falle
+            try:
+                await conexion.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": _CLAVE_LIDER})
+            except Exception:
+                pass
+            try:
+                await conexion.close()
+            except Exception:
+                pass
+        self._marcar_lider(False)
+
+    # -------------------------------------------------------------------------
+    # Ciclo
+    # -------------------------------------------------------------------------
+    async def _bucle(self) -> None:
+        while True:
+            procesados = 0
+            try:
+                if await self._asegurar_liderazgo():
+                    procesados = await self._ciclo()
+                self.ultimo_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ultimo_error = f"{type(e).__name__}: {e}"[:500]
+                logger.exception("Error en el despachador de correos")
+                await self._soltar_liderazgo()
+            self.ultimo_ciclo = datetime.now(timezone.utc)
+            # Con el lote lleno probablemente quedan más vencidos: se sigue sin esperar
+            if procesados < EMAIL_QUEUE_BATCH_SIZE:
+                await asyncio.sleep(EMAIL_QUEUE_POLL_INTERVAL)
+
+    async def _reclamar(self) -> Optional[List[dict]]:
+        """Lote de correos vencidos ya marcados como `enviando`; None si otro worker es el líder."""
+        async with async_engine.begin() as conn:
+            if usa_pgbouncer():
+                obtenido = (await conn.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:clave)"), {"clave": _CLAVE_LIDER}
+                )).scalar()
+                self._marcar_lider(bool(obtenido))
+                if not obtenido:
+                    return None
+            await conn.execute(_LIBERAR_ABANDONADOS, {"timeout": EMAIL_QUEUE_CLAIM_TIMEOUT})
+            filas = (await conn.execute(_RECLAMAR, {"lote": EMAIL_QUEUE_BATCH_SIZE})).mappings().all()
+            profundidad = (await conn.execute(_PROFUNDIDAD)).mappings().one()
+        COLA_CORREOS.labels("pending").set(profundidad["pendientes"])
+        COLA_CORREOS.labels("due").set(profundidad["vencidos"])
+        COLA_CORREOS.labels("sending").set(len(filas))
+        COLA_CORREOS_ATRASO.set(float(profundidad["atraso"]) if profundidad["vencidos"] else 0.0)
+        return [dict(f) for f in filas]
+
+    async def _ciclo(self) -> int:
+        filas = await self._reclamar()
+        if not filas:
+            return 0
+        await asyncio.gather(*(self._despachar(fila) for fila in filas))
+        COLA_CORREOS.labels("sending").set(0)
+        return len(filas)
+
+    async def _despachar(self, fila: dict) -> None:
+        retraso = (datetime.now(timezone.utc) - fila["programado_para"]).total_seconds()
+        try:
+            with medir_tarea("correos", retraso):
+                await self.enviar(EmailSchema(email=fila["email"], cuerpo=fila["cuerpo"]))
+        except Exception as e:
+            espera = EMAIL_QUEUE_RETRY_DELAY * 2 ** (fila["intentos"] - 1)
+            logger.warning("Correo %s falló (intento %s): %s", fila["id_correo"], fila["intentos"], e)
+            async with async_engine.begin() as conn:
+                await conn.execute(_MARCAR_ERROR, {
+                    "id_correo": fila["id_correo"],
+                    "max_intentos": EMAIL_QUEUE_MAX_ATTEMPTS,
+                    "espera": espera,
+                    "error": f"{type(e).__name__}: {e}"[:1000],
+                })
+            return
+        async with async_engine.begin() as conn:
+            await conn.execute(_MARCAR_ENVIADO, {"id_correo": fila["id_correo"]})
+
+
+despachador = DespachadorCorreos()
+
+
+async def estado_correos() -> dict:
+    """Filas por estado y estado del despachador de este worker, para /internal/email-queue."""
+    async with async_engine.connect() as conn:
+        por_estado = {estado: total for estado, total in await conn.execute(_POR_ESTADO)}
+        profundidad = (await conn.execute(_PROFUNDIDAD)).mappings().one()
+    return {
+        "enabled": EMAIL_QUEUE_ENABLED,
+        "leader": despachador.es_lider,
+        "last_cycle": despachador.ultimo_ciclo.isoformat() if despachador.ultimo_ciclo else None,
+        "last_error": despachador.ultimo_error,
+        "by_state": por_estado,
+        "due": profundidad["vencidos"],
+        "oldest_due_s": round(float(profundidad["atraso"]), 1) if profundidad["vencidos"] else 0.0,
+    }
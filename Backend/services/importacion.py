@@ -0,0 +1,638 @@
+"""
+Importación masiva de tutores, pacientes y relaciones tutor-paciente desde planillas
+(xlsx o CSV), para poblar la base de una clínica nueva.
+
+Reemplaza el camino de rellenar_bd/script_tutores.py / script_pacientes.py /
+script_paciente_tutor.py (pandas.iterrows() + un INSERT por fila):
+
+1. El archivo se lee por bloques de IMPORT_CHUNK_SIZE filas (CSV con pandas `chunksize`,
+   xlsx con openpyxl en modo read_only): la memoria no crece con el tamaño del archivo.
+2. Cada bloque se valida y normaliza con operaciones vectorizadas de pandas: RUT (formato y
+   dígito verificador), teléfonos (9 dígitos nacionales), email, comuna/región (nombres del
+   catálogo de regiones_data.py), fechas, sexo. Las filas inválidas quedan en el reporte
+   con su número de fila y el motivo; los datos corregibles (un teléfono mal escrito, una
+   comuna desconocida) se descartan o se dejan tal cual y quedan como aviso.
+3. Las filas válidas se cargan con COPY a una tabla temporal.
+4. Al final, una sentencia INSERT ... SELECT ... ON CONFLICT por tabla las fusiona con los
+   datos existentes (DO NOTHING, o DO UPDATE con `actualizar`). Lo que solo se puede validar
+   contra la base (raza, paciente o tutor inexistente) se resuelve también en SQL sobre la
+   tabla temporal y se agrega al reporte.
+
+Todo corre en una transacción: con `simular` se valida y se informa el resultado sin guardar.
+Se usa desde importar.py (CLI) y desde POST /import/{entidad} (routers/importacion.py).
+
+Columnas reconocidas (sin distinguir mayúsculas ni tildes), además de los nombres de las
+columnas de la base:
+- tutores: Rut, Nombres, ApPaterno, ApMaterno, Telefono, Telefono2, Celular, Celular2, Email,
+  Observaciones, Region, Comuna, Direccion (o Calle + Numero)
+- pacientes: CÓDIGO MASCOTA, NOMBRE, COLOR, SEXO_SIGLA o SEXO, ESTERILIZADO, FECHA NACIMIENTO,
+  ID_RAZA (o RAZA + ESPECIE), CHIP
+- paciente_tutor: ID_MASCOTA, RUT_TUTOR_CON_DATOS o RUT, FECHA
+"""
+
+import csv
+import io
+import os
+import re
+import time
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from database import engine
+from regiones_data import REGIONES_CHILE
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+# Máximo de errores/avisos que se devuelven detallados (los totales siempre son exactos)
+IMPORT_MAX_DETALLE = int(os.getenv("IMPORT_MAX_DETALLE", "1000"))
+
+ENTIDADES = ("tutores", "pacientes", "paciente_tutor")
+
+# Hojas de Dbase/mascotas_modificado.xlsx; si el archivo no las tiene se usa la hoja activa
+HOJAS_POR_DEFECTO = {
+    "tutores": "clientes",
+    "pacientes": "Fichas clínicas",
+    "paciente_tutor": "paciente_tutor",
+}
+
+# Columna de destino -> encabezados aceptados (ya normalizados con _clave), en orden de preferencia
+COLUMNAS = {
+    "tutores": {
+        "rut": ["rut"],
+        "nombre": ["nombres", "nombre"],
+        "apellido_paterno": ["appaterno", "apellido_paterno"],
+        "apellido_materno": ["apmaterno", "apellido_materno"],
+        "telefono": ["telefono"],
+        "telefono2": ["telefono2"],
+        "celular": ["celular"],
+        "celular2": ["celular2"],
+        "email": ["email", "correo"],
+        "observacion": ["observaciones", "observacion"],
+        "region": ["region"],
+        "comuna": ["comuna"],
+        "direccion": ["direccion"],
+        "calle": ["calle"],
+        "numero": ["numero"],
+    },
+    "pacientes": {
+        "id_paciente": ["codigo_mascota", "id_paciente", "id_mascota"],
+        "nombre": ["nombre"],
+        "color": ["color"],
+        "sexo": ["sexo_sigla", "sexo"],
+        "esterilizado": ["esterilizado"],
+        "fecha_nacimiento": ["fecha_nacimiento"],
+        "id_raza": ["id_raza"],
+        "raza": ["raza"],
+        "especie": ["especie"],
+        "codigo_chip": ["chip", "codigo_chip"],
+    },
+    "paciente_tutor": {
+        "id_paciente": ["id_mascota", "id_paciente"],
+        "rut": ["rut_tutor_con_datos", "rut_tutor", "rut"],
+        "fecha": ["fecha"],
+    },
+}
+
+_PESOS_RUT = (3, 2, 7, 6, 5, 4, 3, 2)  # cuerpo de 8 dígitos, de izquierda a derecha
+_EMAIL_REGEX = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+
+
+def _clave(texto: str) -> str:
+    """Minúsculas, sin tildes y con '_' en vez de espacios/puntuación: 'CÓDIGO MASCOTA' -> 'codigo_mascota'."""
+    sin_tildes = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", sin_tildes.lower()).strip("_")
+
+
+def _claves_serie(serie: pd.Series) -> pd.Series:
+    """_clave vectorizada (para comparar comunas y regiones)."""
+    return (
+        serie.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+        .str.lower().str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+    )
+
+
+def _catalogo_territorial() -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+    """
+    Claves sin tildes -> nombres tal como los guarda el frontend (regiones_data.py):
+    (comunas, región de cada comuna, regiones). Las regiones se reconocen también sin el
+    número romano: "Región de Los Ríos" -> "XIV Región de Los Ríos".
+    """
+    comunas, region_de_comuna, regiones = {}, {}, {}
+    for region in REGIONES_CHILE:
+        nombre = region["name"]
+        regiones[_clave(nombre).replace("_", " ")] = nombre
+        prefijo = region["romanNumber"] + " "
+        if nombre.startswith(prefijo):
+            regiones.setdefault(_clave(nombre[len(prefijo):]).replace("_", " "), nombre)
+        for comuna in region["communes"]:
+            clave = _clave(comuna["name"]).replace("_", " ")
+            comunas[clave] = comuna["name"]
+            region_de_comuna[clave] = nombre
+    return comunas, region_de_comuna, regiones
+
+
+_COMUNAS, _REGION_DE_COMUNA, _REGIONES = _catalogo_territorial()
+
+
+class ResultadoImportacion:
+    """Conteos y detalle por fila de una importación."""
+
+    def __init__(self, entidad: str, max_detalle: Optional[int] = IMPORT_MAX_DETALLE):
+        self.entidad = entidad
+        self.max_detalle = max_detalle  # None = sin límite
+        self.filas_leidas = 0
+        self.insertadas = 0
+        self.actualizadas = 0
+        self.omitidas = 0
+        self.total_errores = 0
+        self.total_avisos = 0
+        self.errores: List[dict] = []
+        self.avisos: List[dict] = []
+        self.simulada = False
+        self.segundos = 0.0
+
+    def _agregar(self, lista: List[dict], filas, campo: str, mensaje: str) -> int:
+        cantidad = 0
+        for fila in filas:
+            cantidad += 1
+            if self.max_detalle is None or len(lista) < self.max_detalle:
+                lista.append({"fila": int(fila), "campo": campo, "mensaje": mensaje})
+        return cantidad
+
+    def error(self, filas, campo: str, mensaje: str) -> None:
+        """Filas rechazadas (no se importan)."""
+        self.total_errores += self._agregar(self.errores, filas, campo, mensaje)
+
+    def aviso(self, filas, campo: str, mensaje: str) -> None:
+        """Filas importadas con un dato descartado o sin normalizar."""
+        self.total_avisos += self._agregar(self.avisos, filas, campo, mensaje)
+
+    def como_dict(self) -> dict:
+        return {
+            "entidad": self.entidad,
+            "simulada": self.simulada,
+            "filas_leidas": self.filas_leidas,
+            "insertadas": self.insertadas,
+            "actualizadas": self.actualizadas,
+            "omitidas": self.omitidas,
+            "total_errores": self.total_errores,
+            "total_avisos": self.total_avisos,
+            "errores": sorted(self.errores, key=lambda e: e["fila"]),
+            "avisos": sorted(self.avisos, key=lambda e: e["fila"]),
+            "segundos": round(self.segundos, 3),
+        }
+
+
+# ---------------------------------------------------------------- lectura por bloques
+
+def _bloques_csv(archivo, tamano: int, encoding: str) -> Iterator[pd.DataFrame]:
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline="")
+    muestra = texto.readline()
+    separador = ";" if muestra.count(";") >= muestra.count(",") else ","
+    encabezados = next(csv.reader([muestra], delimiter=separador))
+    # Todo como texto: la normalización decide los tipos (un RUT o teléfono no es un número)
+    yield from pd.read_csv(
+        texto, sep=separador, names=encabezados, header=None, dtype=str,
+        chunksize=tamano, skip_blank_lines=True,
+    )
+
+
+def _celda(valor):
+    """Valor de openpyxl como texto: los números enteros sin '.0' y las fechas en ISO."""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _bloques_xlsx(archivo, tamano: int, hoja: Optional[str]) -> Iterator[pd.DataFrame]:
+    import openpyxl  # solo se necesita para planillas Excel
+
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        if hoja and hoja not in libro.sheetnames:
+            raise ValueError(f"La planilla no tiene la hoja '{hoja}' (hojas: {', '.join(libro.sheetnames)})")
+        filas = (libro[hoja] if hoja else libro.active).iter_rows(values_only=True)
+        encabezados = [_celda(v) or f"columna_{i}" for i, v in enumerate(next(filas, ()))]
+        ancho = len(encabezados)
+        bloque = []
+        for fila in filas:
+            if all(v is None for v in fila):
+                continue
+            # En modo read_only las filas pueden venir más cortas que el encabezado
+            valores = [_celda(v) for v in fila[:ancho]]
+            bloque.append(valores + [None] * (ancho - len(valores)))
+            if len(bloque) >= tamano:
+                yield pd.DataFrame(bloque, columns=encabezados)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezados)
+    finally:
+        libro.close()
+
+
+def leer_en_bloques(archivo, nombre_archivo: str, entidad: str, hoja: Optional[str] = None,
+                    tamano: int = IMPORT_CHUNK_SIZE, encoding: str = "utf-8-sig") -> Iterator[pd.DataFrame]:
+    """DataFrames de hasta `tamano` filas (todas las columnas como texto) de un xlsx o CSV."""
+    extension = os.path.splitext(nombre_archivo.lower())[1]
+    if extension in (".xlsx", ".xlsm"):
+        if hoja is None:
+            import openpyxl
+
+            hojas = openpyxl.load_workbook(archivo, read_only=True).sheetnames
+            archivo.seek(0)
+            hoja = HOJAS_POR_DEFECTO[entidad] if HOJAS_POR_DEFECTO[entidad] in hojas else None
+        return _bloques_xlsx(archivo, tamano, hoja)
+    if extension in (".csv", ".txt"):
+        return _bloques_csv(archivo, tamano, encoding)
+    raise ValueError("Formato no soportado: se aceptan archivos .xlsx o .csv")
+
+
+# ---------------------------------------------------------------- normalización vectorizada
+
+def _texto(serie: pd.Series) -> pd.Series:
+    """Texto sin espacios sobrantes; vacío -> NA."""
+    return serie.astype("string").str.strip().replace("", pd.NA)
+
+
+def _como_bool(serie: pd.Series) -> pd.Series:
+    return serie.fillna(False).astype(bool)
+
+
+def normalizar_ruts(serie: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    (RUT 'cuerpo-dv' en minúsculas y sin puntos, máscara de RUT válido). Se valida el dígito
+    verificador (módulo 11). Se mantiene el cuerpo tal como viene (con ceros a la izquierda si
+    los trae) para que coincida con lo ya cargado por los scripts de rellenar_bd.
+    """
+    limpio = _texto(serie).str.lower().str.replace(r"[.\s\-]", "", regex=True)
+    forma = _como_bool(limpio.str.fullmatch(r"\d{7,8}[\dk]"))
+    cuerpo = limpio.str[:-1]
+    dv = limpio.str[-1]
+    digitos = cuerpo.where(forma, "0").str.zfill(8)
+    suma = sum(digitos.str[i].astype(int) * peso for i, peso in enumerate(_PESOS_RUT))
+    esperado = (11 - suma % 11).astype(str).replace({"11": "0", "10": "k"})
+    valido = forma & _como_bool(dv == esperado)
+    return (cuerpo + "-" + dv).where(valido), valido
+
+
+def normalizar_telefonos(serie: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """(teléfono de 9 dígitos como Int64, máscara de valor presente pero inválido)."""
+    texto = _texto(serie)
+    digitos = texto.str.replace(r"\D", "", regex=True)
+    con_prefijo = _como_bool(digitos.str.len().eq(11) & digitos.str.startswith("56"))
+    digitos = digitos.mask(con_prefijo, digitos.str[-9:])
+    valido = _como_bool(digitos.str.fullmatch(r"[2-9]\d{8}"))
+    invalido = texto.notna().to_numpy() & ~valido
+    return pd.to_numeric(digitos.where(valido), errors="coerce").astype("Int64"), invalido
+
+
+def normalizar_fechas(serie: pd.Series) -> pd.Series:
+    """Fechas ISO (2020-08-26) o día-mes-año (26-08-2020, 26/08/2020); inválidas -> NaT."""
+    texto = _texto(serie).str.slice(0, 10)
+    fechas = pd.to_datetime(texto, format="%Y-%m-%d", errors="coerce")
+    faltantes = fechas.isna()
+    if faltantes.any():
+        fechas[faltantes] = pd.to_datetime(texto[faltantes].str.replace("/", "-"), format="%d-%m-%Y", errors="coerce")
+    return fechas
+
+
+def _seleccionar_columnas(df: pd.DataFrame, entidad: str) -> pd.DataFrame:
+    """Renombra los encabezados de la planilla a las columnas de destino (las faltantes quedan NA)."""
+    por_clave = {}
+    for columna in df.columns:
+        por_clave.setdefault(_clave(columna), columna)
+    salida = pd.DataFrame(index=df.index)
+    for destino, alias in COLUMNAS[entidad].items():
+        origen = next((por_clave[a] for a in alias if a in por_clave), None)
+        salida[destino] = df[origen] if origen is not None else pd.Series(pd.NA, index=df.index, dtype="string")
+    return salida
+
+
+def _rechazar(df: pd.DataFrame, mascara, campo: str, mensaje: str, resultado: ResultadoImportacion) -> pd.DataFrame:
+    mascara = np.asarray(mascara, dtype=bool)
+    if mascara.any():
+        resultado.error(df["fila"][mascara], campo, mensaje)
+        return df[~mascara]
+    return df
+
+
+def preparar_tutores(df: pd.DataFrame, resultado: ResultadoImportacion) -> pd.DataFrame:
+    datos = _seleccionar_columnas(df, "tutores")
+    salida = pd.DataFrame({"fila": df["fila"]})
+
+    salida["rut"], rut_valido = normalizar_ruts(datos["rut"])
+    for campo in ("nombre", "apellido_paterno", "apellido_materno", "observacion"):
+        salida[campo] = _texto(datos[campo])
+    for campo in ("telefono", "telefono2", "celular", "celular2"):
+        salida[campo], invalido = normalizar_telefonos(datos[campo])
+        resultado.aviso(salida["fila"][invalido], campo, "Teléfono inválido (se esperaban 9 dígitos), se omite")
+
+    email = _texto(datos["email"]).str.lower()
+    email_invalido = _como_bool(email.notna() & ~_como_bool(email.str.fullmatch(_EMAIL_REGEX)))
+    resultado.aviso(salida["fila"][email_invalido], "email", "Email inválido, se omite")
+    salida["email"] = email.mask(email_invalido)
+
+    # Comuna y región con los nombres del catálogo (los mismos que guarda el frontend)
+    comuna = _texto(datos["comuna"])
+    clave_comuna = _claves_serie(comuna)
+    comuna_catalogo = clave_comuna.map(_COMUNAS)
+    desconocida = _como_bool(comuna.notna() & comuna_catalogo.isna())
+    resultado.aviso(salida["fila"][desconocida], "comuna", "Comuna no encontrada en el catálogo, se guarda tal cual")
+    salida["comuna"] = comuna_catalogo.fillna(comuna)
+    region = _texto(datos["region"])
+    salida["region"] = clave_comuna.map(_REGION_DE_COMUNA).fillna(_claves_serie(region).map(_REGIONES)).fillna(region)
+
+    # Dirección: columna Direccion, o Calle-Numero como en tutores.csv
+    calle_numero = _texto(datos["calle"]).str.cat(_texto(datos["numero"]), sep="-", na_rep="").str.strip("-").replace("", pd.NA)
+    salida["direccion"] = _texto(datos["direccion"]).fillna(calle_numero)
+
+    rut_presente = _texto(datos["rut"]).notna().to_numpy(dtype=bool)
+    salida = _rechazar(salida, rut_presente & ~rut_valido.to_numpy(dtype=bool), "rut",
+                       "RUT inválido (formato o dígito verificador)", resultado)
+    salida = _rechazar(salida, salida["rut"].isna(), "rut", "Falta el RUT", resultado)
+    return _rechazar(salida, salida["nombre"].isna(), "nombre", "Falta el nombre", resultado)
+
+
+def preparar_pacientes(df: pd.DataFrame, resultado: ResultadoImportacion) -> pd.DataFrame:
+    datos = _seleccionar_columnas(df, "pacientes")
+    salida = pd.DataFrame({"fila": df["fila"]})
+
+    id_texto = _texto(datos["id_paciente"])
+    salida["id_paciente"] = pd.to_numeric(id_texto, errors="coerce").astype("Int64")
+    salida["nombre"] = _texto(datos["nombre"])
+    salida["color"] = _texto(datos["color"])
+    # SEXO_SIGLA (H/M) o SEXO (Hembra/Macho)
+    salida["sexo"] = _texto(datos["sexo"]).str.upper().str[0]
+    esterilizado = _texto(datos["esterilizado"]).str.lower()
+    salida["esterilizado"] = esterilizado.map(
+        {"1": True, "si": True, "sí": True, "true": True, "s": True,
+         "0": False, "no": False, "false": False, "n": False}
+    ).astype("boolean")
+    fechas = normalizar_fechas(datos["fecha_nacimiento"])
+    salida["fecha_nacimiento"] = fechas.dt.strftime("%Y-%m-%d")
+    salida["id_raza"] = pd.to_numeric(_texto(datos["id_raza"]), errors="coerce").astype("Int64")
+    salida["raza"] = _texto(datos["raza"])
+    salida["especie"] = _texto(datos["especie"])
+    salida["codigo_chip"] = _texto(datos["codigo_chip"])
+
+    hoy = pd.Timestamp.today().normalize()
+    salida = _rechazar(salida, (id_texto.notna() & salida["id_paciente"].isna()).to_numpy(dtype=bool),
+                       "id_paciente", "Código de mascota no numérico", resultado)
+    salida = _rechazar(salida, salida["nombre"].isna(), "nombre", "Falta el nombre", resultado)
+    salida = _rechazar(salida, salida["color"].isna(), "color", "Falta el color", resultado)
+    salida = _rechazar(salida, ~_como_bool(salida["sexo"].isin(["H", "M"])), "sexo", "Sexo debe ser H/M (Hembra/Macho)", resultado)
+    fechas = fechas.loc[salida.index]
+    salida = _rechazar(salida, (fechas.isna() | (fechas > hoy)).to_numpy(), "fecha_nacimiento",
+                       "Fecha de nacimiento inválida o futura", resultado)
+    return _rechazar(salida, (salida["id_raza"].isna() & salida["raza"].isna()).to_numpy(dtype=bool),
+                     "id_raza", "Falta la raza (ID_RAZA o RAZA)", resultado)
+
+
+def preparar_paciente_tutor(df: pd.DataFrame, resultado: ResultadoImportacion) -> pd.DataFrame:
+    datos = _seleccionar_columnas(df, "paciente_tutor")
+    salida = pd.DataFrame({"fila": df["fila"]})
+    salida["id_paciente"] = pd.to_numeric(_texto(datos["id_paciente"]), errors="coerce").astype("Int64")
+    salida["rut"], rut_valido = normalizar_ruts(datos["rut"])
+    salida["fecha"] = normalizar_fechas(datos["fecha"]).dt.strftime("%Y-%m-%d")
+
+    salida = _rechazar(salida, salida["id_paciente"].isna().to_numpy(dtype=bool), "id_paciente",
+                       "Falta el código de mascota", resultado)
+    return _rechazar(salida, ~rut_valido.loc[salida.index].to_numpy(), "rut",
+                     "RUT del tutor inválido o faltante", resultado)
+
+
+_PREPARAR = {
+    "tutores": preparar_tutores,
+    "pacientes": preparar_pacientes,
+    "paciente_tutor": preparar_paciente_tutor,
+}
+
+
+# ---------------------------------------------------------------- carga (COPY) y fusión
+
+_TABLAS_TEMPORALES = {
+    "tutores": """
+        CREATE TEMP TABLE imp_tutor (
+            fila int NOT NULL, rut varchar, nombre varchar, apellido_paterno varchar,
+            apellido_materno varchar, observacion varchar, telefono int8, telefono2 int8,
+            celular int8, celular2 int8, email varchar, comuna varchar, region varchar,
+            direccion varchar
+        ) ON COMMIT DROP
+    """,
+    "pacientes": """
+        CREATE TEMP TABLE imp_paciente (
+            fila int NOT NULL, id_paciente int8, nombre varchar, color varchar, sexo bpchar(1),
+            esterilizado bool, fecha_nacimiento date, id_raza int8, raza varchar, especie varchar,
+            codigo_chip varchar
+        ) ON COMMIT DROP
+    """,
+    "paciente_tutor": """
+        CREATE TEMP TABLE imp_paciente_tutor (
+            fila int NOT NULL, id_paciente int8, rut varchar, fecha date
+        ) ON COMMIT DROP
+    """,
+}
+_TABLA_TEMPORAL = {"tutores": "imp_tutor", "pacientes": "imp_paciente", "paciente_tutor": "imp_paciente_tutor"}
+
+
+def _copiar(cur, tabla: str, df: pd.DataFrame) -> None:
+    """COPY del bloque a la tabla temporal (CSV en memoria; NA -> NULL)."""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {tabla} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _avisar_repetidas(cur, tabla: str, clave: str, campo: str, resultado: ResultadoImportacion) -> None:
+    """Claves repetidas en el archivo: se usa la última aparición."""
+    cur.execute(f"""
+        SELECT fila FROM (
+            SELECT fila, row_number() OVER (PARTITION BY {clave} ORDER BY fila DESC) AS n FROM {tabla}
+        ) t WHERE n > 1
+    """)
+    resultado.aviso((f for (f,) in cur.fetchall()), campo, "Repetido en el archivo, se usa la última aparición")
+
+
+def _contar(cur, sql: str, resultado: ResultadoImportacion) -> None:
+    """Ejecuta un INSERT ... RETURNING (xmax = 0) y suma insertadas / actualizadas."""
+    cur.execute(f"""
+        WITH cambios AS ({sql})
+        SELECT count(*) FILTER (WHERE insertada), count(*) FILTER (WHERE NOT insertada) FROM cambios
+    """)
+    insertadas, actualizadas = cur.fetchone()
+    resultado.insertadas += insertadas
+    resultado.actualizadas += actualizadas
+
+
+def _fusionar_tutores(cur, actualizar: bool, resultado: ResultadoImportacion) -> int:
+    _avisar_repetidas(cur, "imp_tutor", "rut", "rut", resultado)
+    columnas = ["nombre", "apellido_paterno", "apellido_materno", "observacion", "telefono", "telefono2",
+                "celular", "celular2", "email", "comuna", "region", "direccion"]
+    if actualizar:
+        # Lo que viene vacío en la planilla no borra lo que ya estaba
+        conflicto = "DO UPDATE SET " + ", ".join(f"{c} = coalesce(EXCLUDED.{c}, t.{c})" for c in columnas)
+    else:
+        conflicto = "DO NOTHING"
+    _contar(cur, f"""
+        INSERT INTO govet.tutor AS t (rut, {', '.join(columnas)}, activo)
+        SELECT DISTINCT ON (rut) rut, {', '.join(columnas)}, true
+        FROM imp_tutor ORDER BY rut, fila DESC
+        ON CONFLICT (rut) {conflicto}
+        RETURNING (xmax = 0) AS insertada
+    """, resultado)
+    cur.execute("SELECT count(DISTINCT rut) FROM imp_tutor")
+    return cur.fetchone()[0]
+
+
+def _fusionar_pacientes(cur, actualizar: bool, resultado: ResultadoImportacion) -> int:
+    # Raza por nombre (y especie, común o científica) cuando no viene ID_RAZA
+    cur.execute("""
+        UPDATE imp_paciente i SET id_raza = r.id_raza
+        FROM govet.raza r JOIN govet.especie e ON e.id_especie = r.id_especie
+        WHERE i.id_raza IS NULL
+            AND lower(r.nombre) = lower(i.raza)
+            AND (i.especie IS NULL OR lower(i.especie) IN (lower(e.nombre_comun), lower(e.nombre_cientifico)))
+    """)
+    cur.execute("""
+        DELETE FROM imp_paciente i
+        WHERE i.id_raza IS NULL OR NOT EXISTS (SELECT 1 FROM govet.raza r WHERE r.id_raza = i.id_raza)
+        RETURNING fila
+    """)
+    resultado.error((f for (f,) in cur.fetchall()), "id_raza", "Raza no encontrada")
+    _avisar_repetidas(cur, "imp_paciente", "id_paciente", "id_paciente", resultado)
+
+    columnas = ["nombre", "color", "sexo", "esterilizado", "fecha_nacimiento", "id_raza", "codigo_chip"]
+    if actualizar:
+        conflicto = "DO UPDATE SET " + ", ".join(f"{c} = coalesce(EXCLUDED.{c}, p.{c})" for c in columnas)
+    else:
+        conflicto = "DO NOTHING"
+    # Con código de mascota: se respeta el id (las relaciones tutor-paciente lo usan)
+    _contar(cur, f"""
+        INSERT INTO govet.paciente AS p (id_paciente, {', '.join(columnas)}, activo)
+        SELECT DISTINCT ON (id_paciente) id_paciente, {', '.join(columnas)}, true
+        FROM imp_paciente WHERE id_paciente IS NOT NULL ORDER BY id_paciente, fila DESC
+        ON CONFLICT (id_paciente) {conflicto}
+        RETURNING (xmax = 0) AS insertada
+    """, resultado)
+    # Sin código: id de la secuencia
+    _contar(cur, f"""
+        INSERT INTO govet.paciente ({', '.join(columnas)}, activo)
+        SELECT {', '.join(columnas)}, true FROM imp_paciente WHERE id_paciente IS NULL ORDER BY fila
+        RETURNING true AS insertada
+    """, resultado)
+    # Los ids explícitos no avanzan la secuencia: se deja después del mayor id. La secuencia de
+    # generador_schema.sql (mascota_id_mascota_seq) no pertenece a la columna y
+    # pg_get_serial_sequence no la encuentra; la de create_all (migrar.py) sí.
+    cur.execute("""
+        SELECT setval(s.secuencia, greatest(
+            (SELECT max(id_paciente) FROM govet.paciente),
+            pg_sequence_last_value(s.secuencia)
+        ))
+        FROM (
+            SELECT coalesce(
+                pg_get_serial_sequence('govet.paciente', 'id_paciente')::regclass,
+                to_regclass('govet.mascota_id_mascota_seq')
+            ) AS secuencia
+        ) s
+        WHERE EXISTS (SELECT 1 FROM imp_paciente WHERE id_paciente IS NOT NULL)
+    """)
+    cur.execute("SELECT count(DISTINCT id_paciente) + count(*) FILTER (WHERE id_paciente IS NULL) FROM imp_paciente")
+    return cur.fetchone()[0]
+
+
+def _fusionar_paciente_tutor(cur, actualizar: bool, resultado: ResultadoImportacion) -> int:
+    cur.execute("""
+        DELETE FROM imp_paciente_tutor i
+        WHERE NOT EXISTS (SELECT 1 FROM govet.paciente p WHERE p.id_paciente = i.id_paciente)
+        RETURNING fila
+    """)
+    resultado.error((f for (f,) in cur.fetchall()), "id_paciente", "Paciente no encontrado")
+    cur.execute("""
+        DELETE FROM imp_paciente_tutor i
+        WHERE NOT EXISTS (SELECT 1 FROM govet.tutor t WHERE t.rut = i.rut)
+        RETURNING fila
+    """)
+    resultado.error((f for (f,) in cur.fetchall()), "rut", "Tutor no encontrado")
+    _avisar_repetidas(cur, "imp_paciente_tutor", "id_paciente, rut", "rut", resultado)
+
+    # tutor_paciente no tiene clave primaria en la base: no hay ON CONFLICT posible, se
+    # excluyen las asociaciones existentes con NOT EXISTS (o se actualiza su fecha)
+    if actualizar:
+        cur.execute("""
+            UPDATE govet.tutor_paciente tp SET fecha = i.fecha
+            FROM (SELECT DISTINCT ON (id_paciente, rut) id_paciente, rut, fecha
+                  FROM imp_paciente_tutor ORDER BY id_paciente, rut, fila DESC) i
+            WHERE tp.id_paciente = i.id_paciente AND tp.rut = i.rut
+                AND i.fecha IS NOT NULL AND tp.fecha IS DISTINCT FROM i.fecha
+        """)
+        resultado.actualizadas += cur.rowcount
+    cur.execute("""
+        INSERT INTO govet.tutor_paciente (id_paciente, rut, fecha)
+        SELECT DISTINCT ON (id_paciente, rut) id_paciente, rut, fecha
+        FROM imp_paciente_tutor i
+        WHERE NOT EXISTS (
+            SELECT 1 FROM govet.tutor_paciente tp WHERE tp.id_paciente = i.id_paciente AND tp.rut = i.rut
+        )
+        ORDER BY id_paciente, rut, fila DESC
+    """)
+    resultado.insertadas += cur.rowcount
+    cur.execute("SELECT count(*) FROM (SELECT DISTINCT id_paciente, rut FROM imp_paciente_tutor) t")
+    return cur.fetchone()[0]
+
+
+_FUSIONAR = {
+    "tutores": _fusionar_tutores,
+    "pacientes": _fusionar_pacientes,
+    "paciente_tutor": _fusionar_paciente_tutor,
+}
+
+
+def importar(archivo, nombre_archivo: str, entidad: str, actualizar: bool = False, simular: bool = False,
+             hoja: Optional[str] = None, tamano_bloque: int = IMPORT_CHUNK_SIZE,
+             encoding: str = "utf-8-sig", max_detalle: Optional[int] = IMPORT_MAX_DETALLE) -> ResultadoImportacion:
+    """
+    Importa un archivo (objeto binario abierto) de tutores, pacientes o relaciones
+    paciente_tutor. Lanza ValueError si el archivo o la entidad no son válidos; los problemas
+    de cada fila quedan en el resultado.
+    """
+    if entidad not in ENTIDADES:
+        raise ValueError(f"Entidad desconocida: {entidad} (opciones: {', '.join(ENTIDADES)})")
+    inicio = time.perf_counter()
+    resultado = ResultadoImportacion(entidad, max_detalle)
+    resultado.simulada = simular
+    tabla = _TABLA_TEMPORAL[entidad]
+
+    conexion = engine.raw_connection()
+    try:
+        cur = conexion.cursor()
+        cur.execute(_TABLAS_TEMPORALES[entidad])
+        primera_fila = 2  # fila 1: encabezados
+        for bloque in leer_en_bloques(archivo, nombre_archivo, entidad, hoja=hoja, tamano=tamano_bloque, encoding=encoding):
+            bloque = bloque.reset_index(drop=True)
+            bloque["fila"] = np.arange(primera_fila, primera_fila + len(bloque))
+            primera_fila += len(bloque)
+            resultado.filas_leidas += len(bloque)
+            validas = _PREPARAR[entidad](bloque, resultado)
+            if len(validas):
+                _copiar(cur, tabla, validas)
+
+        distintas = _FUSIONAR[entidad](cur, actualizar, resultado)
+        resultado.omitidas = distintas - resultado.insertadas - resultado.actualizadas
+        if simular:
+            conexion.rollback()
+        else:
+            conexion.commit()
+    except Exception:
+        conexion.rollback()
+        raise
+    finally:
+        conexion.close()
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
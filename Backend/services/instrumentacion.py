@@ -0,0 +1,201 @@
+"""
+Instrumentación SQL por request: cuántas sentencias ejecuta cada request, cuánto tiempo pasa
+en la base, cuántas filas trae y qué tan ocupado estaba el threadpool al llegar.
+
+- Los eventos before/after_cursor_execute de cada motor suman en la medición del request
+  actual (una ContextVar). El contexto llega a los endpoints síncronos (threadpool de anyio)
+  y a los async (greenlets de SQLAlchemy), así que cuentan los dos motores.
+- La ocupación del threadpool (hilos en uso y tareas esperando uno) se lee al inicio del
+  request del limitador por defecto de anyio, el que usan FastAPI y Starlette para los
+  endpoints y dependencias síncronas. No se mide la espera de cada llamada: eso obligaría a
+  reemplazar anyio.to_thread.run_sync en todo el proceso.
+- InstrumentacionSQLMiddleware crea la medición, agrega las cabeceras `Server-Timing` y
+  `X-DB-Queries` a la respuesta y, al terminar, escribe una línea JSON en el logger
+  `govet.requests`.
+
+Variables de entorno:
+- SQL_INSTRUMENTATION (true): false desactiva middleware y eventos
+- SQL_QUERY_WARN_THRESHOLD (25): con más sentencias que esto en un request, la línea se escribe
+  como WARNING con la sentencia más repetida (típico de un N+1, p. ej. una consulta por
+  paciente dentro de pacientes_to_response)
+- SQL_LOG_LEVEL (WARNING): INFO escribe una línea por cada request; WARNING solo las alertas
+"""
+
+import json
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from anyio.to_thread import current_default_thread_limiter
+from sqlalchemy import event
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "true").strip().lower() in ("1", "true", "yes", "si", "sí", "on")
+SQL_QUERY_WARN_THRESHOLD = int(os.getenv("SQL_QUERY_WARN_THRESHOLD", "25"))
+SQL_LOG_LEVEL = os.getenv("SQL_LOG_LEVEL", "WARNING").upper()
+
+logger = logging.getLogger("govet.requests")
+
+
+class MedicionRequest:
+    """Acumulados de un request. La mutan los hilos del threadpool; cada suma es atómica con el GIL."""
+
+    __slots__ = ("inicio", "consultas", "tiempo_db", "filas", "hilos_en_uso", "hilos_esperando", "sentencias")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.filas = 0
+        self.hilos_en_uso, self.hilos_esperando = _ocupacion_threadpool()
+        self.sentencias = Counter()
+
+
+_medicion: ContextVar[Optional[MedicionRequest]] = ContextVar("medicion_request", default=None)
+
+
+def medicion_actual() -> Optional[MedicionRequest]:
+    return _medicion.get()
+
+
+# =============================================================================
+# Eventos de SQLAlchemy
+# =============================================================================
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if _medicion.get() is not None:
+        context._instr_inicio = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion.get()
+    inicio = getattr(context, "_instr_inicio", None)
+    if medicion is None or inicio is None:
+        return
+    medicion.consultas += 1
+    medicion.tiempo_db += time.perf_counter() - inicio
+    medicion.sentencias[statement] += 1
+    # psycopg2 informa en rowcount las filas de un SELECT; el cursor adaptado de asyncpg deja
+    # -1 y guarda las filas ya leídas en _rows
+    filas = cursor.rowcount
+    if filas is None or filas < 0:
+        filas = len(getattr(cursor, "_rows", ()) or ())
+    medicion.filas += filas
+
+
+def _instrumentar_motor(motor) -> None:
+    if not event.contains(motor, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(motor, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(motor, "after_cursor_execute", _despues_de_ejecutar)
+
+
+# =============================================================================
+# Ocupación del threadpool
+# =============================================================================
+def _ocupacion_threadpool() -> tuple:
+    """(hilos en uso, tareas esperando un hilo) del limitador por defecto de anyio."""
+    try:
+        limitador = current_default_thread_limiter()
+        return int(limitador.borrowed_tokens), limitador.statistics().tasks_waiting
+    except RuntimeError:
+        # Fuera del event loop (no pasa en un request, pero la medición no debe fallar)
+        return None, None
+
+
+def _configurar_logger() -> None:
+    if logger.handlers:
+        return
+    manejador = logging.StreamHandler()
+    manejador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(manejador)
+    logger.setLevel(getattr(logging, SQL_LOG_LEVEL, logging.WARNING))
+    logger.propagate = False
+
+
+# =============================================================================
+# Middleware
+# =============================================================================
+def _ms(segundos: float) -> float:
+    return round(segundos * 1000, 2)
+
+
+class InstrumentacionSQLMiddleware:
+    """Middleware ASGI (como StripAPIPrefixMiddleware): no envuelve la respuesta en otra tarea."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = MedicionRequest()
+        token = _medicion.set(medicion)
+        estado = {"codigo": 500}
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["codigo"] = mensaje["status"]
+                app_ms = _ms(time.perf_counter() - medicion.inicio)
+                cabeceras = list(mensaje.get("headers", []))
+                cabeceras.append((b"x-db-queries", str(medicion.consultas).encode()))
+                cabeceras.append((
+                    b"server-timing",
+                    (
+                        f'db;dur={_ms(medicion.tiempo_db)};desc="{medicion.consultas} consultas", '
+                        f"app;dur={app_ms}"
+                    ).encode(),
+                ))
+                mensaje = {**mensaje, "headers": cabeceras}
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicion.reset(token)
+            self._registrar(scope, estado["codigo"], medicion)
+
+    @staticmethod
+    def _registrar(scope, codigo: int, medicion: MedicionRequest) -> None:
+        alerta = medicion.consultas > SQL_QUERY_WARN_THRESHOLD
+        nivel = logging.WARNING if alerta else logging.INFO
+        if not logger.isEnabledFor(nivel):
+            return
+        # Plantilla de la ruta (p. ej. /pacientes/{id_paciente}) para agrupar en los logs
+        ruta = getattr(scope.get("route"), "path", None) or scope.get("path")
+        linea = {
+            "evento": "request",
+            "metodo": scope.get("method"),
+            "ruta": ruta,
+            "estado": codigo,
+            "duracion_ms": _ms(time.perf_counter() - medicion.inicio),
+            "db_consultas": medicion.consultas,
+            "db_ms": _ms(medicion.tiempo_db),
+            "db_filas": medicion.filas,
+            "threadpool_hilos_en_uso": medicion.hilos_en_uso,
+            "threadpool_esperando": medicion.hilos_esperando,
+        }
+        if alerta:
+            sentencia, repeticiones = medicion.sentencias.most_common(1)[0]
+            linea.update({
+                "alerta": "posible N+1",
+                "umbral": SQL_QUERY_WARN_THRESHOLD,
+                "sentencia_mas_repetida": " ".join(sentencia.split())[:300],
+                "repeticiones": repeticiones,
+            })
+        logger.log(nivel, json.dumps(linea, ensure_ascii=False))
+
+
+def instalar_instrumentacion(app, *motores) -> None:
+    """
+    Agrega el middleware (como el más externo, para medir el request completo) y engancha los
+    eventos en los motores síncronos dados (para los async, pasar `.sync_engine`).
+    """
+    if not SQL_INSTRUMENTATION:
+        return
+    for motor in motores:
+        _instrumentar_motor(motor)
+    _configurar_logger()
+    app.add_middleware(InstrumentacionSQLMiddleware)
@@ -0,0 +1,272 @@
+"""
+Métricas Prometheus del backend (GET /metrics).
+
+- HTTP: latencia por método, plantilla de ruta (p. ej. /pacientes/{id_paciente}) y código,
+  y requests en curso.
+- Pools de conexiones: tamaño, conexiones en uso, overflow, llamadores esperando y espera
+  del checkout (ver services/pool_db.py).
+- Cola de correos programados (services/correos_programados.py): profundidad, atraso del
+  vencido más antiguo, worker líder, y retraso, duración y resultado de cada envío.
+- Llamadas salientes (Google Calendar, SMTP y whatsapp-ms): latencia y resultado.
+- PDF: tiempo de render de WeasyPrint por documento.
+
+Con varios workers de uvicorn cada proceso escribe sus valores en archivos dentro de
+PROMETHEUS_MULTIPROC_DIR y /metrics los suma al responder (modo multiproceso de
+prometheus_client). La carpeta debe quedar vacía antes de arrancar los workers (el CMD del
+dockerfile la limpia). Sin la variable, cada proceso expone solo sus propias métricas.
+
+Variables de entorno:
+- PROMETHEUS_MULTIPROC_DIR (vacío): carpeta compartida por los workers
+- METRICS_TOKEN (vacío): si se define, /metrics exige `Authorization: Bearer <token>`
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+# prometheus_client decide el modo multiproceso al importarse: la carpeta tiene que existir antes
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from sqlalchemy import event
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+_BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_BUCKETS_LENTOS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 30)
+_BUCKETS_RETRASO = (0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600)
+
+# =============================================================================
+# Definiciones
+# =============================================================================
+HTTP_DURACION = Histogram(
+    "govet_http_request_duration_seconds", "Duración de los requests HTTP",
+    ["method", "route", "status"], buckets=_BUCKETS_HTTP,
+)
+HTTP_EN_CURSO = Gauge(
+    "govet_http_requests_in_progress", "Requests HTTP en curso", multiprocess_mode="livesum",
+)
+
+POOL_TAMANO = Gauge(
+    "govet_db_pool_size", "Conexiones fijas del pool", ["pool"], multiprocess_mode="livesum",
+)
+POOL_EN_USO = Gauge(
+    "govet_db_pool_checked_out", "Conexiones entregadas", ["pool"], multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "govet_db_pool_overflow", "Conexiones abiertas sobre pool_size", ["pool"], multiprocess_mode="livesum",
+)
+POOL_ESPERANDO = Gauge(
+    "govet_db_pool_waiters", "Llamadores esperando una conexión libre", ["pool"], multiprocess_mode="livesum",
+)
+POOL_ESPERA = Histogram(
+    "govet_db_pool_checkout_wait_seconds", "Espera por una conexión del pool",
+    ["pool"], buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+POOL_TIMEOUTS = Counter(
+    "govet_db_pool_checkout_timeouts_total", "Checkouts que vencieron DB_POOL_TIMEOUT", ["pool"],
+)
+
+COLA_CORREOS = Gauge(
+    "govet_email_queue_depth", "Correos programados por estado (pending, due, sending)",
+    ["state"], multiprocess_mode="livemostrecent",
+)
+COLA_CORREOS_ATRASO = Gauge(
+    "govet_email_queue_oldest_due_seconds", "Antigüedad del correo vencido más antiguo sin despachar",
+    multiprocess_mode="livemostrecent",
+)
+DESPACHADOR_LIDER = Gauge(
+    "govet_email_dispatcher_leader", "1 en el worker que despacha la cola de correos", multiprocess_mode="livesum",
+)
+SCHEDULER_EJECUCIONES = Counter(
+    "govet_scheduler_jobs_total", "Tareas ejecutadas por resultado", ["scheduler", "result"],
+)
+SCHEDULER_RETRASO = Histogram(
+    "govet_scheduler_job_lag_seconds", "Retraso entre la hora programada y el despacho de la tarea",
+    ["scheduler"], buckets=_BUCKETS_RETRASO,
+)
+SCHEDULER_DURACION = Histogram(
+    "govet_scheduler_job_duration_seconds", "Duración de las tareas programadas",
+    ["scheduler"], buckets=_BUCKETS_LENTOS,
+)
+
+EXTERNO_DURACION = Histogram(
+    "govet_outbound_request_duration_seconds", "Latencia de las llamadas a servicios externos",
+    ["service", "operation"], buckets=_BUCKETS_LENTOS,
+)
+EXTERNO_LLAMADAS = Counter(
+    "govet_outbound_requests_total", "Llamadas a servicios externos por resultado",
+    ["service", "operation", "result"],
+)
+
+PDF_RENDER = Histogram(
+    "govet_pdf_render_seconds", "Tiempo de render de PDF con WeasyPrint",
+    ["document"], buckets=_BUCKETS_LENTOS,
+)
+
+
+# =============================================================================
+# HTTP
+# =============================================================================
+class MetricasHTTPMiddleware:
+    """Middleware ASGI (como InstrumentacionSQLMiddleware) que mide cada request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = {"codigo": 500}
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["codigo"] = mensaje["status"]
+            await send(mensaje)
+
+        HTTP_EN_CURSO.inc()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            HTTP_EN_CURSO.dec()
+            # Plantilla de la ruta y no el path, para no crear una serie por id; sin ruta (404) se agrupan
+            ruta = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_DURACION.labels(scope.get("method"), ruta, str(estado["codigo"])).observe(
+                time.perf_counter() - inicio
+            )
+
+
+# =============================================================================
+# Pools de conexiones
+# =============================================================================
+def _actualizar_pool(nombre: str, pool, devolviendo: int = 0) -> None:
+    POOL_TAMANO.labels(nombre).set(pool.size())
+    POOL_EN_USO.labels(nombre).set(pool.checkedout() - devolviendo)
+    # QueuePool.overflow() es negativo mientras el pool base no se ha llenado
+    POOL_OVERFLOW.labels(nombre).set(max(0, pool.overflow()))
+    est = getattr(pool, "estadisticas", None)
+    if est is not None:
+        POOL_ESPERANDO.labels(nombre).set(est.esperando)
+
+
+def _vigilar_pool(nombre: str, motor) -> None:
+    def al_esperar(espera: float, vencio: bool) -> None:
+        if vencio:
+            POOL_TIMEOUTS.labels(nombre).inc()
+        else:
+            POOL_ESPERA.labels(nombre).observe(espera)
+
+    def al_entregar(*_):
+        pool = motor.pool
+        est = getattr(pool, "estadisticas", None)
+        # engine.dispose() crea un pool nuevo: se vuelve a enganchar en el primer checkout
+        if est is not None and est.observador is None:
+            est.observador = al_esperar
+        _actualizar_pool(nombre, pool)
+
+    def al_devolver(*_):
+        # El evento checkin corre antes de que la conexión vuelva a la cola del pool
+        _actualizar_pool(nombre, motor.pool, devolviendo=1)
+
+    event.listen(motor, "checkout", al_entregar)
+    event.listen(motor, "checkin", al_devolver)
+    al_entregar()
+
+
+# =============================================================================
+# Tareas programadas
+# =============================================================================
+@contextmanager
+def medir_tarea(nombre: str, retraso: float):
+    """Registra el retraso sobre la hora programada, la duración y el resultado de una tarea."""
+    SCHEDULER_RETRASO.labels(nombre).observe(max(0.0, retraso))
+    inicio = time.perf_counter()
+    resultado = "ok"
+    try:
+        yield
+    except Exception:
+        resultado = "error"
+        raise
+    finally:
+        SCHEDULER_DURACION.labels(nombre).observe(time.perf_counter() - inicio)
+        SCHEDULER_EJECUCIONES.labels(nombre, resultado).inc()
+
+
+# =============================================================================
+# Llamadas salientes y PDF
+# =============================================================================
+class _Llamada:
+    __slots__ = ("resultado",)
+
+    def __init__(self):
+        self.resultado = "ok"
+
+    def respuesta(self, codigo: int) -> None:
+        """Clasifica la llamada por el código HTTP recibido (2xx es ok)."""
+        if codigo >= 300:
+            self.resultado = f"http_{codigo // 100}xx"
+
+
+@contextmanager
+def medir_llamada(servicio: str, operacion: str):
+    """
+    Mide una llamada a un servicio externo; una excepción cuenta como `error`. Sirve también
+    dentro de funciones async (el `with` envuelve el await).
+    """
+    llamada = _Llamada()
+    inicio = time.perf_counter()
+    try:
+        yield llamada
+    except Exception:
+        llamada.resultado = "error"
+        raise
+    finally:
+        EXTERNO_DURACION.labels(servicio, operacion).observe(time.perf_counter() - inicio)
+        EXTERNO_LLAMADAS.labels(servicio, operacion, llamada.resultado).inc()
+
+
+@contextmanager
+def medir_pdf(documento: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        PDF_RENDER.labels(documento).observe(time.perf_counter() - inicio)
+
+
+# =============================================================================
+# Exposición
+# =============================================================================
+def exportar_metricas() -> bytes:
+    """Texto de /metrics: suma de todos los workers en modo multiproceso."""
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(REGISTRY)
+    registro = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registro)
+    return generate_latest(registro)
+
+
+def instalar_metricas(app, motores: dict) -> None:
+    """
+    Agrega el middleware HTTP y engancha las métricas de pool en los motores dados
+    ({nombre: motor síncrono}; para los async, `.sync_engine`).
+    """
+    for nombre, motor in motores.items():
+        _vigilar_pool(nombre, motor)
+    app.add_middleware(MetricasHTTPMiddleware)
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        def marcar_proceso_terminado():
+            # Los gauges `livesum` de un worker que terminó no deben seguir sumando
+            multiprocess.mark_process_dead(os.getpid())
+
+        app.add_event_handler("shutdown", marcar_proceso_terminado)
+
@@ -7,6 +7,7 @@ import os
 import locale
 
 import models  
+from services.metricas import medir_pdf
 
 # Crea una ruta absoluta para templates
 # Toma la direccion de la carpeta del archivo actual, sube un nivel con ".." y entra a la carpeta "templates"
@@ -70,7 +71,8 @@ def generar_pdf_consulta(db: Session, id_consulta: int) -> bytes:
         generado=datetime.now().strftime("%d-%m-%Y %H:%M")
     ) 
 
-    pdf_bytes = HTML(string=html).write_pdf() # WeasyPrint convierte HTML a un PDF
+    with medir_pdf("consulta"):
+        pdf_bytes = HTML(string=html).write_pdf() # WeasyPrint convierte HTML a un PDF
     return pdf_bytes # Se devuelven los bytes del pdf
 
 
@@ -120,7 +122,8 @@ def generar_certificado_transporte(db: Session, id_paciente: int) -> bytes:
         fecha_generacion=datetime.now().strftime("%d-%m-%Y %H:%M")
     )
     
-    pdf_bytes = HTML(string=html).write_pdf()
+    with medir_pdf("certificado_transporte"):
+        pdf_bytes = HTML(string=html).write_pdf()
     return pdf_bytes
 
 
@@ -174,7 +177,8 @@ def generar_consentimiento_informado(
         fecha_generacion=datetime.now().strftime("%d-%m-%Y %H:%M")
     )
     
-    pdf_bytes = HTML(string=html).write_pdf()
+    with medir_pdf("consentimiento_informado"):
+        pdf_bytes = HTML(string=html).write_pdf()
     return pdf_bytes
 
 
@@ -229,7 +233,8 @@ def generar_orden_examenes(
         fecha_generacion=datetime.now().strftime("%d-%m-%Y %H:%M")
     )
     
-    pdf_bytes = HTML(string=html).write_pdf()
+    with medir_pdf("orden_examenes"):
+        pdf_bytes = HTML(string=html).write_pdf()
     return pdf_bytes
 
 
@@ -286,7 +291,8 @@ def generar_receta_medica(
         fecha_generacion=datetime.now().strftime("%d-%m-%Y %H:%M")
     )
     
-    pdf_bytes = HTML(string=html).write_pdf()
+    with medir_pdf("receta_medica"):
+        pdf_bytes = HTML(string=html).write_pdf()
     return pdf_bytes
 
 
@@ -316,7 +322,8 @@ def generar_pdf_consulta_desde_datos(datos: dict) -> bytes:
         generado=datetime.now().strftime("%d-%m-%Y %H:%M")
     )
     
-    pdf_bytes = HTML(string=html).write_pdf()
+    with medir_pdf("consulta"):
+        pdf_bytes = HTML(string=html).write_pdf()
     return pdf_bytes
 
 
@@ -349,5 +356,6 @@ def generar_pdf_certificado_transporte(datos: dict) -> bytes:
         fecha_generacion=datetime.now().strftime("%d-%m-%Y %H:%M")
     )
     
-    pdf_bytes = HTML(string=html).write_pdf()
+    with medir_pdf("certificado_transporte"):
+        pdf_bytes = HTML(string=html).write_pdf()
     return pdf_bytes
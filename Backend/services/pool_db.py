@@ -0,0 +1,148 @@
+"""
+Pool de conexiones a PostgreSQL: configuración por variables de entorno y métricas.
+
+Variables (con los valores por defecto de SQLAlchemy):
+- DB_POOL_SIZE (5), DB_MAX_OVERFLOW (10), DB_POOL_TIMEOUT (30 s), DB_POOL_RECYCLE (-1 = nunca)
+- DB_POOL_PRE_PING (false): valida la conexión con un ping antes de entregarla
+- DB_PGBOUNCER (false): PgBouncer en modo transacción; desactiva la caché de prepared
+  statements de asyncpg (psycopg2 no usa prepared statements del servidor)
+
+Cada worker de uvicorn tiene su propio pool: el máximo de conexiones a la base es
+workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) por motor.
+"""
+
+import os
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+def _env_bool(nombre: str, defecto: bool = False) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ("1", "true", "yes", "si", "sí", "on")
+
+
+def usa_pgbouncer() -> bool:
+    return _env_bool("DB_PGBOUNCER")
+
+
+class EstadisticasEspera:
+    """Acumulados de espera por una conexión libre (por proceso)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.esperando = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        # Callback opcional (espera_s, vencio) para exportar cada checkout (services/metricas.py)
+        self.observador = None
+
+    def registrar(self, espera: float) -> None:
+        with self.lock:
+            self.checkouts += 1
+            self.espera_total += espera
+            if espera > self.espera_max:
+                self.espera_max = espera
+
+
+class _MedicionEspera:
+    """
+    Mide cada checkout del pool: cuántos llamadores están esperando una conexión y cuánto
+    tardan en obtenerla. Se engancha en _do_get, que es donde QueuePool bloquea hasta
+    que se libera una conexión o vence pool_timeout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estadisticas = EstadisticasEspera()
+
+    def _do_get(self):
+        est = self.estadisticas
+        with est.lock:
+            est.esperando += 1
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            with est.lock:
+                est.timeouts += 1
+            if est.observador is not None:
+                est.observador(time.perf_counter() - inicio, True)
+            raise
+        finally:
+            with est.lock:
+                est.esperando -= 1
+        espera = time.perf_counter() - inicio
+        est.registrar(espera)
+        if est.observador is not None:
+            est.observador(espera, False)
+        return conexion
+
+
+class QueuePoolMedido(_MedicionEspera, QueuePool):
+    pass
+
+
+class AsyncAdaptedQueuePoolMedido(_MedicionEspera, AsyncAdaptedQueuePool):
+    pass
+
+
+def _opciones_comunes() -> dict:
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING"),
+    }
+
+
+def opciones_pool() -> dict:
+    """kwargs de create_engine para el motor síncrono (psycopg2)."""
+    return {"poolclass": QueuePoolMedido, **_opciones_comunes()}
+
+
+def opciones_pool_async() -> dict:
+    """kwargs de create_async_engine para el motor asyncpg."""
+    opciones = {"poolclass": AsyncAdaptedQueuePoolMedido, **_opciones_comunes()}
+    if usa_pgbouncer():
+        # En modo transacción cada sentencia puede caer en otra conexión del servidor:
+        # sin caché de prepared statements y con nombres únicos para no chocar entre clientes
+        opciones["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return opciones
+
+
+def estado_pool(pool) -> dict:
+    """Uso actual del pool y esperas acumuladas desde el arranque del proceso."""
+    estado = {
+        "pool_class": type(pool).__name__,
+        "pool_size": pool.size(),
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        "timeout_s": pool.timeout(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # QueuePool.overflow() es negativo mientras el pool base no se ha llenado
+        "overflow": max(0, pool.overflow()),
+    }
+    est = getattr(pool, "estadisticas", None)
+    if est is not None:
+        with est.lock:
+            estado.update({
+                "waiters": est.esperando,
+                "checkouts": est.checkouts,
+                "checkout_timeouts": est.timeouts,
+                "checkout_wait_avg_ms": round(est.espera_total / est.checkouts * 1000, 3) if est.checkouts else 0.0,
+                "checkout_wait_max_ms": round(est.espera_max * 1000, 3),
+            })
+    return estado
@@ -0,0 +1,129 @@
+"""
+Enrutamiento de sesiones de lectura hacia la réplica (DATABASE_READ_URL).
+
+- Las sesiones de lectura corren en transacciones READ ONLY (también cuando no hay réplica
+  y se usa la base principal), así un endpoint de lectura no puede escribir por error.
+- El retraso de la réplica se mide cada DATABASE_READ_LAG_CHECK_INTERVAL segundos. Si supera
+  DATABASE_READ_MAX_LAG segundos (o la réplica no responde), las lecturas vuelven a la
+  base principal hasta la siguiente medición.
+- Escrituras y lecturas que deben ver lo recién escrito (detalle de paciente, consulta o
+  tutor) usan siempre la base principal (get_db / get_async_db).
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import (
+    HAY_REPLICA,
+    read_engine,
+    async_read_engine,
+    PrimaryReadSessionLocal,
+    ReadSessionLocal,
+    AsyncPrimaryReadSessionLocal,
+    AsyncReadSessionLocal,
+)
+
+# Retraso máximo aceptado en segundos (negativo = sin límite)
+DATABASE_READ_MAX_LAG = float(os.getenv("DATABASE_READ_MAX_LAG", "10"))
+DATABASE_READ_LAG_CHECK_INTERVAL = float(os.getenv("DATABASE_READ_LAG_CHECK_INTERVAL", "2"))
+
+# Segundos desde la última transacción aplicada; 0 si la réplica ya aplicó todo lo recibido
+# (sin eso, una base principal sin escrituras se vería como una réplica atrasada)
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class _EstadoReplica:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.medido_en = 0.0
+
+    def reclamar_medicion(self) -> bool:
+        """
+        True si la medición venció y le toca a este llamador repetirla. Marca la hora de
+        inmediato para que los requests concurrentes sigan usando el valor anterior.
+        """
+        with self.lock:
+            ahora = time.monotonic()
+            if ahora - self.medido_en < DATABASE_READ_LAG_CHECK_INTERVAL:
+                return False
+            self.medido_en = ahora
+            return True
+
+    def registrar(self, lag: Optional[float], error: Optional[str] = None) -> None:
+        with self.lock:
+            self.lag = lag
+            self.error = error
+
+    def utilizable(self) -> bool:
+        if self.error is not None or self.lag is None:
+            return False
+        return DATABASE_READ_MAX_LAG < 0 or self.lag <= DATABASE_READ_MAX_LAG
+
+
+_estado = _EstadoReplica()
+
+
+def _medir_lag() -> None:
+    if not _estado.reclamar_medicion():
+        return
+    try:
+        with read_engine.connect() as conn:
+            _estado.registrar(float(conn.execute(_LAG_SQL).scalar()))
+    except Exception as e:
+        _estado.registrar(None, str(e))
+
+
+async def _medir_lag_async() -> None:
+    if not _estado.reclamar_medicion():
+        return
+    try:
+        async with async_read_engine.connect() as conn:
+            _estado.registrar(float((await conn.execute(_LAG_SQL)).scalar()))
+    except Exception as e:
+        _estado.registrar(None, str(e))
+
+
+def sesion_lectura() -> Session:
+    """Sesión READ ONLY en la réplica, o en la base principal si no hay réplica o está atrasada."""
+    if HAY_REPLICA:
+        _medir_lag()
+        if _estado.utilizable():
+            return ReadSessionLocal()
+    return PrimaryReadSessionLocal()
+
+
+async def sesion_lectura_async() -> AsyncSession:
+    """Versión async de sesion_lectura."""
+    if HAY_REPLICA:
+        await _medir_lag_async()
+        if _estado.utilizable():
+            return AsyncReadSessionLocal()
+    return AsyncPrimaryReadSessionLocal()
+
+
+def estado_replica() -> dict:
+    """Estado de la réplica para /internal/db-replica."""
+    if not HAY_REPLICA:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "lag_s": _estado.lag,
+        "max_lag_s": DATABASE_READ_MAX_LAG if DATABASE_READ_MAX_LAG >= 0 else None,
+        "in_use": _estado.utilizable(),
+        "error": _estado.error,
+        "measured_s_ago": round(time.monotonic() - _estado.medido_en, 1) if _estado.medido_en else None,
+    }
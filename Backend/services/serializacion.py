@@ -0,0 +1,65 @@
+"""
+Serialización JSON rápida de las respuestas.
+
+- `dumps` usa orjson (fechas, listas y dicts se serializan en C, sin pasar por
+  jsonable_encoder). Si orjson no está instalado se usa json de la biblioteca estándar con
+  el mismo formato de salida (UTF-8, sin espacios).
+- `RespuestaJSON` es la clase de respuesta por defecto de la app.
+- `respuesta_rapida(datos)`: los endpoints que ya construyen sus esquemas desde el ORM
+  (model_construct, ver schemas.construir_desde_orm) la devuelven directamente, así FastAPI
+  no vuelve a validar ni a convertir el resultado contra response_model (que se mantiene
+  solo para la documentación OpenAPI).
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_DISPONIBLE = True
+except ImportError:
+    orjson = None
+    ORJSON_DISPONIBLE = False
+
+
+def _por_defecto(obj: Any):
+    """Tipos que orjson no conoce: esquemas pydantic y Decimal."""
+    if isinstance(obj, BaseModel):
+        # Los esquemas creados con model_construct ya tienen tipos JSON nativos en sus campos
+        return obj.__dict__
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+
+def _por_defecto_json(obj: Any):
+    if isinstance(obj, (date, datetime, time)):
+        return obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    return jsonable_encoder(obj)
+
+
+def dumps(datos: Any) -> bytes:
+    """JSON en bytes UTF-8, compacto."""
+    if ORJSON_DISPONIBLE:
+        return orjson.dumps(datos, default=_por_defecto)
+    return json.dumps(datos, default=_por_defecto_json, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse serializada con orjson (o json si orjson no está disponible)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def respuesta_rapida(datos: Any, status_code: int = 200) -> RespuestaJSON:
+    """Respuesta ya serializada que no pasa por la validación de response_model."""
+    return RespuestaJSON(content=datos, status_code=status_code)
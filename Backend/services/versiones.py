@@ -0,0 +1,112 @@
+"""
+Versión de fila (ETag) para los detalles de paciente, tutor y consulta.
+
+La versión sale de la columna de sistema xmin de PostgreSQL (id de la transacción que
+escribió la fila), por lo que no requiere columnas ni triggers nuevos: cambia con cada
+UPDATE. Como la respuesta de paciente y consulta incluye datos de otras tablas (raza,
+especie, tutores; recetas y tratamientos), la versión combina los xmin de todas esas filas,
+y agregar o borrar una fila relacionada también la cambia.
+
+- GET: con If-None-Match igual a la versión actual se responde 304 sin cargar ni serializar
+  el detalle (solo se ejecuta la consulta de versión, que lee índices y pocas filas).
+- PUT: con If-Match distinto de la versión actual se responde 412; la fila principal se
+  bloquea (FOR UPDATE) hasta el commit para que dos ediciones no pasen ambas la verificación.
+"""
+
+import hashlib
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Cambiar si cambia el formato de las respuestas, para invalidar los ETag ya entregados
+ETAG_REVISION = "1"
+
+_SQL_VERSION = {
+    "paciente": """
+        SELECT concat_ws('|', p.xmin::text, coalesce(r.xmin::text, ''), coalesce(e.xmin::text, ''),
+            coalesce((SELECT string_agg(tp.xmin::text || ':' || t.xmin::text, ',' ORDER BY tp.rut)
+                      FROM govet.tutor_paciente tp JOIN govet.tutor t ON t.rut = tp.rut
+                      WHERE tp.id_paciente = p.id_paciente), '')),
+            p.activo
+        FROM govet.paciente p
+        LEFT JOIN govet.raza r ON r.id_raza = p.id_raza
+        LEFT JOIN govet.especie e ON e.id_especie = r.id_especie
+        WHERE p.id_paciente = :clave
+    """,
+    "tutor": """
+        SELECT t.xmin::text, t.activo
+        FROM govet.tutor t
+        WHERE t.rut = :clave
+    """,
+    "consulta": """
+        SELECT concat_ws('|', c.xmin::text,
+            coalesce((SELECT string_agg(rm.xmin::text, ',' ORDER BY rm.id_receta)
+                      FROM govet.receta_medica rm WHERE rm.id_consulta = c.id_consulta), ''),
+            coalesce((SELECT string_agg(ct.xmin::text || ':' || coalesce(tr.xmin::text, ''), ',' ORDER BY ct.id_aplicacion)
+                      FROM govet.consulta_tratamiento ct
+                      LEFT JOIN govet.tratamiento tr ON tr.id_tratamiento = ct.id_tratamiento
+                      WHERE ct.id_consulta = c.id_consulta), '')),
+            true
+        FROM govet.consulta c
+        WHERE c.id_consulta = :clave
+    """,
+}
+
+# Alias de la fila principal para FOR UPDATE OF
+_ALIAS = {"paciente": "p", "tutor": "t", "consulta": "c"}
+
+
+def etag_fila(db: Session, entidad: str, clave, bloquear: bool = False) -> Tuple[Optional[str], bool]:
+    """
+    Devuelve (etag, activo) de la fila, o (None, False) si no existe.
+    Con `bloquear` la fila principal queda bloqueada hasta el fin de la transacción.
+    """
+    sql = _SQL_VERSION[entidad]
+    if bloquear:
+        sql += f" FOR UPDATE OF {_ALIAS[entidad]}"
+    fila = db.execute(text(sql), {"clave": clave}).first()
+    if fila is None:
+        return None, False
+    resumen = hashlib.blake2b(f"{ETAG_REVISION}|{fila[0]}".encode(), digest_size=12).hexdigest()
+    return f'"{entidad[0]}{resumen}"', bool(fila[1])
+
+
+def _etiquetas(cabecera: str):
+    return {e.strip() for e in cabecera.split(",")}
+
+
+def no_modificado(etag: str, if_none_match: Optional[str]) -> bool:
+    """If-None-Match usa comparación débil: se ignora el prefijo W/."""
+    if not if_none_match:
+        return False
+    etiquetas = {e.removeprefix("W/") for e in _etiquetas(if_none_match)}
+    return etag in etiquetas or "*" in etiquetas
+
+
+def verificar_if_match(db: Session, entidad: str, clave, if_match: Optional[str]) -> None:
+    """
+    Para PUT: si viene If-Match y no coincide con la versión actual, 412.
+    Sin If-Match no se verifica nada (los clientes actuales siguen funcionando igual).
+    """
+    if not if_match:
+        return
+    etag, _ = etag_fila(db, entidad, clave, bloquear=True)
+    if etag is None:
+        return  # el endpoint responde su propio 404
+    etiquetas = _etiquetas(if_match)
+    # If-Match usa comparación fuerte: un ETag débil nunca coincide
+    if "*" not in etiquetas and etag not in etiquetas:
+        raise HTTPException(
+            status_code=412,
+            detail="El registro fue modificado por otra persona; recarga los datos antes de guardar",
+        )
+
+
+def cabeceras_etag(etag: Optional[str]) -> dict:
+    """ETag y Cache-Control para respuestas de detalle (el navegador siempre revalida)."""
+    cabeceras = {"Cache-Control": "private, no-cache"}
+    if etag:
+        cabeceras["ETag"] = etag
+    return cabeceras
@@ -1,6 +1,7 @@
 """
 Cliente HTTP asíncrono para comunicarse con el microservicio whatsapp-ms.
 - Centraliza la URL base, timeouts y manejo de errores.
+- Cada llamada queda en las métricas de /metrics (latencia y resultado).
 - Se usa desde el router público del backend.
 """
 
@@ -11,6 +12,7 @@ import httpx
 from fastapi import HTTPException, status, Depends
 from auth import get_current_user
 from session_auth import get_current_session_user
+from services.metricas import medir_llamada
 
 # URL base del microservicio; configurable por env.
 WHATSAPP_MS_BASE_URL = os.getenv("WHATSAPP_MS_BASE_URL", "http://whatsapp-ms:6007")
@@ -27,8 +29,10 @@ async def get_qr(
     """
     url = f"{WHATSAPP_MS_BASE_URL}/qr"
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            resp = await client.get(url)
+        with medir_llamada("whatsapp", "qr") as llamada:
+            async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+                resp = await client.get(url)
+            llamada.respuesta(resp.status_code)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -45,8 +49,10 @@ async def get_status(
     """
     url = f"{WHATSAPP_MS_BASE_URL}/status"
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            resp = await client.get(url)
+        with medir_llamada("whatsapp", "status") as llamada:
+            async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+                resp = await client.get(url)
+            llamada.respuesta(resp.status_code)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -73,8 +79,10 @@ async def notificar(
         params["hora"] = hora
 
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            resp = await client.get(url, params=params)
+        with medir_llamada("whatsapp", "notificar") as llamada:
+            async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+                resp = await client.get(url, params=params)
+            llamada.respuesta(resp.status_code)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -95,8 +103,10 @@ async def cerrar_sesion(
     """
     url = f"{WHATSAPP_MS_BASE_URL}/cerrar-sesion"
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            resp = await client.post(url)
+        with medir_llamada("whatsapp", "cerrar_sesion") as llamada:
+            async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+                resp = await client.post(url)
+            llamada.respuesta(resp.status_code)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -114,8 +124,10 @@ async def desvincular(
     """
     url = f"{WHATSAPP_MS_BASE_URL}/desvincular"
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            resp = await client.post(url)
+        with medir_llamada("whatsapp", "desvincular") as llamada:
+            async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+                resp = await client.post(url)
+            llamada.respuesta(resp.status_code)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -133,8 +145,10 @@ async def iniciar(
     """
     url = f"{WHATSAPP_MS_BASE_URL}/iniciar"
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            resp = await client.post(url)
+        with medir_llamada("whatsapp", "iniciar") as llamada:
+            async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+                resp = await client.post(url)
+            llamada.respuesta(resp.status_code)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
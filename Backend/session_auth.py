@@ -53,9 +53,10 @@ async def login_with_google_idtoken(request: Request):
     return {"sessionToken": session_token, "expiresIn": SESSION_EXPIRE_HOURS * 3600, "email": claims.get("email")}
 
 # Dependency para endpoints protegidos con el token de sesión propio
-def get_current_session_user(request: Request):
+async def get_current_session_user(request: Request):
     """
     Lee Authorization: Bearer <sessionToken> y decodifica el token de sesión propio (JWT de la app)
+    Es async porque solo valida el JWT en memoria: así no pasa por el threadpool en cada request.
     """
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -0,0 +1,52 @@
+-- 001_busqueda_trigram.sql
+-- Índices de búsqueda para /tutores/paginated/, /pacientes/paginated/ y /consultas/paginated/
+--
+-- Las búsquedas usan ILIKE '%termino%'. Un índice btree no sirve para eso, pero un índice
+-- GIN con gin_trgm_ops (pg_trgm) sí. Además el nombre completo y el RUT sin formato del
+-- tutor se guardan como columnas generadas para poder indexarlos.
+--
+-- Los índices se crean con CONCURRENTLY para no bloquear escrituras; por eso este archivo
+-- debe ejecutarse fuera de una transacción (psql sin --single-transaction).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Columnas generadas del tutor
+
+ALTER TABLE govet.tutor
+	ADD COLUMN IF NOT EXISTS nombre_completo varchar
+	GENERATED ALWAYS AS (coalesce(nombre, '') || ' ' || coalesce(apellido_paterno, '') || ' ' || coalesce(apellido_materno, '')) STORED;
+
+ALTER TABLE govet.tutor
+	ADD COLUMN IF NOT EXISTS rut_normalizado varchar
+	GENERATED ALWAYS AS (lower(replace(replace(rut, '.', ''), '-', ''))) STORED;
+
+COMMENT ON COLUMN govet.tutor.nombre_completo IS 'Nombre y apellidos del tutor (generada, para búsqueda)';
+COMMENT ON COLUMN govet.tutor.rut_normalizado IS 'RUT sin puntos ni guión y en minúsculas (generada, para búsqueda)';
+
+-- Tutor
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_nombre_trgm ON govet.tutor USING gin (nombre gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_apellido_paterno_trgm ON govet.tutor USING gin (apellido_paterno gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_apellido_materno_trgm ON govet.tutor USING gin (apellido_materno gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_email_trgm ON govet.tutor USING gin (email gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_nombre_completo_trgm ON govet.tutor USING gin (nombre_completo gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_rut_normalizado_trgm ON govet.tutor USING gin (rut_normalizado gin_trgm_ops);
+
+-- Paciente, raza y especie
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_paciente_nombre_trgm ON govet.paciente USING gin (nombre gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_paciente_codigo_chip_trgm ON govet.paciente USING gin (codigo_chip gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_raza_nombre_trgm ON govet.raza USING gin (nombre gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_especie_nombre_comun_trgm ON govet.especie USING gin (nombre_comun gin_trgm_ops);
+
+-- Consulta
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_diagnostico_trgm ON govet.consulta USING gin (diagnostico gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_motivo_trgm ON govet.consulta USING gin (motivo gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_observaciones_trgm ON govet.consulta USING gin (observaciones gin_trgm_ops);
+
+ANALYZE govet.tutor;
+ANALYZE govet.paciente;
+ANALYZE govet.raza;
+ANALYZE govet.especie;
+ANALYZE govet.consulta;
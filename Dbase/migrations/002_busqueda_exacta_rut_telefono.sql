@@ -0,0 +1,26 @@
+-- 002_busqueda_exacta_rut_telefono.sql
+-- Búsqueda exacta de tutores por RUT o teléfono (GET /tutores/buscar/ y búsquedas
+-- paginadas cuando el texto tiene forma de RUT o teléfono).
+--
+-- rut_normalizado ya existe (001). Aquí se agregan los teléfonos normalizados a sus
+-- 9 dígitos nacionales (sin prefijo 56) y los índices btree para igualdad.
+-- Al ser columnas generadas STORED, las filas existentes quedan rellenadas al agregarlas.
+--
+-- Ejecutar fuera de una transacción (usa CREATE INDEX CONCURRENTLY).
+
+ALTER TABLE govet.tutor
+	ADD COLUMN IF NOT EXISTS celular_normalizado varchar
+	GENERATED ALWAYS AS (right(celular::text, 9)) STORED;
+
+ALTER TABLE govet.tutor
+	ADD COLUMN IF NOT EXISTS telefono_normalizado varchar
+	GENERATED ALWAYS AS (right(telefono::text, 9)) STORED;
+
+COMMENT ON COLUMN govet.tutor.celular_normalizado IS 'Últimos 9 dígitos del celular (generada, para búsqueda exacta)';
+COMMENT ON COLUMN govet.tutor.telefono_normalizado IS 'Últimos 9 dígitos del teléfono (generada, para búsqueda exacta)';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_rut_normalizado ON govet.tutor (rut_normalizado);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_celular_normalizado ON govet.tutor (celular_normalizado);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_telefono_normalizado ON govet.tutor (telefono_normalizado);
+
+ANALYZE govet.tutor;
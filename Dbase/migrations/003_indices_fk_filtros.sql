@@ -0,0 +1,50 @@
+-- 003_indices_fk_filtros.sql
+-- Índices secundarios para claves foráneas y columnas de filtro frecuentes
+--
+-- generador_schema.sql solo crea las claves primarias, así que los filtros por paciente,
+-- tutor, consulta, raza, especie o fecha de próxima dosis recorrían la tabla completa.
+--
+-- Los índices se crean con CONCURRENTLY para no bloquear escrituras; por eso este archivo
+-- debe ejecutarse fuera de una transacción (migrar.py o psql sin --single-transaction).
+
+-- Consulta: /consultas/paciente/id/{id}, join con tutor y orden de /consultas/paginated/
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_id_paciente ON govet.consulta (id_paciente);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_rut ON govet.consulta (rut);
+-- Mismo orden que el listado (fecha_consulta DESC NULLS LAST, id_consulta DESC), sirve también
+-- para el cursor de /consultas/paginated/ y para filtros por rango de fecha
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_fecha_consulta ON govet.consulta (fecha_consulta DESC NULLS LAST, id_consulta DESC);
+
+-- Relación tutor-paciente (la tabla no tiene clave primaria en la base)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_paciente_id_paciente ON govet.tutor_paciente (id_paciente);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_paciente_rut ON govet.tutor_paciente (rut);
+
+-- Tratamientos aplicados: por paciente, por consulta (selectinload) y próximas dosis
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_tratamiento_id_paciente ON govet.consulta_tratamiento (id_paciente);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_tratamiento_id_consulta ON govet.consulta_tratamiento (id_consulta);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_consulta_tratamiento_proxima_dosis ON govet.consulta_tratamiento (proxima_dosis)
+	WHERE proxima_dosis IS NOT NULL;
+
+-- Recetas por consulta (selectinload de Consulta.recetas)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_receta_medica_id_consulta ON govet.receta_medica (id_consulta);
+
+-- Catálogos
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_paciente_id_raza ON govet.paciente (id_raza);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_raza_id_especie ON govet.raza (id_especie);
+
+-- Parciales para los listados, que solo muestran registros activos
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_paciente_activo ON govet.paciente (id_paciente) WHERE activo = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tutor_activo ON govet.tutor (rut) WHERE activo = true;
+
+ANALYZE govet.consulta;
+ANALYZE govet.tutor_paciente;
+ANALYZE govet.consulta_tratamiento;
+ANALYZE govet.receta_medica;
+ANALYZE govet.paciente;
+ANALYZE govet.raza;
+ANALYZE govet.tutor;
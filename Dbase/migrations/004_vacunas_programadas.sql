@@ -0,0 +1,154 @@
+-- 004_vacunas_programadas.sql
+-- Proyección de vacunas aplicadas y sus próximas dosis, mantenida por triggers
+--
+-- /consultas/tratamientos/vacunas/nombre/ y /vacunas/paciente/{id}/proximas/ unían
+-- consulta_tratamiento, tratamiento y paciente y filtraban tratamiento.nombre ILIKE '%vacuna%'
+-- en cada carga del inicio. govet.vacuna_programada guarda ya resuelta una fila por cada
+-- aplicación de vacuna (mismo criterio: nombre del tratamiento contiene "vacuna"), con el
+-- nombre del tratamiento y del paciente, e índices por próxima dosis y tipo de tratamiento:
+-- ambos endpoints la leen con un index scan por rango de fechas.
+--
+-- Se actualiza fila a fila (sin REFRESH completo) con triggers sobre consulta_tratamiento,
+-- tratamiento y paciente, así también quedan al día las escrituras de los scripts de
+-- rellenar_bd que no pasan por el backend. govet.recalcular_vacunas_programadas() la
+-- reconstruye completa si hiciera falta.
+
+-- Mismos tipos que consulta_tratamiento / tratamiento / paciente (la función de abajo devuelve SETOF esta tabla)
+CREATE TABLE IF NOT EXISTS govet.vacuna_programada (
+	id_aplicacion int8 NOT NULL,
+	id_consulta int4 NULL,
+	id_tratamiento int4 NOT NULL,
+	id_paciente int4 NOT NULL,
+	dosis varchar NULL,
+	fecha_tratamiento date NULL,
+	marca varchar NULL,
+	proxima_dosis date NULL,
+	numero_serial varchar NULL,
+	nombre_tratamiento varchar NOT NULL,
+	descripcion_tratamiento varchar NULL,
+	tipo_tratamiento varchar NOT NULL,
+	nombre_paciente varchar NULL,
+	CONSTRAINT vacuna_programada_pk PRIMARY KEY (id_aplicacion)
+);
+
+COMMENT ON TABLE govet.vacuna_programada IS 'Proyección de consulta_tratamiento para vacunas (mantenida por triggers, no escribir directamente)';
+
+-- Próximas dosis en una ventana de fechas (listado del inicio)
+CREATE INDEX IF NOT EXISTS idx_vacuna_programada_proxima_dosis ON govet.vacuna_programada (proxima_dosis)
+	WHERE proxima_dosis IS NOT NULL;
+-- Próximas dosis por tipo de tratamiento
+CREATE INDEX IF NOT EXISTS idx_vacuna_programada_tipo_proxima_dosis ON govet.vacuna_programada (tipo_tratamiento, proxima_dosis);
+-- Vacunas de un paciente por fecha (/vacunas/paciente/{id}/proximas/)
+CREATE INDEX IF NOT EXISTS idx_vacuna_programada_paciente_fecha ON govet.vacuna_programada (id_paciente, fecha_tratamiento);
+
+-- Filas de la proyección para las aplicaciones indicadas (NULL = todas)
+CREATE OR REPLACE FUNCTION govet.vacunas_programadas_de(aplicaciones int8[])
+RETURNS SETOF govet.vacuna_programada
+LANGUAGE sql STABLE AS $$
+	SELECT ct.id_aplicacion, ct.id_consulta, ct.id_tratamiento, ct.id_paciente, ct.dosis,
+		ct.fecha_tratamiento, ct.marca, ct.proxima_dosis, ct.numero_serial,
+		t.nombre, t.descripcion, t.tipo_tratamiento, p.nombre
+	FROM govet.consulta_tratamiento ct
+	JOIN govet.tratamiento t ON t.id_tratamiento = ct.id_tratamiento
+	LEFT JOIN govet.paciente p ON p.id_paciente = ct.id_paciente
+	WHERE t.nombre ILIKE '%vacuna%'
+		AND (aplicaciones IS NULL OR ct.id_aplicacion = ANY (aplicaciones))
+$$;
+
+-- consulta_tratamiento: se reemplaza la fila de la aplicación modificada
+CREATE OR REPLACE FUNCTION govet.sync_vacuna_programada_aplicacion()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF TG_OP IN ('UPDATE', 'DELETE') THEN
+		DELETE FROM govet.vacuna_programada WHERE id_aplicacion = OLD.id_aplicacion;
+	END IF;
+	IF TG_OP IN ('INSERT', 'UPDATE') THEN
+		INSERT INTO govet.vacuna_programada
+		SELECT * FROM govet.vacunas_programadas_de(ARRAY[NEW.id_aplicacion]::int8[])
+		ON CONFLICT (id_aplicacion) DO NOTHING;
+	END IF;
+	RETURN NULL;
+END;
+$$;
+
+-- tratamiento: si cambia el nombre (puede dejar de ser o pasar a ser vacuna), la descripción
+-- o el tipo, se recalculan sus aplicaciones
+CREATE OR REPLACE FUNCTION govet.sync_vacuna_programada_tratamiento()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	DELETE FROM govet.vacuna_programada WHERE id_tratamiento = NEW.id_tratamiento;
+	INSERT INTO govet.vacuna_programada
+	SELECT * FROM govet.vacunas_programadas_de(
+		ARRAY(SELECT id_aplicacion FROM govet.consulta_tratamiento WHERE id_tratamiento = NEW.id_tratamiento)
+	)
+	ON CONFLICT (id_aplicacion) DO NOTHING;
+	RETURN NULL;
+END;
+$$;
+
+-- paciente: solo se copia el nombre
+CREATE OR REPLACE FUNCTION govet.sync_vacuna_programada_paciente()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	UPDATE govet.vacuna_programada SET nombre_paciente = NEW.nombre WHERE id_paciente = NEW.id_paciente;
+	RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION govet.truncar_vacuna_programada()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	TRUNCATE govet.vacuna_programada;
+	RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_vacuna_programada_aplicacion ON govet.consulta_tratamiento;
+CREATE TRIGGER trg_vacuna_programada_aplicacion
+	AFTER INSERT OR UPDATE OR DELETE ON govet.consulta_tratamiento
+	FOR EACH ROW EXECUTE FUNCTION govet.sync_vacuna_programada_aplicacion();
+
+DROP TRIGGER IF EXISTS trg_vacuna_programada_truncate ON govet.consulta_tratamiento;
+CREATE TRIGGER trg_vacuna_programada_truncate
+	AFTER TRUNCATE ON govet.consulta_tratamiento
+	FOR EACH STATEMENT EXECUTE FUNCTION govet.truncar_vacuna_programada();
+
+DROP TRIGGER IF EXISTS trg_vacuna_programada_tratamiento ON govet.tratamiento;
+CREATE TRIGGER trg_vacuna_programada_tratamiento
+	AFTER UPDATE OF nombre, descripcion, tipo_tratamiento ON govet.tratamiento
+	FOR EACH ROW
+	WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre
+		OR OLD.descripcion IS DISTINCT FROM NEW.descripcion
+		OR OLD.tipo_tratamiento IS DISTINCT FROM NEW.tipo_tratamiento)
+	EXECUTE FUNCTION govet.sync_vacuna_programada_tratamiento();
+
+DROP TRIGGER IF EXISTS trg_vacuna_programada_paciente ON govet.paciente;
+CREATE TRIGGER trg_vacuna_programada_paciente
+	AFTER UPDATE OF nombre ON govet.paciente
+	FOR EACH ROW
+	WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre)
+	EXECUTE FUNCTION govet.sync_vacuna_programada_paciente();
+
+-- Reconstrucción completa (carga inicial, o reparación si se desactivaron los triggers)
+CREATE OR REPLACE FUNCTION govet.recalcular_vacunas_programadas()
+RETURNS bigint
+LANGUAGE plpgsql AS $$
+DECLARE
+	filas bigint;
+BEGIN
+	LOCK TABLE govet.vacuna_programada IN EXCLUSIVE MODE;
+	DELETE FROM govet.vacuna_programada;
+	INSERT INTO govet.vacuna_programada SELECT * FROM govet.vacunas_programadas_de(NULL);
+	GET DIAGNOSTICS filas = ROW_COUNT;
+	RETURN filas;
+END;
+$$;
+
+-- Carga inicial (los triggers ya están activos: lo escrito desde ahora queda registrado)
+SELECT govet.recalcular_vacunas_programadas();
+
+ANALYZE govet.vacuna_programada;
@@ -0,0 +1,294 @@
+-- 005_paciente_listado.sql
+-- Proyección del listado de pacientes, mantenida por triggers
+--
+-- /pacientes/paginated/ unía paciente, raza, especie, tutor_paciente y tutor en cada página, y
+-- la búsqueda armaba una UNION de subconsultas (una por tabla) para poder usar índices. Además
+-- un paciente con varios tutores salía repetido, una vez por tutor.
+-- govet.paciente_listado guarda una fila por paciente con todo lo que muestra el listado:
+--   * datos del paciente, nombre de la raza y de la especie
+--   * tutor principal: la asociación más reciente de tutor_paciente (fecha DESC, NULL al final,
+--     desempate por RUT), con nombre, apellidos, RUT y datos de contacto
+--   * documento de búsqueda: nombre del paciente, raza, especie y nombre completo de todos sus
+--     tutores separados por salto de línea (un término no calza "entre" dos campos), más los RUT
+--     normalizados y los teléfonos de todos los tutores para la búsqueda exacta
+-- Listar y buscar pasan a ser consultas sobre una sola tabla con sus índices.
+--
+-- Se actualiza por paciente (upsert, sin REFRESH completo) con triggers sobre paciente,
+-- tutor_paciente, tutor, raza y especie, así también quedan al día las escrituras de los scripts
+-- de rellenar_bd. govet.recalcular_paciente_listado() la reconstruye completa y
+-- Backend/benchmarks/verificar_paciente_listado.py la compara contra las tablas de origen.
+
+-- Mismos tipos que paciente / raza / especie / tutor (la función de abajo devuelve SETOF esta tabla)
+CREATE TABLE IF NOT EXISTS govet.paciente_listado (
+	id_paciente int8 NOT NULL,
+	nombre varchar NOT NULL,
+	fecha_nacimiento date NULL,
+	color varchar NULL,
+	sexo bpchar(1) NULL,
+	esterilizado bool NULL,
+	id_raza int8 NULL,
+	codigo_chip varchar NULL,
+	activo bool NOT NULL,
+	raza varchar NULL,
+	especie varchar NULL,
+	tutor_rut varchar NULL,
+	tutor_nombre varchar NULL,
+	tutor_apellido_paterno varchar NULL,
+	tutor_apellido_materno varchar NULL,
+	tutor_telefono int8 NULL,
+	tutor_celular int8 NULL,
+	tutor_email varchar NULL,
+	documento_busqueda text NOT NULL,
+	ruts_busqueda text NOT NULL,
+	ruts_tutores text[] NOT NULL,
+	telefonos_tutores text[] NOT NULL,
+	CONSTRAINT paciente_listado_pk PRIMARY KEY (id_paciente)
+);
+
+COMMENT ON TABLE govet.paciente_listado IS 'Proyección del listado de pacientes (mantenida por triggers, no escribir directamente)';
+COMMENT ON COLUMN govet.paciente_listado.documento_busqueda IS 'Paciente, raza, especie y nombre completo de cada tutor, separados por salto de línea';
+COMMENT ON COLUMN govet.paciente_listado.ruts_busqueda IS 'RUT normalizado de cada tutor, separados por salto de línea (búsqueda parcial)';
+
+-- Listado de pacientes activos por id (paginación por offset o cursor)
+CREATE INDEX IF NOT EXISTS idx_paciente_listado_activo ON govet.paciente_listado (id_paciente) WHERE activo = true;
+-- Búsqueda parcial (ILIKE '%term%')
+CREATE INDEX IF NOT EXISTS idx_paciente_listado_documento_trgm ON govet.paciente_listado USING gin (documento_busqueda gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_paciente_listado_ruts_trgm ON govet.paciente_listado USING gin (ruts_busqueda gin_trgm_ops);
+-- Búsqueda exacta por RUT o teléfono de cualquiera de los tutores (@>)
+CREATE INDEX IF NOT EXISTS idx_paciente_listado_ruts_tutores ON govet.paciente_listado USING gin (ruts_tutores);
+CREATE INDEX IF NOT EXISTS idx_paciente_listado_telefonos_tutores ON govet.paciente_listado USING gin (telefonos_tutores);
+
+-- Filas de la proyección para los pacientes indicados (NULL = todos)
+CREATE OR REPLACE FUNCTION govet.pacientes_listado_de(pacientes int8[])
+RETURNS SETOF govet.paciente_listado
+LANGUAGE sql STABLE AS $$
+	SELECT p.id_paciente, p.nombre, p.fecha_nacimiento, p.color, p.sexo, p.esterilizado, p.id_raza,
+		p.codigo_chip, p.activo, r.nombre, e.nombre_comun,
+		principal.rut, principal.nombre, principal.apellido_paterno, principal.apellido_materno,
+		principal.telefono, principal.celular, principal.email,
+		concat_ws(E'\n', p.nombre, r.nombre, e.nombre_comun, todos.nombres),
+		coalesce(todos.ruts, ''),
+		coalesce(todos.ruts_exactos, '{}'),
+		coalesce(todos.telefonos, '{}')
+	FROM govet.paciente p
+	LEFT JOIN govet.raza r ON r.id_raza = p.id_raza
+	LEFT JOIN govet.especie e ON e.id_especie = r.id_especie
+	LEFT JOIN LATERAL (
+		SELECT t.rut, t.nombre, t.apellido_paterno, t.apellido_materno, t.telefono, t.celular, t.email
+		FROM govet.tutor_paciente tp
+		JOIN govet.tutor t ON t.rut = tp.rut
+		WHERE tp.id_paciente = p.id_paciente
+		ORDER BY tp.fecha DESC NULLS LAST, t.rut
+		LIMIT 1
+	) principal ON true
+	LEFT JOIN LATERAL (
+		SELECT string_agg(DISTINCT t.nombre_completo, E'\n' ORDER BY t.nombre_completo) AS nombres,
+			string_agg(DISTINCT t.rut_normalizado, E'\n' ORDER BY t.rut_normalizado) AS ruts,
+			array_agg(DISTINCT t.rut_normalizado::text ORDER BY t.rut_normalizado::text) AS ruts_exactos,
+			array_agg(DISTINCT n.telefono ORDER BY n.telefono) FILTER (WHERE n.telefono IS NOT NULL) AS telefonos
+		FROM govet.tutor_paciente tp
+		JOIN govet.tutor t ON t.rut = tp.rut
+		CROSS JOIN LATERAL (VALUES (t.celular_normalizado::text), (t.telefono_normalizado::text)) n (telefono)
+		WHERE tp.id_paciente = p.id_paciente
+	) todos ON true
+	WHERE pacientes IS NULL OR p.id_paciente = ANY (pacientes)
+$$;
+
+-- Recalcula las filas de los pacientes indicados. Upsert en vez de DELETE + INSERT para no
+-- chocar con la clave primaria; el bloqueo por paciente contra escrituras concurrentes se
+-- agrega en 007_paciente_listado_bloqueo.sql.
+CREATE OR REPLACE FUNCTION govet.refrescar_paciente_listado(pacientes int8[])
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF pacientes IS NULL OR cardinality(pacientes) = 0 THEN
+		RETURN;
+	END IF;
+	-- Pacientes eliminados
+	DELETE FROM govet.paciente_listado l
+	WHERE l.id_paciente = ANY (pacientes)
+		AND NOT EXISTS (SELECT 1 FROM govet.paciente p WHERE p.id_paciente = l.id_paciente);
+
+	INSERT INTO govet.paciente_listado
+	SELECT * FROM govet.pacientes_listado_de(pacientes)
+	ON CONFLICT (id_paciente) DO UPDATE SET
+		nombre = EXCLUDED.nombre,
+		fecha_nacimiento = EXCLUDED.fecha_nacimiento,
+		color = EXCLUDED.color,
+		sexo = EXCLUDED.sexo,
+		esterilizado = EXCLUDED.esterilizado,
+		id_raza = EXCLUDED.id_raza,
+		codigo_chip = EXCLUDED.codigo_chip,
+		activo = EXCLUDED.activo,
+		raza = EXCLUDED.raza,
+		especie = EXCLUDED.especie,
+		tutor_rut = EXCLUDED.tutor_rut,
+		tutor_nombre = EXCLUDED.tutor_nombre,
+		tutor_apellido_paterno = EXCLUDED.tutor_apellido_paterno,
+		tutor_apellido_materno = EXCLUDED.tutor_apellido_materno,
+		tutor_telefono = EXCLUDED.tutor_telefono,
+		tutor_celular = EXCLUDED.tutor_celular,
+		tutor_email = EXCLUDED.tutor_email,
+		documento_busqueda = EXCLUDED.documento_busqueda,
+		ruts_busqueda = EXCLUDED.ruts_busqueda,
+		ruts_tutores = EXCLUDED.ruts_tutores,
+		telefonos_tutores = EXCLUDED.telefonos_tutores;
+END;
+$$;
+
+-- paciente: se recalcula su fila (o se elimina)
+CREATE OR REPLACE FUNCTION govet.sync_paciente_listado_paciente()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF TG_OP = 'DELETE' THEN
+		PERFORM govet.refrescar_paciente_listado(ARRAY[OLD.id_paciente]::int8[]);
+	ELSIF TG_OP = 'UPDATE' THEN
+		PERFORM govet.refrescar_paciente_listado(ARRAY[OLD.id_paciente, NEW.id_paciente]::int8[]);
+	ELSE
+		PERFORM govet.refrescar_paciente_listado(ARRAY[NEW.id_paciente]::int8[]);
+	END IF;
+	RETURN NULL;
+END;
+$$;
+
+-- tutor_paciente: cambia el tutor principal y los tutores buscables del paciente
+CREATE OR REPLACE FUNCTION govet.sync_paciente_listado_tutor_paciente()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF TG_OP = 'DELETE' THEN
+		PERFORM govet.refrescar_paciente_listado(ARRAY[OLD.id_paciente]::int8[]);
+	ELSIF TG_OP = 'UPDATE' THEN
+		PERFORM govet.refrescar_paciente_listado(ARRAY[OLD.id_paciente, NEW.id_paciente]::int8[]);
+	ELSE
+		PERFORM govet.refrescar_paciente_listado(ARRAY[NEW.id_paciente]::int8[]);
+	END IF;
+	RETURN NULL;
+END;
+$$;
+
+-- tutor: se recalculan sus pacientes
+CREATE OR REPLACE FUNCTION govet.sync_paciente_listado_tutor()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	PERFORM govet.refrescar_paciente_listado(
+		ARRAY(SELECT DISTINCT id_paciente FROM govet.tutor_paciente WHERE rut IN (OLD.rut, NEW.rut))
+	);
+	RETURN NULL;
+END;
+$$;
+
+-- raza: se recalculan los pacientes de la raza
+CREATE OR REPLACE FUNCTION govet.sync_paciente_listado_raza()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	PERFORM govet.refrescar_paciente_listado(
+		ARRAY(SELECT id_paciente FROM govet.paciente WHERE id_raza IN (OLD.id_raza, NEW.id_raza))
+	);
+	RETURN NULL;
+END;
+$$;
+
+-- especie: se recalculan los pacientes de todas sus razas
+CREATE OR REPLACE FUNCTION govet.sync_paciente_listado_especie()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	PERFORM govet.refrescar_paciente_listado(
+		ARRAY(
+			SELECT p.id_paciente
+			FROM govet.paciente p
+			JOIN govet.raza r ON r.id_raza = p.id_raza
+			WHERE r.id_especie = NEW.id_especie
+		)
+	);
+	RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION govet.truncar_paciente_listado()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF TG_TABLE_NAME = 'paciente' THEN
+		TRUNCATE govet.paciente_listado;
+	ELSE
+		-- tutor_paciente vacía: los pacientes siguen, sin tutores
+		PERFORM govet.recalcular_paciente_listado();
+	END IF;
+	RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_paciente_listado_paciente ON govet.paciente;
+CREATE TRIGGER trg_paciente_listado_paciente
+	AFTER INSERT OR UPDATE OR DELETE ON govet.paciente
+	FOR EACH ROW EXECUTE FUNCTION govet.sync_paciente_listado_paciente();
+
+DROP TRIGGER IF EXISTS trg_paciente_listado_paciente_truncate ON govet.paciente;
+CREATE TRIGGER trg_paciente_listado_paciente_truncate
+	AFTER TRUNCATE ON govet.paciente
+	FOR EACH STATEMENT EXECUTE FUNCTION govet.truncar_paciente_listado();
+
+DROP TRIGGER IF EXISTS trg_paciente_listado_tutor_paciente ON govet.tutor_paciente;
+CREATE TRIGGER trg_paciente_listado_tutor_paciente
+	AFTER INSERT OR UPDATE OR DELETE ON govet.tutor_paciente
+	FOR EACH ROW EXECUTE FUNCTION govet.sync_paciente_listado_tutor_paciente();
+
+DROP TRIGGER IF EXISTS trg_paciente_listado_tutor_paciente_truncate ON govet.tutor_paciente;
+CREATE TRIGGER trg_paciente_listado_tutor_paciente_truncate
+	AFTER TRUNCATE ON govet.tutor_paciente
+	FOR EACH STATEMENT EXECUTE FUNCTION govet.truncar_paciente_listado();
+
+-- Solo las columnas que se copian o se buscan (las generadas derivan de estas)
+DROP TRIGGER IF EXISTS trg_paciente_listado_tutor ON govet.tutor;
+CREATE TRIGGER trg_paciente_listado_tutor
+	AFTER UPDATE OF rut, nombre, apellido_paterno, apellido_materno, telefono, celular, email ON govet.tutor
+	FOR EACH ROW
+	WHEN (OLD.rut IS DISTINCT FROM NEW.rut
+		OR OLD.nombre IS DISTINCT FROM NEW.nombre
+		OR OLD.apellido_paterno IS DISTINCT FROM NEW.apellido_paterno
+		OR OLD.apellido_materno IS DISTINCT FROM NEW.apellido_materno
+		OR OLD.telefono IS DISTINCT FROM NEW.telefono
+		OR OLD.celular IS DISTINCT FROM NEW.celular
+		OR OLD.email IS DISTINCT FROM NEW.email)
+	EXECUTE FUNCTION govet.sync_paciente_listado_tutor();
+
+DROP TRIGGER IF EXISTS trg_paciente_listado_raza ON govet.raza;
+CREATE TRIGGER trg_paciente_listado_raza
+	AFTER UPDATE OF id_raza, nombre, id_especie ON govet.raza
+	FOR EACH ROW
+	WHEN (OLD.id_raza IS DISTINCT FROM NEW.id_raza
+		OR OLD.nombre IS DISTINCT FROM NEW.nombre
+		OR OLD.id_especie IS DISTINCT FROM NEW.id_especie)
+	EXECUTE FUNCTION govet.sync_paciente_listado_raza();
+
+DROP TRIGGER IF EXISTS trg_paciente_listado_especie ON govet.especie;
+CREATE TRIGGER trg_paciente_listado_especie
+	AFTER UPDATE OF nombre_comun ON govet.especie
+	FOR EACH ROW
+	WHEN (OLD.nombre_comun IS DISTINCT FROM NEW.nombre_comun)
+	EXECUTE FUNCTION govet.sync_paciente_listado_especie();
+
+-- Reconstrucción completa (carga inicial, o reparación si se desactivaron los triggers)
+CREATE OR REPLACE FUNCTION govet.recalcular_paciente_listado()
+RETURNS bigint
+LANGUAGE plpgsql AS $$
+DECLARE
+	filas bigint;
+BEGIN
+	LOCK TABLE govet.paciente_listado IN EXCLUSIVE MODE;
+	DELETE FROM govet.paciente_listado;
+	INSERT INTO govet.paciente_listado SELECT * FROM govet.pacientes_listado_de(NULL);
+	GET DIAGNOSTICS filas = ROW_COUNT;
+	RETURN filas;
+END;
+$$;
+
+-- Carga inicial (los triggers ya están activos: lo escrito desde ahora queda registrado)
+SELECT govet.recalcular_paciente_listado();
+
+ANALYZE govet.paciente_listado;
@@ -0,0 +1,40 @@
+-- 006_correo_programado.sql
+-- Cola persistente de correos programados (POST /email/{fecha_envio})
+--
+-- Los recordatorios se guardaban en el AsyncIOScheduler en memoria de cada worker: se perdían
+-- al reiniciar y con varios workers cada uno tenía su propia lista. Ahora cada correo es una
+-- fila de govet.correo_programado. Un solo worker (el que tiene el advisory lock de líder, ver
+-- Backend/services/correos_programados.py) reclama por lotes los vencidos con
+-- FOR UPDATE SKIP LOCKED, los envía y marca el resultado.
+--
+-- Estados: pendiente -> enviando -> enviado | fallido. Un error de envío vuelve la fila a
+-- pendiente con disponible_desde más adelante hasta EMAIL_QUEUE_MAX_ATTEMPTS intentos; una
+-- fila que quedó en enviando (el worker murió a mitad del envío) se libera tras
+-- EMAIL_QUEUE_CLAIM_TIMEOUT.
+
+CREATE TABLE IF NOT EXISTS govet.correo_programado (
+	id_correo int8 GENERATED BY DEFAULT AS IDENTITY NOT NULL,
+	email varchar NOT NULL,
+	cuerpo text NOT NULL,
+	-- Hora pedida por el usuario (el retraso del despacho se mide contra esta)
+	programado_para timestamptz NOT NULL,
+	-- Próximo intento: programado_para al crear la fila, más adelante tras un error
+	disponible_desde timestamptz NOT NULL,
+	estado varchar(10) NOT NULL DEFAULT 'pendiente',
+	intentos int4 NOT NULL DEFAULT 0,
+	reclamado_en timestamptz NULL,
+	enviado_en timestamptz NULL,
+	ultimo_error text NULL,
+	creado_en timestamptz NOT NULL DEFAULT now(),
+	CONSTRAINT correo_programado_pk PRIMARY KEY (id_correo),
+	CONSTRAINT correo_programado_estado_check CHECK (estado IN ('pendiente', 'enviando', 'enviado', 'fallido'))
+);
+
+COMMENT ON TABLE govet.correo_programado IS 'Cola de correos programados; la despacha el worker líder (services/correos_programados.py)';
+
+-- Vencidos por reclamar (y profundidad de la cola); las filas enviadas no entran al índice
+CREATE INDEX IF NOT EXISTS idx_correo_programado_pendiente ON govet.correo_programado (disponible_desde)
+	WHERE estado = 'pendiente';
+-- Reclamos abandonados por un worker que murió a mitad del envío
+CREATE INDEX IF NOT EXISTS idx_correo_programado_enviando ON govet.correo_programado (reclamado_en)
+	WHERE estado = 'enviando';
@@ -0,0 +1,65 @@
+-- 007_paciente_listado_bloqueo.sql
+-- Serializa por paciente los recálculos de govet.paciente_listado (005)
+--
+-- refrescar_paciente_listado() calculaba la fila con la foto del momento y la escribía con
+-- ON CONFLICT DO UPDATE SET ... = EXCLUDED.*. Dos transacciones que tocan el mismo paciente
+-- por tablas distintas (p. ej. un INSERT en tutor_paciente y un UPDATE de paciente) calculan
+-- cada una su fila sin ver el cambio de la otra, y la que escribe al final pisa a la primera:
+-- la proyección queda con el tutor o con los datos del paciente desactualizados.
+--
+-- Ahora la función bloquea primero las filas de paciente (en orden de id, para no provocar
+-- deadlocks entre recálculos de varios pacientes) en una sentencia aparte. La segunda
+-- transacción espera a que la primera termine y, como en READ COMMITTED cada sentencia de
+-- PL/pgSQL toma una foto nueva, el INSERT ... SELECT que sigue ya ve lo que la otra confirmó.
+--
+-- Se usa FOR NO KEY UPDATE y no FOR UPDATE: un INSERT en tutor_paciente toma FOR KEY SHARE
+-- sobre el paciente por la clave foránea, y con FOR UPDATE dos INSERT concurrentes del mismo
+-- paciente se bloquearían entre sí (deadlock). FOR NO KEY UPDATE no choca con KEY SHARE pero
+-- sí consigo mismo y con el UPDATE de paciente, que es lo que hay que serializar.
+-- Los pacientes eliminados ya no tienen fila que bloquear: el DELETE los retiene hasta su
+-- COMMIT y después solo queda borrar su fila de la proyección.
+
+CREATE OR REPLACE FUNCTION govet.refrescar_paciente_listado(pacientes int8[])
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF pacientes IS NULL OR cardinality(pacientes) = 0 THEN
+		RETURN;
+	END IF;
+	-- Un recálculo a la vez por paciente; las sentencias siguientes ven lo confirmado mientras se esperaba
+	PERFORM 1 FROM govet.paciente
+	WHERE id_paciente = ANY (pacientes)
+	ORDER BY id_paciente
+	FOR NO KEY UPDATE;
+
+	-- Pacientes eliminados
+	DELETE FROM govet.paciente_listado l
+	WHERE l.id_paciente = ANY (pacientes)
+		AND NOT EXISTS (SELECT 1 FROM govet.paciente p WHERE p.id_paciente = l.id_paciente);
+
+	INSERT INTO govet.paciente_listado
+	SELECT * FROM govet.pacientes_listado_de(pacientes)
+	ON CONFLICT (id_paciente) DO UPDATE SET
+		nombre = EXCLUDED.nombre,
+		fecha_nacimiento = EXCLUDED.fecha_nacimiento,
+		color = EXCLUDED.color,
+		sexo = EXCLUDED.sexo,
+		esterilizado = EXCLUDED.esterilizado,
+		id_raza = EXCLUDED.id_raza,
+		codigo_chip = EXCLUDED.codigo_chip,
+		activo = EXCLUDED.activo,
+		raza = EXCLUDED.raza,
+		especie = EXCLUDED.especie,
+		tutor_rut = EXCLUDED.tutor_rut,
+		tutor_nombre = EXCLUDED.tutor_nombre,
+		tutor_apellido_paterno = EXCLUDED.tutor_apellido_paterno,
+		tutor_apellido_materno = EXCLUDED.tutor_apellido_materno,
+		tutor_telefono = EXCLUDED.tutor_telefono,
+		tutor_celular = EXCLUDED.tutor_celular,
+		tutor_email = EXCLUDED.tutor_email,
+		documento_busqueda = EXCLUDED.documento_busqueda,
+		ruts_busqueda = EXCLUDED.ruts_busqueda,
+		ruts_tutores = EXCLUDED.ruts_tutores,
+		telefonos_tutores = EXCLUDED.telefonos_tutores;
+END;
+$$;
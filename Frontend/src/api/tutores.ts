@@ -46,6 +46,7 @@ export interface PaginatedResponse {
     has_previous: boolean;
     next_page: number | null;
     previous_page: number | null;
+    next_cursor?: string | null;
   };
 }
 